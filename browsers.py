@@ -0,0 +1,185 @@
+import os
+import json
+import shutil
+from selenium.webdriver.chrome.options import Options as chrome_options
+from selenium.webdriver.chrome.service import Service as chrome_service
+from selenium.webdriver.firefox.options import Options as ff_options
+from selenium.webdriver.firefox.service import Service as ff_service
+from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+from constants import BrowserProfiles as BP, DriverConstants as DRC
+
+
+def build_options(browser_type, profile_name, headless, user_data_dir=None):
+    """
+    Creates Chrome or Firefox options object for the given launch profile.
+    user_data_dir - directory that is reused between browser launches (only if the profile asks for it)
+    """
+
+    profile = BP.PROFILES[profile_name]
+    if browser_type == "chrome":
+        options = chrome_options()
+        options.add_argument("--disable-gpu")
+        if headless:
+            options.add_argument("--headless")
+        #options.add_argument("--no-sandbox") # Uncomment this line if you want to run tests as root, but it is unsafe!
+        if profile["window_size"] is not None:
+            options.add_argument("--window-size={},{}".format(*profile["window_size"]))
+        if profile["disable_extensions"]:
+            options.add_argument("--disable-extensions")
+        if profile["disable_background_networking"]:
+            options.add_argument("--disable-background-networking")
+        if profile["disable_images"]:
+            # Tests only read 'src' of the error image, so the picture itself doesn't have to be downloaded
+            options.add_argument("--blink-settings=imagesEnabled=false")
+        if profile["reuse_user_data_dir"] and user_data_dir is not None:
+            options.add_argument(f"--user-data-dir={user_data_dir}")
+    elif browser_type == "firefox":
+        options = ff_options()
+        if headless:
+            options.add_argument("--headless")
+        #options.add_argument("-kiosk") # Fullscreen mode for Firefox. Uncomment if you want it enabled
+        if profile["window_size"] is not None:
+            options.add_argument("--width={}".format(profile["window_size"][0]))
+            options.add_argument("--height={}".format(profile["window_size"][1]))
+        if profile["disable_extensions"]:
+            options.set_preference("extensions.enabled", False)
+        if profile["disable_background_networking"]:
+            options.set_preference("app.update.auto", False)
+            options.set_preference("browser.safebrowsing.malware.enabled", False)
+            options.set_preference("browser.safebrowsing.phishing.enabled", False)
+            options.set_preference("network.prefetch-next", False)
+        if profile["disable_images"]:
+            options.set_preference("permissions.default.image", 2)
+        if profile["reuse_user_data_dir"] and user_data_dir is not None:
+            options.add_argument("-profile")
+            options.add_argument(str(user_data_dir))
+
+    options.page_load_strategy = profile["page_load_strategy"]
+    return options
+
+
+def size_window(browser, profile_name):
+    """Maximizes the browser window or sets it to the fixed size of the launch profile"""
+
+    window_size = BP.PROFILES[profile_name]["window_size"]
+    if window_size is None:
+        browser.maximize_window()
+    else:
+        browser.set_window_size(*window_size)
+
+
+class SharedServiceMixin():
+    """
+    Makes a driver service outlive the browsers that use it.
+    Webdriver objects start their service on creation and stop it on quit();
+    with this mixin the driver process is spawned once and only browser sessions come and go.
+    Call shutdown() to actually stop the driver process.
+    """
+
+    def start(self):
+        process = getattr(self, "process", None)
+        if process is None or process.poll() is not None:
+            super().start()
+
+
+    def stop(self):
+        pass
+
+
+    def shutdown(self):
+        """Stops the driver process"""
+
+        super().stop()
+
+
+class SharedChromeService(SharedServiceMixin, chrome_service):
+    """Chromedriver service that is shared by every Chrome browser of the session"""
+
+
+class SharedFirefoxService(SharedServiceMixin, ff_service):
+    """Geckodriver service that is shared by every Firefox browser of the session"""
+
+
+def read_driver_cache():
+    """Returns the contents of the driver cache file; empty dictionary if there's no cache yet"""
+
+    try:
+        with open(DRC.CACHE_PATH, encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_driver_cache(cache):
+    """Saves given dictionary to the driver cache file"""
+
+    os.makedirs(os.path.dirname(DRC.CACHE_PATH), exist_ok=True)
+    with open(DRC.CACHE_PATH, "w", encoding="utf-8") as cache_file:
+        json.dump(cache, cache_file, indent=4)
+
+
+def resolve_paths(browser_type, options, refresh=False):
+    """
+    Returns a dictionary with 'driver' and 'browser' executable paths for the given browser type.
+    Paths are looked up once per machine (PATH first, then Selenium Manager) and stored in the driver cache file,
+    later calls just read them from there. Cached paths that no longer exist are looked up again.
+    refresh - ignore cached paths and look them up again (e.g. after updating the browser)
+    """
+
+    cache = read_driver_cache()
+    paths = cache.get(browser_type)
+    if not refresh and paths and all(os.path.isfile(path) for path in paths.values() if path):
+        return paths
+
+    browser_path = None
+    for name in DRC.BROWSER_BINARIES[browser_type]:
+        browser_path = shutil.which(name)
+        if browser_path is not None:
+            break
+    driver_path = shutil.which(DRC.DRIVER_BINARIES[browser_type])
+    if driver_path is None:
+        driver_path = SeleniumManager().driver_location(options)
+
+    paths = {"driver": driver_path, "browser": browser_path}
+    cache[browser_type] = paths
+    write_driver_cache(cache)
+    return paths
+
+
+def start_driver_service(browser_type, profile_name, headless, refresh=False):
+    """
+    Resolves driver and browser paths through the driver cache and spawns a shared driver service.
+    Returns the service and the browser path (None if the browser wasn't found in PATH)
+    """
+
+    paths = resolve_paths(browser_type, build_options(browser_type, profile_name, headless), refresh)
+    if browser_type == "chrome":
+        service = SharedChromeService(executable_path=paths["driver"])
+    elif browser_type == "firefox":
+        service = SharedFirefoxService(executable_path=paths["driver"])
+    service.start()
+    return service, paths["browser"]
+
+
+def open_browser_context(browser):
+    """
+    Creates an isolated browser context (with its own cookies and storage) in the running Chrome through CDP,
+    opens a window in it and switches the driver to that window.
+    Returns the id of the context
+    """
+
+    context_id = browser.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+    target = browser.execute_cdp_cmd("Target.createTarget", {"url": "about:blank",
+                                                              "browserContextId": context_id,
+                                                              "newWindow": True})
+    # Chromedriver's window handles are target ids
+    browser.switch_to.window(target["targetId"])
+    return context_id
+
+
+def close_browser_context(browser, context_id, home_window):
+    """Switches the driver back to the home window and disposes of the browser context (closing its windows)"""
+
+    browser.switch_to.window(home_window)
+    browser.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
@@ -1,17 +1,24 @@
 import pytest
-import sqlite3
 import re
+import random
 from uuid import uuid4
 from collections import namedtuple
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as chrome_options
-from selenium.webdriver.firefox.options import Options as ff_options
-from werkzeug.security import generate_password_hash
 
+# selenium (with browsers.py), werkzeug and sqlite3 are imported by the fixtures that use them,
+# so collecting tests doesn't have to load them (see test_startup.py)
 from db_queries import DataBaseQueries
+from helpers import shared_setup_group
+from pages.base_page import BasePage
 from pages.register_page import RegisterPage
 from pages.login_page import LoginPage
-from constants import DatabaseConstants as DBC, URLS
+from pages.timeouts import ADAPTIVE_TIMEOUTS
+from constants import BrowserProfiles as BP, DatabaseConstants as DBC, LazyCases, URLS
+
+
+# Local plugins that extend the way tests are collected and run
+pytest_plugins = ["plugins.scheduler", "plugins.lazy_classes", "plugins.result_cache", "plugins.impact",
+                  "plugins.scale", "plugins.benchmark", "plugins.distributed",
+                  "plugins.run_report", "plugins.perf_gate"]
 
 
 def check_browser(value):
@@ -24,6 +31,16 @@ def check_browser(value):
     return value
 
 
+def check_browser_profile(value):
+    """Checks the value of the 'browser-profile' CLI argument"""
+
+    msg = f"Received incorrect --browser-profile flag value. Try one of: {', '.join(BP.PROFILES)}"
+    if value not in BP.PROFILES:
+        raise pytest.UsageError(msg)
+
+    return value
+
+
 def check_db_usage(value):
     """Checks if the user specified the usage of database"""
 
@@ -34,6 +51,16 @@ def check_db_usage(value):
     return value
 
 
+def check_seed(value):
+    """Checks the value of the 'seed' CLI argument"""
+
+    msg = "Received incorrect --seed flag value. Try a non-negative integer, for example: '--seed=1234'"
+    if not value.isdigit():
+        raise pytest.UsageError(msg)
+
+    return int(value)
+
+
 def pytest_addoption(parser):
     """
     Adds custom CLI arguments for pytest
@@ -54,6 +81,71 @@ def pytest_addoption(parser):
     # Available options: 'on' and 'off'
     parser.addoption("--headless", action="store_true", 
                      help="use --headless to run driver in headless mode")
+
+    # 'browser-profile' flag. Picks a set of browser launch settings from constants.BrowserProfiles
+    # Available options: 'default' and 'fast'
+    parser.addoption("--browser-profile", action="store", default="default",
+                     help="Choose browser launch profile: '--browser-profile=default' or '--browser-profile=fast'",
+                     type=check_browser_profile)
+
+    # 'refresh-driver-cache' flag. Looks up driver and browser paths again instead of reading them from the cache
+    # Useful after updating the browser or the driver
+    parser.addoption("--refresh-driver-cache", action="store_true",
+                     help="use --refresh-driver-cache to look up driver and browser paths again and update the cache")
+
+    # 'adaptive-timeouts' flag. Derives element and redirect wait timeouts from latencies observed in previous runs
+    parser.addoption("--adaptive-timeouts", action="store_true",
+                     help="use --adaptive-timeouts to derive wait timeouts from latencies observed in previous runs")
+
+    # 'export-timeouts' flag. Writes learned timeouts to pages/timeouts.json, so they could be checked in
+    parser.addoption("--export-timeouts", action="store_true",
+                     help="use --export-timeouts to write learned timeouts to pages/timeouts.json")
+
+    # 'share-setup' flag. Classes generated from templates marked with @pytest.mark.shared_setup
+    # share one browser and one user instead of launching and registering their own
+    parser.addoption("--share-setup", action="store_true",
+                     help="use --share-setup to let classes of read-only templates share one browser and one user")
+
+    # 'browser-contexts' flag. Test classes share one browser process; each class gets its own isolated
+    # browser context (cookies, storage) instead of its own browser. Chrome only
+    parser.addoption("--browser-contexts", action="store_true",
+                     help="use --browser-contexts to run every test class in its own context of one shared browser (Chrome only)")
+
+    # 'seed' flag. Seeds generation of every random test value, so a run can be replayed exactly
+    # If not given, a random seed is picked (and printed in the header)
+    parser.addoption("--seed", action="store", default=None, type=check_seed,
+                     help="Seed for random test values, for example: '--seed=1234' (random by default)")
+
+
+def pytest_configure(config):
+    """Checks option combinations, seeds random test values and turns adaptive timeouts on if requested"""
+
+    if config.getoption("--browser-contexts") and config.getoption("--browser") != "chrome":
+        raise pytest.UsageError("--browser-contexts requires --browser=chrome: contexts are created through CDP")
+
+    seed = config.getoption("--seed")
+    LazyCases.seed = seed if seed is not None else random.randrange(2**32)
+
+    if config.getoption("--adaptive-timeouts") or config.getoption("--export-timeouts"):
+        ADAPTIVE_TIMEOUTS.load()
+
+
+def pytest_report_header(config):
+    """Shows the seed of random test values, and where wait timeouts come from if adaptive timeouts are on"""
+
+    lines = [f"seed: {LazyCases.seed} (replay with --seed={LazyCases.seed})"]
+    if ADAPTIVE_TIMEOUTS.enabled:
+        lines.append(ADAPTIVE_TIMEOUTS.summary())
+    return lines
+
+
+def pytest_sessionfinish(session):
+    """Saves observed latencies and exports learned timeouts if requested"""
+
+    if ADAPTIVE_TIMEOUTS.enabled:
+        ADAPTIVE_TIMEOUTS.save()
+        if session.config.getoption("--export-timeouts"):
+            ADAPTIVE_TIMEOUTS.export()
     
 
 def pytest_collection_modifyitems(config, items):
@@ -64,35 +156,178 @@ def pytest_collection_modifyitems(config, items):
                 item.add_marker(pytest.mark.skip(reason="Database is unavailable → skipping this test"))
 
 
-@pytest.fixture(autouse=True, scope="class")
-def browser(request):
+@pytest.fixture(scope="session")
+def user_data_dir(tmp_path_factory):
     """
-    Autouse fixture.
-    Initiates a browser driver object
+    Temporary browser user data directory, shared by every browser launched during the session.
+    Only used by launch profiles with 'reuse_user_data_dir' enabled, so the browser won't have
+    to create a new profile and refill its' disk cache on every launch.
+    Session cookies aren't written to disk, so logged in users don't leak between test classes
     """
-    
+
+    return tmp_path_factory.mktemp("browser-user-data")
+
+
+@pytest.fixture(scope="session")
+def driver_service(request):
+    """
+    Spawns the browser driver once per session; every browser of the session connects to it.
+    Driver and browser paths are resolved once per machine and read from the driver cache afterwards.
+    Yields the service and the browser path
+    """
+
+    from browsers import start_driver_service
+
+    service, browser_path = start_driver_service(request.config.getoption("--browser"),
+                                                 request.config.getoption("--browser-profile"),
+                                                 request.config.getoption("--headless"),
+                                                 refresh=request.config.getoption("--refresh-driver-cache"))
+
+    yield service, browser_path
+
+    service.shutdown()
+
+
+@pytest.fixture(scope="session")
+def shared_setups(request, driver_service):
+    """
+    Browsers and users shared by the classes of each template marked with @pytest.mark.shared_setup
+    (only with '--share-setup'). Structured as {template: {"browser": ..., "service": ..., "user": ...}}
+    They are cleaned up at the end of the session instead of the end of each class
+    """
+
+    setups = {}
+
+    yield setups
+
+    for setup in setups.values():
+        if "browser" in setup:
+            setup["browser"].quit()
+        if "service" in setup:
+            setup["service"].shutdown()
+        if "user" in setup and request.config.getoption("--db-usage").lower() == "yes":
+            db = connect_database()
+            database = DataBaseQueries(db.cursor())
+            database.delete_tran_data(setup["user"].username)
+            database.delete_user_data(setup["user"].username)
+            db.close()
+
+
+def launch_browser(request, driver_service, user_data_dir):
+    """Launches a browser of the type and launch profile given in CLI arguments; returns the driver object"""
+
+    from selenium import webdriver
+    from browsers import build_options, size_window
+
+    service, browser_path = driver_service
     browser_type = request.config.getoption("--browser")
+    profile = request.config.getoption("--browser-profile")
+    options = build_options(browser_type, profile, request.config.getoption("--headless"), user_data_dir)
+    if browser_path is not None:
+        options.binary_location = browser_path
     if browser_type == "chrome":
-        options = chrome_options()
-        options.add_argument("--disable-gpu")
-        if request.config.getoption("--headless"):
-            options.add_argument("--headless")
-        #options.add_argument("--no-sandbox") # Uncomment this line if you want to run tests as root, but it is unsafe!
-        browser = webdriver.Chrome(options=options)
+        browser = webdriver.Chrome(options=options, service=service)
     elif browser_type == "firefox":
-        options = ff_options()
-        if request.config.getoption("--headless"):
-            options.add_argument("--headless")
-        #options.add_argument("-kiosk") # Fullscreen mode for Firefox. Uncomment if you want it enabled
-        browser = webdriver.Firefox(options=options) # Remeber that you can't run Firefox as root
+        browser = webdriver.Firefox(options=options, service=service) # Remeber that you can't run Firefox as root
+
+    size_window(browser, profile)
+    return browser
 
-    browser.maximize_window()
+
+@pytest.fixture(scope="session")
+def context_host(request, driver_service, user_data_dir):
+    """
+    The browser whose contexts test classes run in (only with '--browser-contexts')
+    Yields the driver object and the handle of its first window
+    """
+
+    browser = launch_browser(request, driver_service, user_data_dir)
+
+    yield browser, browser.current_window_handle
+
+    browser.quit()
+
+
+@pytest.fixture(autouse=True, scope="class")
+def browser(request, user_data_dir):
+    """
+    Autouse fixture.
+    Initiates a browser driver object.
+    Classes marked with @pytest.mark.no_browser don't get one (and the driver isn't started for them)
+    With '--browser-contexts', classes get the shared browser switched to a new context of their own
+    (a separate cookie jar, so every class still logs in its own new_user); classes of a shared template share one context
+    """
+
+    if request.node.get_closest_marker("no_browser"):
+        yield None
+        return
+
+    driver_service = request.getfixturevalue("driver_service")
+    shared_setups = request.getfixturevalue("shared_setups")
+    group = shared_setup_group(request)
+    if group is not None and "browser" in shared_setups.setdefault(group, {}):
+        yield shared_setups[group]["browser"]
+        return
+
+    if request.config.getoption("--browser-contexts"):
+        from browsers import open_browser_context, close_browser_context, size_window
+
+        browser, home_window = request.getfixturevalue("context_host")
+        if group is not None:
+            # Classes of a shared template share one context (and its logged in user);
+            # it is closed along with the context host at the end of the session
+            setup = shared_setups[group]
+            if "window" in setup:
+                browser.switch_to.window(setup["window"])
+            else:
+                open_browser_context(browser)
+                size_window(browser, request.config.getoption("--browser-profile"))
+                setup["window"] = browser.current_window_handle
+            yield browser
+            return
+
+        context_id = open_browser_context(browser)
+        size_window(browser, request.config.getoption("--browser-profile"))
+
+        yield browser
+
+        close_browser_context(browser, context_id, home_window)
+        return
+
+    if group is not None:
+        # A shared browser stays open while other classes launch their own, so it gets a driver service
+        # (a geckodriver service only takes one session at a time) and a user data directory
+        # (a browser locks the one it uses) of its own. Both are closed by shared_setups() at the end of the session
+        from browsers import start_driver_service
+
+        service = start_driver_service(request.config.getoption("--browser"),
+                                       request.config.getoption("--browser-profile"),
+                                       request.config.getoption("--headless"))
+        shared_setups[group]["service"] = service[0]
+        own_data_dir = request.getfixturevalue("tmp_path_factory").mktemp("browser-user-data-shared")
+        browser = launch_browser(request, service, own_data_dir)
+        shared_setups[group]["browser"] = browser
+        yield browser
+        return
+
+    browser = launch_browser(request, driver_service, user_data_dir)
 
     yield browser
 
     browser.quit()
 
 
+@pytest.fixture(autouse=True, scope="class")
+def keystrokes(request):
+    """
+    Autouse fixture.
+    Makes page objects fill forms keystroke by keystroke for classes marked with @pytest.mark.keystrokes,
+    and with one script call (BasePage.submit_form()) for the rest
+    """
+
+    BasePage.keystrokes = request.node.get_closest_marker("keystrokes") is not None
+
+
 @pytest.fixture(autouse=True)
 def skip_by_browser(request):
     """Helper fixture for skipping firefox or chrome specific tests"""
@@ -114,6 +349,39 @@ def db_available(request):
     return False
 
 
+@pytest.fixture(autouse=True, scope="session")
+def record_seed(record_testsuite_property):
+    """Stores the seed of random test values in the report (e.g. in the '--junitxml' one)"""
+
+    record_testsuite_property("seed", LazyCases.seed)
+
+
+@pytest.fixture(scope="class")
+def rng(request):
+    """Random generator for values picked during the test class, seeded from '--seed' and the class's node id"""
+
+    return LazyCases.random_for(request.node.nodeid)
+
+
+def connect_database():
+    """Connects to app's database and returns the connection object"""
+
+    import sqlite3
+
+    db = sqlite3.connect(f"file:{DBC.DATABASE_PATH}?mode=rw", # passing path as uri in rw mode so it won't be created
+                        uri=True,
+                        isolation_level=None,  # Turns autocommit mode on for sqlite3, 
+                                                # i.e all changes are commited immediately
+                        check_same_thread=True # Makes sure connection is only used by the thread that created it
+                        )
+
+    # Query results are returned as Row objects, which allow to access values using keys as in dictionaries
+    # For more info: https://docs.python.org/3/library/sqlite3.html#sqlite3.Row 
+    db.row_factory = sqlite3.Row 
+
+    return db
+
+
 @pytest.fixture(scope="class")
 def database(db_available):
     """
@@ -124,22 +392,11 @@ def database(db_available):
     If the user specified that there's no database access, returns None
     """
 
+    import sqlite3
+
     if db_available:
         try:
-            db = sqlite3.connect(f"file:{DBC.DATABASE_PATH}?mode=rw", # passing path as uri in rw mode so it won't be created
-                                uri=True,
-                                isolation_level=None,  # Turns autocommit mode on for sqlite3, 
-                                                        # i.e all changes are commited immediately
-                                check_same_thread=True # Makes sure connection is only used by the thread that created it
-                                )
-
-
-
-
-            # Query results are returned as Row objects, which allow to access values using keys as in dictionaries
-            # For more info: https://docs.python.org/3/library/sqlite3.html#sqlite3.Row 
-            db.row_factory = sqlite3.Row 
-
+            db = connect_database()
             database = DataBaseQueries(db.cursor())
 
             yield database
@@ -166,14 +423,22 @@ def login_creds():
 
 
 @pytest.fixture(scope="class")
-def new_user(browser, database, login_creds, db_available):
+def new_user(request, browser, database, login_creds, db_available, shared_setups):
     """
     Fixture that registers new user.
     If database can be accessed - simulates registration process and logs in with new creds.
     If not - goes through manual user registration process (calls register_new_user() from RegisterPage class)
+    With '--share-setup', classes of a shared_setup template reuse the user registered for the first of them
     """
     
+    group = shared_setup_group(request)
+    if group is not None and "user" in shared_setups[group]:
+        yield shared_setups[group]["user"]
+        return
+
     if db_available:
+        from werkzeug.security import generate_password_hash
+
         # Insert user data directly into the database
         database.add_new_user(login_creds.username, 
                                       generate_password_hash(login_creds.password, method='pbkdf2:sha256', salt_length=8)
@@ -185,14 +450,6 @@ def new_user(browser, database, login_creds, db_available):
              "Can't log in, make sure you have proper database access " \
              "or rerun tests with --db-usage=no"
              )
-
-        yield login_creds
-
-        # Delete data from database
-        # This clean up segment should delete every row of data associated with the created user in every table 
-        # Requires additional queries if database schema is different
-        database.delete_tran_data(login_creds.username)
-        database.delete_user_data(login_creds.username)
     
     else:
     
@@ -205,6 +462,17 @@ def new_user(browser, database, login_creds, db_available):
              f"current url: {rp.get_current_url()}; expected url: {URLS.DEFAULT_URL}"
              )
         
+    if group is not None:
+        # User data is deleted by shared_setups() at the end of the session
+        shared_setups[group]["user"] = login_creds
         yield login_creds
+        return
 
+    yield login_creds
 
+    if db_available:
+        # Delete data from database
+        # This clean up segment should delete every row of data associated with the created user in every table 
+        # Requires additional queries if database schema is different
+        database.delete_tran_data(login_creds.username)
+        database.delete_user_data(login_creds.username)
@@ -1,5 +1,40 @@
+import os
 import time
-from random import random, uniform, randint, choice
+import random
+
+
+class LazyCases():
+    """
+    Case list that is generated on first access instead of at import.
+    generate - function that receives a random.Random instance and returns the list of cases.
+    Each list gets its own generator, seeded from 'seed' and the list's name,
+    so adding or reordering cases of one list doesn't change values of the others.
+    """
+
+    # Seed of every generator; set from the '--seed' CLI argument before collection
+    seed = None
+
+    def __init__(self, generate):
+        self.generate = generate
+        self.name = None
+        self.cases = None
+
+
+    def __set_name__(self, owner, name):
+        self.name = f"{owner.__name__}.{name}"
+
+
+    @classmethod
+    def random_for(cls, name):
+        """Returns a random generator for the given name, seeded from 'seed' (see '--seed' CLI argument)"""
+
+        return random.Random(None if cls.seed is None else f"{cls.seed}:{name}")
+
+
+    def __get__(self, instance, owner=None):
+        if self.cases is None:
+            self.cases = self.generate(self.random_for(self.name))
+        return self.cases
 
 
 class URLS():
@@ -17,11 +52,56 @@ class URLS():
     HISTORY_URL = BASEURL + "/history"
 
 
+class BrowserProfiles():
+    """Launch profiles for the browser fixture; picked with the '--browser-profile' CLI argument"""
+
+    # Plain browser: 'normal' page load strategy, maximized window, nothing disabled
+    DEFAULT = {"page_load_strategy": "normal",
+               "window_size": None,
+               "disable_extensions": False,
+               "disable_background_networking": False,
+               "disable_images": False,
+               "reuse_user_data_dir": False}
+
+    # Throughput oriented browser: 'eager' page load strategy (doesn't wait for stylesheets and images),
+    # small fixed window, no extensions, background networking and images;
+    # user data directory is shared by every browser launched during the session
+    FAST = {"page_load_strategy": "eager",
+            "window_size": (1024, 768),
+            "disable_extensions": True,
+            "disable_background_networking": True,
+            "disable_images": True,
+            "reuse_user_data_dir": True}
+
+    # Available profiles by their CLI names
+    PROFILES = {"default": DEFAULT,
+                "fast": FAST}
+
+
+class DriverConstants():
+    """Browser driver lookup settings"""
+
+    # Path to the file that stores resolved driver and browser paths (one per machine)
+    CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "finance-test-suite", "drivers.json")
+
+    # Driver executable names to look for in PATH before asking Selenium Manager
+    DRIVER_BINARIES = {"chrome": "chromedriver",
+                       "firefox": "geckodriver"}
+
+    # Browser executable names to look for in PATH, in order of preference
+    # (install-chrome.sh and install-firefox.sh put them there)
+    BROWSER_BINARIES = {"chrome": ["google-chrome-stable", "google-chrome", "chromium", "chromium-browser"],
+                        "firefox": ["firefox"]}
+
+
 class DatabaseConstants():
     """Database column names"""
     # Path to app's database file
     DATABASE_PATH = "project/database.db"
 
+    # Path to app's source code (app.py, helpers.py, templates/...); used to tell if the app has changed ('--result-cache')
+    APP_PATH = "project"
+
 
     # Database table column name for each transaction's stock symbol
     STOCK_NAME = "stockname"
@@ -58,21 +138,22 @@ class CommonConstants():
     # Test values for cases of invalid symbol input
     # Some tests reference specific list elements,
     # so it is important to add new cases to THE END OF THE LIST 
-    INVALID_SYMBOL_CASES = [("", "Empty stock symbol"),
-                            (" ", "White-space stock symbol (one)"),
-                            ("   ", "White-space stock symbol (few)"),
-                            (randint(1, 999), "Digits only stock symbol"),
-                            (0, "Zero stock symbol"),
-                            (round(random()*10 + 0.1, 1), "Floating point number stock symbol"),
-                            (str(round(random()*10 + 0.1, 1)).replace(".",","), "Floating point number (comma) stock symbol"),
-                            (time.strftime("%d.%m.%Y", time.localtime()), "Date stock symbol"),
-                            ("NULL", "NULL stock symbol"),
-                            ("$@%?", "Special characters only stock symbol"),
-                            ("zyzx", "Non-existent stock symbol (only letters)"),
-                            ("$A23", "Non-existent stock symbol (combination)"),
-                            ("тест", "Other alphabets stock symbol #1"),
-                            ("片仮名", "Other alphabets stock symbol #2"),
-                            ("😍😍😍", "Emoji stock symbol")]
+    INVALID_SYMBOL_CASES = LazyCases(lambda rng: [
+        ("", "Empty stock symbol"),
+        (" ", "White-space stock symbol (one)"),
+        ("   ", "White-space stock symbol (few)"),
+        (rng.randint(1, 999), "Digits only stock symbol"),
+        (0, "Zero stock symbol"),
+        (round(rng.random()*10 + 0.1, 1), "Floating point number stock symbol"),
+        (str(round(rng.random()*10 + 0.1, 1)).replace(".",","), "Floating point number (comma) stock symbol"),
+        (time.strftime("%d.%m.%Y", time.localtime()), "Date stock symbol"),
+        ("NULL", "NULL stock symbol"),
+        ("$@%?", "Special characters only stock symbol"),
+        ("zyzx", "Non-existent stock symbol (only letters)"),
+        ("$A23", "Non-existent stock symbol (combination)"),
+        ("тест", "Other alphabets stock symbol #1"),
+        ("片仮名", "Other alphabets stock symbol #2"),
+        ("😍😍😍", "Emoji stock symbol")])
 
     # Test values for cases of invalid amount input (typable)
     # Some tests reference specific list elements,
@@ -90,16 +171,19 @@ class CommonConstants():
     # Test values for cases of invalid amount input (untypable)
     # Some tests reference specific list elements,
     # so it is important to add new cases to THE END OF THE LIST 
-    TYPABLE_AMOUNT_CASES = [(0, "Zero amount"),
-                            (randint(-10000, -1), "Negative amount"),
-                            (round(int(random()*10) + uniform(0.1, 0.9), 1), "Float amount (period)"),
-                            (randint(1000, 10000), "More than available/affordable"),
-                            (round((random()*10 + 1), 0), "Fractionless float")]
+    TYPABLE_AMOUNT_CASES = LazyCases(lambda rng: [
+        (0, "Zero amount"),
+        (rng.randint(-10000, -1), "Negative amount"),
+        (round(int(rng.random()*10) + rng.uniform(0.1, 0.9), 1), "Float amount (period)"),
+        (rng.randint(1000, 10000), "More than available/affordable"),
+        (round((rng.random()*10 + 1), 0), "Fractionless float")])
     
 
     # Test cases for table tests
-    TABLE_CASES = [([choice([TEST_SYMBOLS[0], TEST_SYMBOLS[3]]), choice([TEST_SYMBOLS[1], TEST_SYMBOLS[2]])], 
-                    [randint(1, 5), randint(1, 5)])]
+    TABLE_CASES = LazyCases(lambda rng: [
+        ([rng.choice([CommonConstants.TEST_SYMBOLS[0], CommonConstants.TEST_SYMBOLS[3]]),
+          rng.choice([CommonConstants.TEST_SYMBOLS[1], CommonConstants.TEST_SYMBOLS[2]])],
+         [rng.randint(1, 5), rng.randint(1, 5)])])
 
 
 class BuyConstants():
@@ -142,8 +226,9 @@ class BuyConstants():
 
 
     # Test values for cases of succesfull purchases
-    SUCCESSFULL_PURCHASE_CASES = [(choice(CommonConstants.TEST_SYMBOLS), 1),
-                                  (choice(CommonConstants.TEST_SYMBOLS).lower(), 10)]
+    SUCCESSFULL_PURCHASE_CASES = LazyCases(lambda rng: [
+        (rng.choice(CommonConstants.TEST_SYMBOLS), 1),
+        (rng.choice(CommonConstants.TEST_SYMBOLS).lower(), 10)])
 
 
 class NavigationsConstants():
@@ -192,6 +277,11 @@ class DefaultConstants():
                         HEADER_TOTAL]
 
 
+    # Numbers of distinct positions held by the users of portfolio scale tests (test_default_page_scale.py)
+    # Symbols of these positions are made up, so the app's lookup() has to resolve any symbol (e.g. a local quote stub)
+    PORTFOLIO_SIZES = [(1000,), (10000,), (50000,)]
+
+
 class HistoryConstants():
     """Constants for History Page test module"""
 
@@ -213,6 +303,19 @@ class HistoryConstants():
                         HEADER_AMOUNT, 
                         HEADER_PRICE, 
                         HEADER_DATETIME]
+
+
+    # Timezone of the History table's timestamps (SQLite's CURRENT_TIMESTAMP is in UTC)
+    TIMEZONE = "UTC"
+
+    # Tolerated difference (in seconds) between a transaction's timestamp and the time it was made
+    TIME_TOLERANCE = 5
+
+    # Order of History table rows: 'ascending' (oldest first) or 'descending' (newest first)
+    TIME_ORDER = "ascending"
+
+    # Numbers of transactions made by the users of history scale tests (test_history_page_scale.py)
+    HISTORY_SIZES = [(10000,), (100000,), (1000000,)]
     
 
 class LoginConstants():
@@ -267,6 +370,11 @@ class QuoteConstants():
     INVALID_STOCK_SYMBOL = "INVALID SYMBOL"
 
 
+    # Test values for cases of valid quote queries
+    VALID_QUOTE_CASES = LazyCases(lambda rng: [rng.choice(CommonConstants.TEST_SYMBOLS),
+                                               rng.choice(CommonConstants.TEST_SYMBOLS).lower()])
+
+
 class RegisterConstants():
     """Constants for Register Page test module"""
 
@@ -361,8 +469,12 @@ class SellConstants():
 
 
     # Test values for cases of succesfull selling
-    SUCCESSFULL_SELL_CASES = [(choice(CommonConstants.TEST_SYMBOLS), 1)]
-
-    # Test values for cases of succesfull selling (multiple stocks)
-    SUCCESSFULL_BATCH_SELLS = [([choice(CommonConstants.TEST_SYMBOLS), choice(CommonConstants.TEST_SYMBOLS).lower()], 
-                                [1, 2])]
+    SUCCESSFULL_SELL_CASES = LazyCases(lambda rng: [(rng.choice(CommonConstants.TEST_SYMBOLS), 1)])
+
+    # Test values for cases of succesfull selling (multiple stocks), by dimension:
+    # every pair of values is tested by default ('--coverage=pairwise'), every combination with '--coverage=full'
+    # Second symbol is lowercased, and includes the first symbol to check that stocks aren't duplicated
+    SUCCESSFULL_BATCH_SELLS = {"first_symbol": [CommonConstants.TEST_SYMBOLS[0], CommonConstants.TEST_SYMBOLS[3]],
+                               "second_symbol": [symbol.lower() for symbol in CommonConstants.TEST_SYMBOLS[:3]],
+                               "first_amount": [1, 2],
+                               "second_amount": [1, 2]}
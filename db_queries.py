@@ -1,3 +1,6 @@
+from pages.timings import TIMINGS
+
+
 class DataBaseQueries():
     """
     Contains a common method for executing queries which is basically a decorator
@@ -9,6 +12,7 @@ class DataBaseQueries():
         self.cursor = cursor
 
 
+    @TIMINGS.timed("db_queries")
     def query(self, *args):
         """
         Requires database connection's attribute row_factory to be set to sqlite3.Row
@@ -66,6 +70,30 @@ class DataBaseQueries():
                           price)
 
 
+    @TIMINGS.timed("db_queries")
+    def add_trans(self, username, transactions):
+        """
+        Adds many transactions for specified user at once (in a single database transaction)
+        transactions - iterable of (symbol, amount, price) tuples
+        """
+
+        user_id = self.user_data(username)["id"]
+        self.cursor.execute("BEGIN;")
+        try:
+            self.cursor.executemany("""
+                                    INSERT INTO PURCHASES (user_id, 
+                                                           stockname, 
+                                                           amount, 
+                                                           price) 
+                                    VALUES (?, ?, ?, ?);
+                                    """,
+                                    ((user_id, symbol.upper(), amount, price) for symbol, amount, price in transactions))
+        except Exception:
+            self.cursor.execute("ROLLBACK;")
+            raise
+        self.cursor.execute("COMMIT;")
+
+
     def change_cash_by(self, username, value):
         """Changes user's cash value by specified amount"""
 
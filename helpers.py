@@ -1,6 +1,25 @@
 import pytest
 import time
-from collections import namedtuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from string import ascii_uppercase
+from functools import cache
+from collections import Counter, namedtuple
+from itertools import combinations, islice, product
+
+from constants import DefaultConstants as DC, DatabaseConstants as DBC, HistoryConstants as HC
+
+def generated_class_prefix(cls: type):
+    """Returns the name classes generated from the template get (before parameters): 'BaseXTest' -> 'TestX'"""
+
+    return "Test" + cls.__name__.removeprefix("Base").removesuffix("Test")
+
+
+def generated_class_name(cls: type, test_values: tuple):
+    """Returns the name of the class generated from the template for the values: 'TestX[AAPL-1]'"""
+
+    return generated_class_prefix(cls) + "[" + "-".join(str(value) for value in test_values) + "]"
+
 
 def generate_tests_cls_parametrize(cls: type, parameter_names: str, values: list[tuple]):
     """
@@ -21,11 +40,9 @@ def generate_tests_cls_parametrize(cls: type, parameter_names: str, values: list
         def my_fixture(self):
             return someparam
         return my_fixture
-    base_cls_name = "Test" + cls.__name__.removeprefix("Base").removesuffix("Test")
     gen_classes = {}
     for test_values in values:
-        name_suffix = "[" + "-".join(str(value) for value in test_values) + "]"
-        cls_name = base_cls_name + name_suffix 
+        cls_name = generated_class_name(cls, test_values)
         newclass = type(
             cls_name,
             (cls,),
@@ -38,6 +55,97 @@ def generate_tests_cls_parametrize(cls: type, parameter_names: str, values: list
     return gen_classes
 
 
+def parametrize_class(parameter_names: str, values):
+    """
+    Class decorator that registers a template for generate_tests_cls_parametrize().
+    Classes aren't generated at import: plugins/lazy_classes.py generates them during collection,
+    and only for templates that are selected.
+    values - list of tuples or a function returning one (so that cases are generated only when needed).
+    Can also be a dictionary of dimensions, {parameter name: list of its values}; then classes are generated
+    for combinations of values, picked according to the '--coverage' CLI argument
+    """
+
+    def register(cls):
+        cls.class_parametrization = (parameter_names, values)
+        return cls
+    return register
+
+
+def pairwise_rows(sizes, fresh):
+    """
+    Returns combinations (tuples of value indexes of dimensions of the given sizes) in which every pair of values
+    from any two dimensions occurs at least once. Greedy: every next combination covers the most of the remaining pairs,
+    but combinations from the 'fresh' set are preferred to any other that covers at least one remaining pair
+    """
+
+    uncovered = {(i, a, j, b) for i, j in combinations(range(len(sizes)), 2)
+                 for a in range(sizes[i]) for b in range(sizes[j])}
+    candidates = list(product(*(range(size) for size in sizes)))
+    rows = []
+    while uncovered:
+        def rank(row):
+            gain = sum((i, row[i], j, row[j]) in uncovered for i, j in combinations(range(len(row)), 2))
+            return gain > 0 and row in fresh, gain
+        row = max(candidates, key=rank)
+        uncovered -= {(i, row[i], j, row[j]) for i, j in combinations(range(len(row)), 2)}
+        rows.append(row)
+    return rows
+
+
+@cache
+def pairwise_rotation(sizes):
+    """
+    Returns pairwise covering arrays (see pairwise_rows()) for consecutive runs, until together they cover
+    every combination. Every array prefers combinations none of the previous arrays had,
+    and has at least one of them (its first combination), so the rotation always ends
+    """
+
+    fresh = set(product(*(range(size) for size in sizes)))
+    rotation = []
+    while fresh:
+        rows = pairwise_rows(sizes, fresh)
+        fresh -= set(rows)
+        rotation.append(rows)
+    return rotation
+
+
+def covering_array(dimensions, run=0):
+    """
+    Returns a short list of combinations (one value from each dimension) in which every pair of values
+    from any two dimensions occurs at least once (pairwise coverage).
+    run - index of the run in the rotation: consecutive runs get different combinations,
+    and every few runs (the length of the rotation) together cover every combination
+    """
+
+    if len(dimensions) < 2:
+        return [tuple(values) for values in zip(*dimensions)]
+
+    rotation = pairwise_rotation(tuple(len(values) for values in dimensions))
+    rows = rotation[run % len(rotation)]
+    return [tuple(dimensions[k][row[k]] for k in range(len(dimensions))) for row in rows]
+
+
+def synthetic_symbols(count):
+    """Returns a list of count distinct made up stock symbols: 'AAAA', 'AAAB', ... (up to 26^4 of them)"""
+
+    return ["".join(letters) for letters in islice(product(ascii_uppercase, repeat=4), count)]
+
+
+def shared_setup_group(request):
+    """
+    Returns the name of the @pytest.mark.shared_setup template the requesting test class was generated from.
+    Classes of such templates only read app's state, so with '--share-setup' they can share one browser and one user.
+    Returns None if the class isn't generated from a shared_setup template or the option is off
+    """
+
+    if request.cls is None or not request.config.getoption("--share-setup"):
+        return None
+    for cls in request.cls.__mro__:
+        if any(mark.name == "shared_setup" for mark in cls.__dict__.get("pytestmark", [])):
+            return f"{request.module.__name__}::{cls.__name__}"
+    return None
+
+
 def setup_page(class_name, browser, link):
     """Reusable page setup; allows to pick a scope for each clas depending on test conditions"""
 
@@ -46,6 +154,25 @@ def setup_page(class_name, browser, link):
     return page
 
 
+def run_with_async_page(browser, page_class, url, action):
+    """
+    Opens the URL with an async page object (see pages/async_base_page.py) attached to the browser's current window,
+    and runs a trio event loop until action(page) coroutine is done. Returns its result.
+    Other async page objects can share the page's session: page_class(page.session, page.devtools, url)
+    """
+
+    import trio
+    from pages.async_base_page import cdp_connection, window_session
+
+    async def main():
+        async with cdp_connection(browser) as (connection, devtools):
+            async with window_session(browser, connection, devtools) as session:
+                page = page_class(session, devtools, url)
+                await page.open()
+                return await action(page)
+    return trio.run(main)
+
+
 def compare_time(t1, tdiff=2, delay=5):
     """
     Compares t1 argument with current time.
@@ -72,6 +199,56 @@ def compare_time(t1, tdiff=2, delay=5):
     return False
 
 
+# Problem found by validate_timestamps(); index - position of the timestamp in the column
+TimestampProblem = namedtuple('TimestampProblem', ['index', 'value', 'reason'])
+
+
+def parse_timestamps(values, timezone=HC.TIMEZONE):
+    """
+    Parses a column of timestamps ('YYYY-MM-DD HH:MM:SS', in the given timezone unless they have an offset)
+    Returns a list of POSIX times (None for values that can't be parsed).
+    Histories repeat timestamps a lot, so each distinct value is parsed only once
+    """
+
+    zone = ZoneInfo(timezone)
+    parsed = {}
+    for value in set(values):
+        try:
+            moment = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            parsed[value] = None
+            continue
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=zone)
+        parsed[value] = moment.timestamp()
+    return [parsed[value] for value in values]
+
+
+def validate_timestamps(values, start, end, timezone=HC.TIMEZONE, tolerance=HC.TIME_TOLERANCE, order=HC.TIME_ORDER):
+    """
+    Validates a whole column of timestamps at once.
+    start, end - POSIX times (time.time()) between which the transactions were made
+    Every timestamp has to be within [start - tolerance, end + tolerance] (in seconds),
+    and timestamps have to be sorted in the given order ('ascending', 'descending' or None to skip the check)
+    Returns a list of every TimestampProblem found (empty if the column is valid)
+    """
+
+    times = parse_timestamps(values, timezone)
+    low, high = start - tolerance, end + tolerance
+    problems = [TimestampProblem(index, value, "can't be parsed")
+                for index, (value, moment) in enumerate(zip(values, times)) if moment is None]
+    problems += [TimestampProblem(index, value, f"is more than {tolerance}s away from the time it was made")
+                 for index, (value, moment) in enumerate(zip(values, times))
+                 if moment is not None and not low <= moment <= high]
+    if order is not None:
+        # Values that can't be parsed are left out of the order check
+        parsed = [(index, moment) for index, moment in enumerate(times) if moment is not None]
+        sign = 1 if order == "ascending" else -1
+        problems += [TimestampProblem(index, values[index], f"breaks {order} order")
+                     for (_, previous), (index, current) in zip(parsed, parsed[1:]) if sign * (current - previous) < 0]
+    return sorted(problems)
+
+
 def zip_by_key(actual, expected):
     """Creates a list of tuples only of values from two dictionaries which have the same key"""
     
@@ -80,3 +257,87 @@ def zip_by_key(actual, expected):
     matches = [combined(k, actual[k], v) for (k, v) in expected.items() if k in actual]
     return matches
 
+
+# Mismatch found by reconcile_portfolio()
+# check - name of the failed check; actual - value shown on the page; expected - value it was compared with
+Mismatch = namedtuple('Mismatch', ['symbol', 'check', 'actual', 'expected'])
+
+
+def to_columns(rows, names=None):
+    """
+    Turns rows (a list of dictionaries, a single dictionary or None, as returned by DataBaseQueries.query())
+    into columns: a dictionary structured as {name: list of values}
+    names - keys to take (default: keys of the first row)
+    """
+
+    if rows is None:
+        rows = []
+    elif isinstance(rows, dict):
+        rows = [rows]
+    if names is None:
+        names = list(rows[0]) if rows else []
+    return {name: [row[name] for row in rows] for name in names}
+
+
+def to_cents(values):
+    """Converts a column of currency values to whole cents, so they can be compared exactly"""
+
+    return [round(value * 100) for value in values]
+
+
+def reconcile_portfolio(table, db, cash, total, matching=((DC.HEADER_AMOUNT, DBC.STOCK_AMOUNT),)):
+    """
+    Reconciles the Default page stock table with user's possessed stocks from the database, all at once.
+    table - columns of the stock table (see DefaultPage.stocktable_columns()); db - columns of possessed_stocks()
+    cash, total - values of the page's cash and TOTAL elements
+    matching - pairs of (table column, db column) whose values have to be equal for every symbol
+    Rows are joined by symbol, and every column is checked in one pass:
+    - every symbol is on both sides, and only once in the table
+    - matching columns are equal
+    - TOTAL of every row is shares × price within one cent
+    - sum of rows' TOTAL + cash is the grand TOTAL within one cent
+    Returns a list of every Mismatch found (empty if the table is consistent)
+    """
+
+    mismatches = []
+    table_symbols = table.get(DC.HEADER_SYMBOL, [])
+    table_index = {symbol: index for index, symbol in enumerate(table_symbols)}
+    db_index = {symbol: index for index, symbol in enumerate(db.get(DBC.STOCK_NAME, []))}
+
+    if len(table_index) != len(table_symbols):
+        mismatches += [Mismatch(symbol, "row count", count, 1)
+                       for symbol, count in Counter(table_symbols).items() if count > 1]
+    mismatches += [Mismatch(symbol, "row", "missing", "present") for symbol in db_index.keys() - table_index.keys()]
+    mismatches += [Mismatch(symbol, "row", "present", "missing") for symbol in table_index.keys() - db_index.keys()]
+
+    joined = [symbol for symbol in table_index if symbol in db_index]
+    table_rows = [table_index[symbol] for symbol in joined]
+    db_rows = [db_index[symbol] for symbol in joined]
+    for table_column, db_column in matching:
+        actual = [table[table_column][index] for index in table_rows]
+        expected = [db[db_column][index] for index in db_rows]
+        mismatches += [Mismatch(symbol, table_column, a, e)
+                       for symbol, a, e in zip(joined, actual, expected) if a != e]
+
+    if table_symbols:
+        row_totals = to_cents(table[DC.HEADER_TOTAL])
+        expected_totals = [round(shares * price)
+                           for shares, price in zip(table[DC.HEADER_AMOUNT], to_cents(table[DC.HEADER_PRICE]))]
+        mismatches += [Mismatch(symbol, DC.HEADER_TOTAL, a / 100, e / 100)
+                       for symbol, a, e in zip(table_symbols, row_totals, expected_totals) if abs(a - e) > 1]
+    else:
+        row_totals = []
+    expected_total = sum(row_totals) + round(cash * 100)
+    if abs(round(total * 100) - expected_total) > 1:
+        mismatches.append(Mismatch(None, "grand " + DC.HEADER_TOTAL, total, expected_total / 100))
+    return mismatches
+
+
+def describe_mismatches(mismatches, limit=20):
+    """Returns a readable list of mismatches found by reconcile_portfolio() (first (limit) of them)"""
+
+    lines = [f"{mismatch.symbol or 'portfolio'}: {mismatch.check} is {mismatch.actual}, expected {mismatch.expected}"
+             for mismatch in mismatches[:limit]]
+    if len(mismatches) > limit:
+        lines.append(f"...and {len(mismatches) - limit} more")
+    return "\n".join(lines)
@@ -0,0 +1,211 @@
+import json
+from contextlib import asynccontextmanager
+
+# trio and Selenium's CDP client are imported by the functions that use them,
+# so importing page objects to collect tests doesn't load them (see test_startup.py)
+from .base_page import BasePage, DEFAULT_TIMEOUT, JS_STRATEGIES, JS_SUBMIT_FORM, JS_TABLE_TEXTS, JS_WAIT_FOR_ELEMENTS
+
+
+# Resolves with the text of elements JS_WAIT_FOR_ELEMENTS waited for (or with null);
+# elements themselves can't be sent over CDP by value
+JS_WAIT_FOR_TEXTS = """
+var done = arguments[arguments.length - 1];
+var args = Array.prototype.slice.call(arguments, 0, -1);
+args.push(function (found) {
+    done(found ? found.map(function (elm) { return (elm.innerText || elm.textContent || "").trim(); }) : null);
+});
+(function () {""" + JS_WAIT_FOR_ELEMENTS + """}).apply(null, args);
+"""
+
+# Marks the current document, so that a new document (after a navigation) can be told apart from it
+JS_MARK_DOCUMENT = "window.asyncPageMarked = true;"
+# True once a new, completely loaded document has replaced the marked one
+JS_IS_NEW_DOCUMENT = "return !window.asyncPageMarked && document.readyState === 'complete';"
+
+# Interval (in seconds) between checks while waiting for a new document
+POLL_INTERVAL = 0.05
+
+
+def call_expression(script, args, is_async=False):
+    """
+    Returns a JS expression that runs a script written for execute_script() with the given (JSON) arguments.
+    Scripts written for execute_async_script() (is_async) get a callback as the last argument,
+    and the expression is a promise of the value the script passes to it
+    """
+
+    args = json.dumps(list(args))
+    if is_async:
+        return "new Promise(function (done) { (function () {" + script + "}).apply(null, " + args + ".concat([done])); })"
+    return "(function () {" + script + "}).apply(null, " + args + ")"
+
+
+@asynccontextmanager
+async def cdp_connection(browser):
+    """
+    Opens a CDP websocket connection to the browser of the WebDriver session (Chrome)
+    Yields a tuple of the connection and the devtools module of browser's CDP version.
+    Unlike Selenium's bidi_connection(), doesn't attach to the first target it finds;
+    sessions for targets (windows, contexts) are opened with window_session() or connection.open_session()
+    """
+
+    from selenium.webdriver.common.bidi import cdp
+
+    if browser.caps.get("se:cdp"):
+        version, ws_url = browser.caps.get("se:cdpVersion").split(".")[0], browser.caps.get("se:cdp")
+    else:
+        version, ws_url = browser._get_cdp_details()
+    devtools = cdp.import_devtools(version)
+    async with cdp.open_cdp(ws_url) as connection:
+        yield connection, devtools
+
+
+@asynccontextmanager
+async def window_session(browser, connection, devtools):
+    """Attaches to the target of the browser's current window (chromedriver's window handles are target ids)"""
+
+    async with connection.open_session(devtools.target.TargetID(browser.current_window_handle)) as session:
+        yield session
+
+
+async def gather(*coroutines):
+    """Runs coroutines concurrently (in one trio nursery) and returns their results in the same order"""
+
+    import trio
+
+    results = [None] * len(coroutines)
+
+    async def run(index, coroutine):
+        results[index] = await coroutine
+
+    async with trio.open_nursery() as nursery:
+        for index, coroutine in enumerate(coroutines):
+            nursery.start_soon(run, index, coroutine)
+    return results
+
+
+class AsyncBasePage():
+    """
+    Async counterpart of BasePage.
+    Commands are sent over a CDP websocket session instead of one WebDriver HTTP request at a time,
+    so independent operations (e.g. reading cash and TOTAL, or driving pages of several browser contexts)
+    can overlap in one trio event loop with gather().
+    Methods of children classes are coroutines named after the methods of their synchronous page objects
+    """
+
+    # Value helpers don't touch the browser, so they're shared with the synchronous page objects
+    is_currency = staticmethod(BasePage.is_currency)
+    is_integer = staticmethod(BasePage.is_integer)
+    currency_to_number = staticmethod(BasePage.currency_to_number)
+    organize_cell_texts = BasePage.organize_cell_texts
+    table_rows = BasePage.table_rows
+
+    def __init__(self, session, devtools, url, timeout=DEFAULT_TIMEOUT):
+        self.session = session
+        self.devtools = devtools
+        self.url = url
+        self.timeout = timeout
+
+
+    async def evaluate(self, expression):
+        """Evaluates the JS expression in the page (awaiting it, if it is a promise) and returns its value"""
+
+        from selenium.common.exceptions import JavascriptException
+
+        result, exception = await self.session.execute(
+            self.devtools.runtime.evaluate(expression=expression, return_by_value=True, await_promise=True))
+        if exception is not None:
+            description = exception.exception.description if exception.exception is not None else exception.text
+            raise JavascriptException(description)
+        return result.value
+
+
+    async def execute_script(self, script, *args):
+        """Runs a script written for WebDriver's execute_script() (arguments have to be JSON serializable)"""
+
+        return await self.evaluate(call_expression(script, args))
+
+
+    async def execute_async_script(self, script, *args):
+        """Runs a script written for WebDriver's execute_async_script() (arguments have to be JSON serializable)"""
+
+        return await self.evaluate(call_expression(script, args, is_async=True))
+
+
+    async def wait_for_new_document(self):
+        """
+        Waits for (timeout) seconds until a new document replaces the one marked with JS_MARK_DOCUMENT and loads
+        Returns True if it did, and False if it didn't
+        """
+
+        import trio
+        from selenium.common.exceptions import JavascriptException
+        from selenium.webdriver.common.bidi.cdp import BrowserError
+
+        with trio.move_on_after(self.timeout):
+            while True:
+                try:
+                    if await self.execute_script(JS_IS_NEW_DOCUMENT):
+                        return True
+                except (JavascriptException, BrowserError):
+                    # The document is being replaced
+                    pass
+                await trio.sleep(POLL_INTERVAL)
+        return False
+
+
+    async def open(self):
+        """Opens the URL that was used to initiate a POM object"""
+
+        await self.go_to_other_page(self.url)
+
+
+    async def go_to_other_page(self, new_url):
+        """Opens the given URL and waits for it to load"""
+
+        await self.execute_script(JS_MARK_DOCUMENT)
+        await self.session.execute(self.devtools.page.navigate(url=new_url))
+        await self.wait_for_new_document()
+
+
+    async def get_current_url(self):
+        """Returns the URL for the current page"""
+
+        return await self.execute_script("return location.href;")
+
+
+    async def retrieve_texts(self, how, what):
+        """
+        Waits for elements on the page for (timeout) seconds
+        Returns a list of their texts; If no element was found returns None
+        """
+
+        if how not in JS_STRATEGIES:
+            raise ValueError(f"Locator strategy '{how}' can't be used by async page objects")
+        return await self.execute_async_script(JS_WAIT_FOR_TEXTS, how, what, self.timeout)
+
+
+    async def retrieve_text(self, how, what):
+        """Waits for an element on the page and returns its text; If element wasn't found returns None"""
+
+        texts = await self.retrieve_texts(how, what)
+        return texts[0] if texts else None
+
+
+    async def table_texts(self, cells_locator, headers_locator):
+        """Reads text of every cell and header of a table with one script call; see BasePage.table_texts()"""
+
+        cell_texts, header_texts = await self.execute_script(JS_TABLE_TEXTS, *cells_locator, *headers_locator)
+        return cell_texts, header_texts
+
+
+    async def submit_form(self, values, button_locator):
+        """
+        Fills and submits a form like BasePage.submit_form(), then waits for the next page to load
+        Returns False if any of the elements isn't on the page, or if no page has been loaded
+        """
+
+        fields = [[how, what, str(value)] for (how, what), value in values.items()]
+        await self.execute_script(JS_MARK_DOCUMENT)
+        if await self.execute_script(JS_SUBMIT_FORM, fields, list(button_locator)) is not True:
+            return False
+        return await self.wait_for_new_document()
@@ -1,13 +1,15 @@
 import os
 import re
-import emoji
+import time
+from functools import cache
+from collections import namedtuple
 from urllib.parse import urlparse, unquote
 
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support import expected_conditions as EC
-
-from .locators import BasePageLocators
+# Selenium and emoji are imported by the methods that use them, so importing page objects
+# to collect tests doesn't load them (see test_startup.py)
+from .locators import BasePageLocators, By
+from .timeouts import ADAPTIVE_TIMEOUTS, locator_name
+from .timings import TIMINGS
 
 
 # Default timeout value for webpage element search (in seconds)
@@ -16,12 +18,175 @@ DEFAULT_TIMEOUT = 4
 TRANSITION_TO = 4
 
 
+# State of the elements matching one locator, as returned by BasePage.snapshot()
+# count - number of matching elements; other fields describe the first match (None if nothing matched)
+ElementSnapshot = namedtuple('ElementSnapshot', ['count', 'text', 'value', 'placeholder', 'type', 'disabled'])
+
+# Timing and size of the current page, as returned by BasePage.page_metrics()
+# server_time - from sending the request to the first byte of the response, response_time - to its last byte (in ms)
+# transfer_size - size of the response (in bytes); dom_size - number of elements on the page
+PageMetrics = namedtuple('PageMetrics', ['server_time', 'response_time', 'transfer_size', 'dom_size'])
+
+
+# Locator strategies that can be resolved by JS_FIND_ALL
+JS_STRATEGIES = (By.XPATH, By.NAME, By.TAG_NAME, By.ID, By.CSS_SELECTOR)
+
+# Javascript counterpart of Selenium's find_elements; shared by the scripts below
+JS_FIND_ALL = """
+function findAll(how, what) {
+    if (how === "xpath") {
+        var found = [];
+        var result = document.evaluate(what, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < result.snapshotLength; i++) {
+            found.push(result.snapshotItem(i));
+        }
+        return found;
+    } else if (how === "name") {
+        return Array.from(document.getElementsByName(what));
+    } else if (how === "tag name") {
+        return Array.from(document.getElementsByTagName(what));
+    } else if (how === "id") {
+        // Escaped, so ids with quotes or other special characters work too; all elements with the id are returned
+        return Array.from(document.querySelectorAll("#" + CSS.escape(what)));
+    }
+    return Array.from(document.querySelectorAll(what));
+}
+"""
+
+# Resolves with the list of matching elements as soon as a DOM mutation makes the locator match,
+# or with null after (timeout) seconds
+JS_WAIT_FOR_ELEMENTS = JS_FIND_ALL + """
+var how = arguments[0], what = arguments[1], timeout = arguments[2];
+var done = arguments[arguments.length - 1];
+var found = findAll(how, what);
+if (found.length > 0) {
+    done(found);
+} else {
+    var timer;
+    var observer = new MutationObserver(function () {
+        var found = findAll(how, what);
+        if (found.length > 0) {
+            observer.disconnect();
+            clearTimeout(timer);
+            done(found);
+        }
+    });
+    observer.observe(document, {childList: true, subtree: true, attributes: true});
+    timer = setTimeout(function () {
+        observer.disconnect();
+        done(null);
+    }, timeout * 1000);
+}
+"""
+
+# Resolves with true as soon as the URL becomes the target URL (history API or hash change),
+# with "unloaded" if the document is being replaced by a new one (regular redirect)
+# and with false after (timeout) seconds
+JS_WAIT_FOR_URL = """
+var target = arguments[0], timeout = arguments[1];
+var done = arguments[arguments.length - 1];
+var finished = false;
+function finish(result) {
+    if (!finished) {
+        finished = true;
+        clearInterval(watcher);
+        clearTimeout(timer);
+        done(result);
+    }
+}
+function check() {
+    if (window.location.href === target) {
+        finish(true);
+    }
+}
+window.addEventListener("popstate", check);
+window.addEventListener("hashchange", check);
+window.addEventListener("pagehide", function () { finish("unloaded"); });
+// pushState/replaceState don't fire any events, so the URL is also checked inside the page
+var watcher = setInterval(check, 25);
+var timer = setTimeout(function () { finish(false); }, timeout * 1000);
+check();
+"""
+
+# Fills form fields and clicks the submit button; arguments are [[how, what, value], ...] and [how, what].
+# Nothing is changed and false is returned if any of the elements (or a select's option) is missing.
+# Clicking the button keeps browser's own form validation (required, min, etc.)
+JS_SUBMIT_FORM = JS_FIND_ALL + """
+var fields = arguments[0], button = arguments[1];
+var targets = [];
+for (var i = 0; i < fields.length; i++) {
+    var found = findAll(fields[i][0], fields[i][1]);
+    if (found.length === 0) {
+        return false;
+    }
+    var elm = found[0], value = fields[i][2];
+    if (elm.tagName === "SELECT" && !Array.from(elm.options).some(function (option) { return option.value === value; })) {
+        return false;
+    }
+    targets.push([elm, value]);
+}
+var buttons = findAll(button[0], button[1]);
+if (buttons.length === 0) {
+    return false;
+}
+targets.forEach(function (target) {
+    target[0].focus();
+    target[0].value = target[1];
+    target[0].dispatchEvent(new Event("input", {bubbles: true}));
+    target[0].dispatchEvent(new Event("change", {bubbles: true}));
+});
+buttons[0].click();
+return true;
+"""
+
+# Returns text of every cell and header of the table on the current page (arguments: cells' and headers' locators)
+JS_TABLE_TEXTS = JS_FIND_ALL + """
+function texts(found) {
+    return found.map(function (elm) { return (elm.innerText || elm.textContent || "").trim(); });
+}
+return [texts(findAll(arguments[0], arguments[1])), texts(findAll(arguments[2], arguments[3]))];
+"""
+
+# Reads the Navigation Timing entry of the current page and counts its elements.
+# transferSize is 0 for responses taken from the cache, so the size of the body is used then
+JS_PAGE_METRICS = """
+var nav = performance.getEntriesByType("navigation")[0];
+return [nav.responseStart - nav.requestStart,
+        nav.responseEnd - nav.requestStart,
+        nav.transferSize || nav.encodedBodySize,
+        document.getElementsByTagName("*").length];
+"""
+
+# Default script timeout of WebDriver sessions; waits that are longer than that go straight to polling
+SCRIPT_TIMEOUT = 30
+
+# Characters outside of the Basic Multilingual Plane; chromedriver can't type them with send_keys()
+NON_BMP_RANGE = "\U00010000-\U0010FFFF"
+
+
+@cache
+def emoji_pattern():
+    """
+    Compiles (once) a pattern that matches any single-character emoji from the emoji package's data
+    and any character outside of the BMP
+    """
+
+    import emoji
+
+    bmp_emoji = sorted(char for char in emoji.EMOJI_DATA if len(char) == 1 and ord(char) <= 0xFFFF)
+    return re.compile("[" + "".join(re.escape(char) for char in bmp_emoji) + NON_BMP_RANGE + "]")
+
+
 class BasePage():
     """
     BasePage POM.
     Its' methods are essential 'building blocks' for all of its' children classes.
     """
 
+    # Forms are filled and submitted with one script call (see submit_form());
+    # set to True for test classes marked with @pytest.mark.keystrokes, which check how inputs react to typing
+    keystrokes = False
+
     def __init__(self, browser, url, timeout=DEFAULT_TIMEOUT):
         self.browser = browser
         self.url = url
@@ -36,13 +201,13 @@ class BasePage():
         what - alias for Selenium's find_element locator argument
         """
 
-        try:
-            element = WebDriverWait(self.browser, self.timeout).until(lambda el: el.find_element(how, what))
-        except TimeoutException:
+        list_of_elements = self.retrieve_multiple_elements_if_present(how, what)
+        if list_of_elements is None:
             return None
-        return element
+        return list_of_elements[0]
 
 
+    @TIMINGS.timed("waits")
     def retrieve_multiple_elements_if_present(self, how, what):
         """
         Looks for multiple elements on the page for (timeout) seconds
@@ -51,19 +216,40 @@ class BasePage():
         what - alias for Selenium's find_elements locator argument
         """
         
-        try:
-            list_of_elements = WebDriverWait(self.browser, self.timeout).until(lambda el: el.find_elements(how, what))
-        except TimeoutException:
-            return None
+        from selenium.webdriver.support.wait import WebDriverWait
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        key = locator_name(type(self).__name__, how, what) if ADAPTIVE_TIMEOUTS.enabled else None
+        timeout = ADAPTIVE_TIMEOUTS.timeout_for(key, self.timeout)
+        started = time.monotonic()
+        list_of_elements = None
+        if how in JS_STRATEGIES and timeout < SCRIPT_TIMEOUT:
+            try:
+                # Returns right after the element appears instead of waiting for the next poll
+                list_of_elements = self.browser.execute_async_script(JS_WAIT_FOR_ELEMENTS, how, what, timeout)
+                if list_of_elements is None:
+                    return None
+            except WebDriverException:
+                # Page has been replaced while waiting (or scripts are unavailable) - fall back to polling
+                pass
+        if list_of_elements is None:
+            time_left = max(timeout - (time.monotonic() - started), 0)
+            try:
+                list_of_elements = WebDriverWait(self.browser, time_left).until(lambda el: el.find_elements(how, what))
+            except TimeoutException:
+                return None
+        ADAPTIVE_TIMEOUTS.record(key, time.monotonic() - started)
         return list_of_elements
     
 
+    @TIMINGS.timed("navigation")
     def open(self):
         """Opens the URL that was used to initiate a POM object"""
         
         self.browser.get(self.url)
 
 
+    @TIMINGS.timed("navigation")
     def go_to_other_page(self, new_url):
         """Opens the given URL"""
         
@@ -75,22 +261,54 @@ class BasePage():
         
         return self.browser.current_url
     
+    @TIMINGS.timed("navigation")
     def refresh(self):
         """Refreshes current page"""
 
         self.browser.refresh()
 
 
+    def page_metrics(self):
+        """Returns PageMetrics of the current page: server and response times, response size and DOM size"""
+
+        return PageMetrics(*self.browser.execute_script(JS_PAGE_METRICS))
+
+
+    @TIMINGS.timed("waits")
     def url_should_change_to(self, new_url):
         """
         Waits for (timeout) seconds until current URL changes to given new_url
         Returns True if URL has changed, and False if didn't
         """
         
-        try:
-            WebDriverWait(self.browser, TRANSITION_TO).until(EC.url_to_be(new_url))
-        except TimeoutException:
+        from selenium.webdriver.support.wait import WebDriverWait
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.support import expected_conditions as EC
+
+        # Redirects are told apart by the page they start from and the route they lead to, e.g. 'BuyPage->/'
+        key = f"{type(self).__name__}->{urlparse(new_url).path}"
+        timeout = ADAPTIVE_TIMEOUTS.timeout_for(key, TRANSITION_TO)
+        started = time.monotonic()
+        if self.browser.current_url == new_url:
+            ADAPTIVE_TIMEOUTS.record(key, time.monotonic() - started)
+            return True
+        changed = None
+        if timeout < SCRIPT_TIMEOUT:
+            try:
+                # Listens for URL changes in the page itself; a regular redirect unloads the page,
+                # in which case the rest of the wait is done by polling
+                changed = self.browser.execute_async_script(JS_WAIT_FOR_URL, new_url, timeout)
+            except WebDriverException:
+                pass
+        if changed is False:
             return False
+        if changed is not True:
+            time_left = max(timeout - (time.monotonic() - started), 0)
+            try:
+                WebDriverWait(self.browser, time_left).until(EC.url_to_be(new_url))
+            except TimeoutException:
+                return False
+        ADAPTIVE_TIMEOUTS.record(key, time.monotonic() - started)
         return True
     
 
@@ -109,6 +327,10 @@ class BasePage():
         If found, returns an alert object. If not, returns None
         """
         
+        from selenium.webdriver.support.wait import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             alert = WebDriverWait(self.browser, self.timeout).until(EC.alert_is_present())
         except TimeoutException:
@@ -158,6 +380,34 @@ class BasePage():
         return input.get_attribute("placeholder")
     
 
+    def snapshot(self, locators):
+        """
+        Looks up every locator of the given locator class (e.g. SellPageLocators) with a single script execution
+        Returns a dictionary structured as {locator name: ElementSnapshot}
+        Doesn't wait for elements to appear, so call it after the page is loaded
+        """
+
+        script = JS_FIND_ALL + """
+        var locators = arguments[0];
+        var snapshot = {};
+        for (var name in locators) {
+            var found = findAll(locators[name][0], locators[name][1]);
+            var first = found[0];
+            snapshot[name] = [found.length,
+                              first ? (first.innerText || first.textContent || "").trim() : null,
+                              first ? ("value" in first ? first.value : first.getAttribute("value")) : null,
+                              first ? first.getAttribute("placeholder") : null,
+                              first ? first.getAttribute("type") : null,
+                              first ? first.hasAttribute("disabled") : null];
+        }
+        return snapshot;
+        """
+        all_locators = {name: locator for name, locator in vars(locators).items()
+                        if name.isupper() and isinstance(locator, tuple) and locator[0] in JS_STRATEGIES}
+        raw_snapshot = self.browser.execute_script(script, all_locators)
+        return {name: ElementSnapshot(*values) for name, values in raw_snapshot.items()}
+
+
     def is_unique(self, list_of_elements):
         """
         An extension for retrieve_multiple_elements_if_present()
@@ -177,7 +427,7 @@ class BasePage():
         
         text = str(text)
         if self.contains_emoji(text):
-            # Had to use this javascript workaround to be able to type emojis in chrome.
+            # Had to use this javascript workaround to be able to type emojis (and other non-BMP characters) in chrome.
             # https://stackoverflow.com/questions/59138825/chromedriver-only-supports-characters-in-the-bmp-error-while-sending-emoji-with
             JS_ADD_TEXT_TO_INPUT = """
             var elm = arguments[0], txt = arguments[1];
@@ -187,6 +437,21 @@ class BasePage():
             self.browser.execute_script(JS_ADD_TEXT_TO_INPUT, input, text)
         else:
             input.send_keys(text)
+
+
+    def submit_form(self, values, button_locator):
+        """
+        Fast path for filling and submitting a form: sets the values of all inputs (or selects),
+        dispatches their 'input' and 'change' events and clicks the button with one script call.
+        values - dictionary structured as {locator: value}
+        Returns False without changing anything if any of the elements isn't on the page yet,
+        or if BasePage.keystrokes is on; callers should fill the form the usual way then
+        """
+
+        if self.keystrokes or any(how not in JS_STRATEGIES for how, _ in [*values, button_locator]):
+            return False
+        fields = [[how, what, str(value)] for (how, what), value in values.items()]
+        return self.browser.execute_script(JS_SUBMIT_FORM, fields, list(button_locator)) is True
     
 
     def set_type_to_text(self, input):
@@ -213,24 +478,34 @@ class BasePage():
     def organize_cell_data(self, all_cell_elements, all_header_elements):
         """
         Takes table's header and cell lists as arguments.
-        Checks if division of cell count by header count doesn't provide a remainder
-        Then returns a list of dictionaries structured as {header: cell value}
-        If there's only one cell row, returns a dictionary for this row
+        Then returns their text in a structured format with the help of organize_cell_texts()
         """
         
         cell_inner_text = [cell.text for cell in all_cell_elements]
         header_names = [header.text for header in all_header_elements]
+        return self.organize_cell_texts(cell_inner_text, header_names)
+
+
+    def organize_cell_texts(self, cell_inner_text, header_names):
+        """
+        Takes text of table's cells and header names as arguments.
+        Checks if division of cell count by header count doesn't provide a remainder
+        Then returns a list of dictionaries structured as {header: cell value}
+        If there's only one cell row, returns a dictionary for this row
+        """
+
+        cell_inner_text = list(cell_inner_text)
+        width = len(header_names)
         list_of_rows = []
-        if len(cell_inner_text) % len(header_names) == 0:
-            rows_count = int(len(cell_inner_text)/len(header_names))
-            for every_row in range(rows_count):
-                new_row = dict.fromkeys(header_names)
-                for key in new_row:
-                    new_row[key] = cell_inner_text.pop(0)
-                    if self.is_integer(new_row[key]):
-                        new_row[key] = int(new_row[key])
-                    elif self.is_currency(new_row[key]):
-                        new_row[key] = self.currency_to_number(new_row[key])
+        if len(cell_inner_text) % width == 0:
+            # Rows are sliced off the flat list of cells (popping cells one by one is quadratic in table size)
+            for start in range(0, len(cell_inner_text), width):
+                new_row = dict(zip(header_names, cell_inner_text[start:start + width]))
+                for key, value in new_row.items():
+                    if self.is_integer(value):
+                        new_row[key] = int(value)
+                    elif self.is_currency(value):
+                        new_row[key] = self.currency_to_number(value)
                 list_of_rows.append(new_row)
             if len(list_of_rows) == 1:
                 return list_of_rows[0]
@@ -239,6 +514,27 @@ class BasePage():
         return None
         
 
+    def table_texts(self, cells_locator, headers_locator):
+        """
+        Reads text of every cell and header of a table with one script call (doesn't wait for them to appear)
+        Returns a tuple of cell texts list and header texts list
+        """
+
+        cell_texts, header_texts = self.browser.execute_script(JS_TABLE_TEXTS, *cells_locator, *headers_locator)
+        return cell_texts, header_texts
+
+
+    def table_rows(self, cell_texts, header_names):
+        """organize_cell_texts(), but always returns a list of rows (empty if there are no cells)"""
+
+        if not cell_texts:
+            return []
+        rows = self.organize_cell_texts(cell_texts, header_names)
+        if rows is None:
+            raise ValueError(f"Table has {len(cell_texts)} cells, which don't make rows of {len(header_names)} columns")
+        return [rows] if isinstance(rows, dict) else rows
+
+
     @staticmethod
     def is_currency(currency):
         """
@@ -288,12 +584,9 @@ class BasePage():
     def contains_emoji(text):
         """
         Helper function for fill_input()
-        Checks if the argument contains emoji symbols.
+        Checks if the argument contains emoji symbols or any other characters outside of the BMP.
         Returns True if it does, and False if it doesn't
         """
 
-        for chars in text:
-            if emoji.is_emoji(chars):
-                return True
-        return False
+        return not text.isascii() and emoji_pattern().search(text) is not None
 
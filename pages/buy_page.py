@@ -1,4 +1,5 @@
 from .base_page import BasePage
+from .async_base_page import AsyncBasePage
 from .locators import BuyPageLocators
 
 
@@ -29,6 +30,9 @@ class BuyPage(BasePage):
     def buy_stock(self, stock, amount):
         """Fills stock symbol input and amount input with given values and presses the buy button"""
         
+        if self.submit_form({BuyPageLocators.SHARES_SYMBOL_INPUT: stock, BuyPageLocators.SHARES_AMOUNT_INPUT: amount},
+                            BuyPageLocators.BUY_BUTTON):
+            return
         self.fill_input(self.symbol_input(), stock)
         self.fill_input(self.amount_input(), amount)
         self.buy_button().click()
@@ -51,4 +55,18 @@ class BuyPage(BasePage):
     def more_buy_buttons(self):
         """Returns a list of elements that could match the locator for buy button"""
 
-        return self.retrieve_multiple_elements_if_present(*BuyPageLocators.BUY_BUTTON)
\ No newline at end of file
+        return self.retrieve_multiple_elements_if_present(*BuyPageLocators.BUY_BUTTON)
+
+
+class AsyncBuyPage(AsyncBasePage):
+    """
+    Async Buy Page POM.
+    Coroutine counterparts of BuyPage methods (see AsyncBasePage)
+    """
+
+    async def buy_stock(self, stock, amount):
+        """Fills stock symbol input and amount input with given values, presses the buy button and waits for the next page"""
+
+        return await self.submit_form({BuyPageLocators.SHARES_SYMBOL_INPUT: stock,
+                                       BuyPageLocators.SHARES_AMOUNT_INPUT: amount},
+                                      BuyPageLocators.BUY_BUTTON)
@@ -1,4 +1,5 @@
 from .base_page import BasePage
+from .async_base_page import AsyncBasePage, gather
 from .locators import DefaultPageLocators
 
 
@@ -43,6 +44,20 @@ class DefaultPage(BasePage):
         return self.organize_cell_data(cells, headers)
 
 
+    def stocktable_columns(self):
+        """
+        Reads the whole stock table with one script call (after the table has been found)
+        Returns it in a columnar format: a dictionary structured as {header: list of cell values}
+        """
+
+        headers = self.stocktable_headers()
+        header_names = [header.text for header in headers] if headers is not None else []
+        cell_texts, _ = self.table_texts(DefaultPageLocators.SHARES_TABLE_ROW_CELLS,
+                                         DefaultPageLocators.SHARES_TABLE_HEADERS)
+        rows = self.table_rows(cell_texts, header_names)
+        return {name: [row[name] for row in rows] for name in header_names}
+
+
     def cash_element(self):
         """Returns cell or element containing user's cash value"""
 
@@ -84,4 +99,38 @@ class DefaultPage(BasePage):
     def more_total_elements(self):
         """Returns a list of elements that could match the locator for TOTAL element"""
 
-        return self.retrieve_multiple_elements_if_present(*DefaultPageLocators.TOTAL_ELEMENT)
\ No newline at end of file
+        return self.retrieve_multiple_elements_if_present(*DefaultPageLocators.TOTAL_ELEMENT)
+
+
+class AsyncDefaultPage(AsyncBasePage):
+    """
+    Async Default Page POM.
+    Coroutine counterparts of DefaultPage methods (see AsyncBasePage)
+    """
+
+    async def cash_elm_value(self):
+        """Returns cash value stored in the cash element"""
+
+        return self.currency_to_number(await self.retrieve_text(*DefaultPageLocators.CASH_ELEMENT))
+
+
+    async def total_elm_value(self):
+        """Returns TOTAL value stored in the TOTAL element"""
+
+        return self.currency_to_number(await self.retrieve_text(*DefaultPageLocators.TOTAL_ELEMENT))
+
+
+    async def cash_and_total(self):
+        """Reads cash and TOTAL values concurrently; returns them as a tuple"""
+
+        return tuple(await gather(self.cash_elm_value(), self.total_elm_value()))
+
+
+    async def stocktable_columns(self):
+        """Returns the whole stock table in a columnar format (see DefaultPage.stocktable_columns())"""
+
+        header_names = await self.retrieve_texts(*DefaultPageLocators.SHARES_TABLE_HEADERS) or []
+        cell_texts, _ = await self.table_texts(DefaultPageLocators.SHARES_TABLE_ROW_CELLS,
+                                               DefaultPageLocators.SHARES_TABLE_HEADERS)
+        rows = self.table_rows(cell_texts, header_names)
+        return {name: [row[name] for row in rows] for name in header_names}
@@ -1,7 +1,31 @@
-from .base_page import BasePage
+from .base_page import BasePage, JS_FIND_ALL
+from .async_base_page import AsyncBasePage
 from .locators import HistoryPageLocators
 
 
+# Returns currently rendered rows of a virtualized table as [[aria-rowindex, [cell texts]], ...],
+# then scrolls the table's scrollable container by one screen and waits for new rows to be rendered.
+# Also tells if the container was already scrolled to the end
+JS_SCROLL_VIRTUAL_ROWS = JS_FIND_ALL + """
+var done = arguments[arguments.length - 1];
+var rows = findAll(arguments[0], arguments[1]);
+var batch = rows.map(function (row) {
+    return [Number(row.getAttribute("aria-rowindex")),
+            Array.from(row.cells).map(function (cell) { return (cell.innerText || cell.textContent || "").trim(); })];
+});
+var scroller = rows.length > 0 ? rows[0].parentElement : null;
+while (scroller && !(scroller.scrollHeight > scroller.clientHeight &&
+                     /auto|scroll/.test(getComputedStyle(scroller).overflowY))) {
+    scroller = scroller.parentElement;
+}
+scroller = scroller || document.scrollingElement;
+var before = scroller.scrollTop;
+scroller.scrollTop = before + scroller.clientHeight;
+var atEnd = scroller.scrollTop === before;
+requestAnimationFrame(function () { requestAnimationFrame(function () { done([batch, atEnd]); }); });
+"""
+
+
 class HistoryPage(BasePage):
     """
     History Page POM.
@@ -37,6 +61,52 @@ class HistoryPage(BasePage):
         return self.organize_cell_data(table_cells, headers)
 
 
+    def history_pages(self):
+        """
+        Generator that goes through the whole history, even if the app doesn't show it as one table on one page.
+        Yields table data of every part of the history as a list of dictionaries structured as {header: cell value}:
+        - rows of every page, if the app paginates history (follows HISTORY_NEXT_PAGE links)
+        - rows that are rendered after each scroll, if the app virtualizes history (HISTORY_VIRTUAL_ROWS)
+        - rows of the table otherwise (a single list)
+        Cell texts of each part are read with one script call, so it stays fast for long histories
+        """
+
+        headers = self.history_table_headers()
+        if headers is None:
+            return
+        header_names = [header.text for header in headers]
+
+        if self.browser.find_elements(*HistoryPageLocators.HISTORY_VIRTUAL_ROWS):
+            seen = set()
+            while True:
+                batch, at_end = self.browser.execute_async_script(JS_SCROLL_VIRTUAL_ROWS,
+                                                                  *HistoryPageLocators.HISTORY_VIRTUAL_ROWS)
+                new_rows = [cells for index, cells in batch if index not in seen]
+                seen.update(index for index, _ in batch)
+                if new_rows:
+                    yield self.table_rows([text for cells in new_rows for text in cells], header_names)
+                elif at_end:
+                    return
+
+        visited = set()
+        while True:
+            visited.add(self.get_current_url())
+            cell_texts, header_texts = self.table_texts(HistoryPageLocators.HISTORY_TABLE_ROW_CELLS,
+                                                        HistoryPageLocators.HISTORY_TABLE_HEADERS)
+            yield self.table_rows(cell_texts, header_texts or header_names)
+            next_links = self.browser.find_elements(*HistoryPageLocators.HISTORY_NEXT_PAGE)
+            next_url = next_links[0].get_attribute("href") if next_links else None
+            if next_url is None or next_url in visited:
+                return
+            self.go_to_other_page(next_url)
+
+
+    def all_history_data(self):
+        """Returns table data of the whole history (of every page, if it is paginated) as one list"""
+
+        return [row for rows in self.history_pages() for row in rows]
+
+
     # Methods below aren't the best design, but we will leave it like this for now
 
     def more_history_tables(self):
@@ -45,3 +115,16 @@ class HistoryPage(BasePage):
         return self.retrieve_multiple_elements_if_present(*HistoryPageLocators.HISTORY_TABLE)
 
 
+class AsyncHistoryPage(AsyncBasePage):
+    """
+    Async History Page POM.
+    Coroutine counterparts of HistoryPage methods (see AsyncBasePage)
+    """
+
+    async def history_table_data(self):
+        """Returns rows of the history table (of the current page) as a list of dictionaries structured as {header: cell value}"""
+
+        header_names = await self.retrieve_texts(*HistoryPageLocators.HISTORY_TABLE_HEADERS) or []
+        cell_texts, _ = await self.table_texts(HistoryPageLocators.HISTORY_TABLE_ROW_CELLS,
+                                               HistoryPageLocators.HISTORY_TABLE_HEADERS)
+        return self.table_rows(cell_texts, header_names)
@@ -1,4 +1,17 @@
-from selenium.webdriver.common.by import By
+class By():
+    """
+    Locator strategies; same values as Selenium's By.
+    Importing Selenium's By loads the whole webdriver package, which slows down test collection
+    """
+
+    ID = "id"
+    XPATH = "xpath"
+    NAME = "name"
+    TAG_NAME = "tag name"
+    CLASS_NAME = "class name"
+    CSS_SELECTOR = "css selector"
+    LINK_TEXT = "link text"
+    PARTIAL_LINK_TEXT = "partial link text"
 
 
 class BasePageLocators():
@@ -76,4 +89,8 @@ class HistoryPageLocators():
     HISTORY_TABLE = (By.TAG_NAME,"table")
     HISTORY_TABLE_HEADERS = (By.CSS_SELECTOR, "table th")
     HISTORY_TABLE_ROWS = (By.CSS_SELECTOR, "tbody tr")
-    HISTORY_TABLE_ROW_CELLS = (By.CSS_SELECTOR, "tbody tr td")
\ No newline at end of file
+    HISTORY_TABLE_ROW_CELLS = (By.CSS_SELECTOR, "tbody tr td")
+    # Only present if the app paginates history: link to its next page
+    HISTORY_NEXT_PAGE = (By.CSS_SELECTOR, "a[rel='next']")
+    # Only present if the app virtualizes history: rendered rows, numbered as in ARIA grids
+    HISTORY_VIRTUAL_ROWS = (By.CSS_SELECTOR, "tbody tr[aria-rowindex]")
\ No newline at end of file
@@ -29,6 +29,9 @@ class LoginPage(BasePage):
     def log_in_with(self, username, password):
         """Fills username input and password input with given values and presses the log in button"""
 
+        if self.submit_form({LoginPageLocators.USERNAME_INPUT: username, LoginPageLocators.PASSWORD_INPUT: password},
+                            LoginPageLocators.LOGIN_BUTTON):
+            return
         self.username_input().send_keys(username)
         self.password_input().send_keys(password)
         self.login_button().click()
@@ -39,6 +39,11 @@ class RegisterPage(BasePage):
         
         if confirm == "not specified":
             confirm = password
+        if self.submit_form({RegisterPageLocators.USERNAME_INPUT: username,
+                             RegisterPageLocators.PASSWORD_INPUT: password,
+                             RegisterPageLocators.CONFIRM_INPUT: confirm},
+                            RegisterPageLocators.REGISTER_BUTTON):
+            return
         self.username_input().send_keys(username)
         self.password_input().send_keys(password)
         self.confirm_input().send_keys(confirm)
@@ -1,6 +1,5 @@
-from selenium.webdriver.support.select import Select
-
 from .base_page import BasePage
+from .async_base_page import AsyncBasePage
 from .locators import SellPageLocators
 
 
@@ -13,6 +12,8 @@ class SellPage(BasePage):
     def symbol_select(self):
         """Returns stock symbol input as Selenium's 'Select' object"""
 
+        from selenium.webdriver.support.select import Select
+
         symbol_select = self.retrieve_element_if_present(*SellPageLocators.SHARES_LIST)
         if symbol_select is not None:
             symbol_select = Select(symbol_select)
@@ -40,6 +41,9 @@ class SellPage(BasePage):
     def sell_stock(self, stock, amount):
         """Picks stock input, fills amount input with given values and presses the sell button"""
 
+        if self.submit_form({SellPageLocators.SHARES_LIST: stock, SellPageLocators.SHARE_AMOUNT_INPUT: amount},
+                            SellPageLocators.SELL_BUTTON):
+            return
         self.symbol_select().select_by_value(str(stock))
         self.fill_input(self.amount_input(), amount)
         self.sell_button().click()
@@ -82,4 +86,18 @@ class SellPage(BasePage):
     def more_sell_buttons(self):
         """Returns a list of elements that could match the locator for sell button"""
 
-        return self.retrieve_multiple_elements_if_present(*SellPageLocators.SELL_BUTTON)
\ No newline at end of file
+        return self.retrieve_multiple_elements_if_present(*SellPageLocators.SELL_BUTTON)
+
+
+class AsyncSellPage(AsyncBasePage):
+    """
+    Async Sell Page POM.
+    Coroutine counterparts of SellPage methods (see AsyncBasePage)
+    """
+
+    async def sell_stock(self, stock, amount):
+        """Picks stock option, fills amount input with given values, presses the sell button and waits for the next page"""
+
+        return await self.submit_form({SellPageLocators.SHARES_LIST: stock,
+                                       SellPageLocators.SHARE_AMOUNT_INPUT: amount},
+                                      SellPageLocators.SELL_BUTTON)
@@ -0,0 +1,131 @@
+import os
+import json
+import math
+
+from . import locators
+
+
+# Timeouts are this many times longer than the slowest (99th percentile) observed latency
+SAFETY_FACTOR = 2.0
+# Learned timeouts never get shorter than this (in seconds)
+MIN_TIMEOUT = 1
+# ...or longer than this (in seconds)
+MAX_TIMEOUT = 10
+# Number of observed latencies required before a timeout is derived from them
+MIN_SAMPLES = 5
+# Number of latest observed latencies kept for each locator
+HISTORY_SIZE = 200
+
+# Local history of observed latencies (not meant to be checked in)
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".timing_history.json")
+# Exported table of learned timeouts (meant to be checked in)
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "timeouts.json")
+
+
+def locator_name(page_name, how, what):
+    """
+    Returns the name of the locator from locators.py, prefixed with the name of the page it belongs to,
+    e.g. 'BuyPage.BUY_BUTTON'. Locators of the page's own locator class take precedence.
+    If there's no such locator, strategy and selector are used instead
+    """
+
+    own_class = getattr(locators, page_name + "Locators", None)
+    locator_classes = [own_class] if own_class is not None else []
+    locator_classes += [cls for name, cls in vars(locators).items()
+                        if name.endswith("Locators") and cls is not own_class]
+    for cls in locator_classes:
+        for name, value in vars(cls).items():
+            if value == (how, what):
+                return f"{page_name}.{name}"
+    return f"{page_name}.{how}={what}"
+
+
+def percentile(values, share):
+    """Returns the value below which the given share (0 to 1) of values falls (nearest-rank method)"""
+
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class AdaptiveTimeouts():
+    """
+    Keeps observed latencies of element appearances and redirects and derives timeouts from them.
+    Is turned off by default; when off, every wait uses the default timeout it was given
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.history = {}
+        self.table = {}
+
+
+    def load(self):
+        """Turns adaptive timeouts on and reads the local history and the exported table"""
+
+        self.enabled = True
+        for attr, path in (("history", HISTORY_PATH), ("table", TABLE_PATH)):
+            try:
+                with open(path, encoding="utf-8") as source:
+                    setattr(self, attr, json.load(source))
+            except (OSError, ValueError):
+                setattr(self, attr, {})
+
+
+    def save(self):
+        """Writes the local history of observed latencies"""
+
+        with open(HISTORY_PATH, "w", encoding="utf-8") as target:
+            json.dump(self.history, target, indent=4, sort_keys=True)
+
+
+    def export(self):
+        """Writes a table of timeouts learned from the history, so it can be checked in"""
+
+        learned = {key: self.learned(samples) for key, samples in self.history.items() if len(samples) >= MIN_SAMPLES}
+        self.table.update(learned)
+        with open(TABLE_PATH, "w", encoding="utf-8") as target:
+            json.dump(self.table, target, indent=4, sort_keys=True)
+
+
+    @staticmethod
+    def learned(samples):
+        """Derives a timeout from the observed latencies: 99th percentile multiplied by the safety factor, clamped"""
+
+        return round(min(max(percentile(samples, 0.99) * SAFETY_FACTOR, MIN_TIMEOUT), MAX_TIMEOUT), 2)
+
+
+    def timeout_for(self, key, default):
+        """Returns a timeout for the given key; default if adaptive timeouts are off or nothing is known yet"""
+
+        if not self.enabled:
+            return default
+        samples = self.history.get(key, [])
+        if len(samples) >= MIN_SAMPLES:
+            return self.learned(samples)
+        return self.table.get(key, default)
+
+
+    def summary(self):
+        """Describes where timeouts come from: how many are learned from the history, how many from the table"""
+
+        local = sum(len(samples) >= MIN_SAMPLES for samples in self.history.values())
+        shared = len(self.table.keys() - {key for key, samples in self.history.items() if len(samples) >= MIN_SAMPLES})
+        if not local and not shared:
+            return f"adaptive timeouts: nothing learned yet (no local history, pages/timeouts.json is empty), " \
+                "using the fixed timeouts"
+        return f"adaptive timeouts: {local} learned from the local history, {shared} from pages/timeouts.json; " \
+            "other locators and redirects use the fixed timeouts"
+
+
+    def record(self, key, latency):
+        """Adds observed latency (in seconds) to the history of the given key"""
+
+        if self.enabled:
+            samples = self.history.setdefault(key, [])
+            samples.append(round(latency, 3))
+            del samples[:-HISTORY_SIZE]
+
+
+# Shared by every page object; turned on with the '--adaptive-timeouts' CLI argument
+ADAPTIVE_TIMEOUTS = AdaptiveTimeouts()
@@ -0,0 +1,86 @@
+import time
+import inspect
+from functools import wraps
+from contextlib import contextmanager
+
+
+class Timings():
+    """
+    Adds up time the suite spends in sections of its code by category (navigation, waits, DB queries, etc.).
+    Sections nested in another section (e.g. DB queries made by the new_user fixture) count towards
+    the outer section only, so categories never overlap
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.depth = 0
+        # {method: [number of calls, seconds]} of methods wrapped with instrument()
+        self.calls = {}
+
+
+    @contextmanager
+    def section(self, category):
+        """Context manager that adds the time spent in it to the category"""
+
+        if self.depth:
+            yield
+            return
+        self.depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[category] = self.totals.get(category, 0.0) + time.perf_counter() - started
+            self.depth -= 1
+
+
+    def timed(self, category):
+        """Decorator that adds the time spent in the function to the category"""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.section(category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+    def instrument(self, cls):
+        """
+        Wraps every method defined in the class, so that its calls and time spent in them (including nested calls)
+        are added up in calls under '<class name>.<method name>'. Coroutines and properties are left as they are
+        """
+
+        for name, attr in list(vars(cls).items()):
+            func = attr.__func__ if isinstance(attr, staticmethod) else attr
+            if name.startswith("__") or not inspect.isfunction(func) or inspect.iscoroutinefunction(func):
+                continue
+            wrapper = self.counted(f"{cls.__name__}.{name}", func)
+            setattr(cls, name, staticmethod(wrapper) if isinstance(attr, staticmethod) else wrapper)
+
+
+    def counted(self, key, func):
+        """Returns a wrapper of the function that adds its calls to calls[key]"""
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                calls = self.calls.setdefault(key, [0, 0.0])
+                calls[0] += 1
+                calls[1] += time.perf_counter() - started
+        return wrapper
+
+
+    def since(self, snapshot):
+        """Returns time (in seconds) added to every category since the snapshot (a copy of totals) was taken"""
+
+        return {category: total - snapshot.get(category, 0.0) for category, total in self.totals.items()
+                if total > snapshot.get(category, 0.0)}
+
+
+# Shared by page objects, database queries and fixtures; read by the run report (see plugins/run_report.py)
+TIMINGS = Timings()
@@ -0,0 +1,177 @@
+import json
+import timeit
+import tracemalloc
+
+import pytest
+
+
+# Baselines file name, relative to the rootdir (unless --benchmark-baselines is given)
+BASELINES_FILE = ".benchmark_baselines.json"
+# Benchmarks fail if they get slower (or allocate more) than the baseline by more than this many percent
+# (timings of micro-benchmarks easily differ by a third between runs on a shared machine)
+THRESHOLD = 50
+# Each benchmark is timed this many times, and the best time is taken (the others are slowed down by noise)
+REPEAT = 5
+# Allocations smaller than this (in KiB) are mostly interpreter's noise, so they aren't compared
+MIN_PEAK_KIB = 4
+
+
+def check_threshold(value):
+    """Checks the value of the 'benchmark-threshold' CLI argument"""
+
+    msg = "Received incorrect --benchmark-threshold flag value. Try a positive number of percent, for example: '50'"
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise pytest.UsageError(msg)
+    if threshold <= 0:
+        raise pytest.UsageError(msg)
+
+    return threshold
+
+
+def pytest_addoption(parser):
+    """Adds benchmark CLI arguments"""
+
+    # 'benchmark' flag. Runs benchmarks (classes marked with @pytest.mark.benchmark), which are skipped by default
+    parser.addoption("--benchmark", action="store_true",
+                     help="use --benchmark to run benchmarks (classes marked with @pytest.mark.benchmark)")
+
+    # 'benchmark-save' flag. Stores the results of this run as new baselines instead of comparing them
+    parser.addoption("--benchmark-save", action="store_true",
+                     help="use --benchmark-save to store benchmark results as new baselines")
+
+    # 'benchmark-baselines' flag. Path to the file with benchmark baselines
+    parser.addoption("--benchmark-baselines", action="store", default=None,
+                     help=f"Path to the file with benchmark baselines (default: {BASELINES_FILE} in rootdir)")
+
+    # 'benchmark-threshold' flag. Regression (in percent) that fails a benchmark
+    parser.addoption("--benchmark-threshold", action="store", default=THRESHOLD, type=check_threshold,
+                     help=f"Percent by which a benchmark may regress against its baseline (default: {THRESHOLD})")
+
+
+def measure(func, args):
+    """
+    Runs the function with the given arguments repeatedly
+    Returns a dictionary with its number of calls per second (best of REPEAT timings)
+    and peak memory allocated during one call (in KiB)
+    """
+
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=REPEAT, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"ops_per_sec": round(1 / best, 1), "peak_kib": round(peak / 1024, 1)}
+
+
+def regressions(result, baseline, threshold):
+    """Returns descriptions of the ways the result is worse than its baseline by more than threshold percent"""
+
+    found = []
+    slowdown = (1 - result["ops_per_sec"] / baseline["ops_per_sec"]) * 100
+    if slowdown > threshold:
+        found.append(f"{result['ops_per_sec']:g} ops/s is {slowdown:.0f}% slower than {baseline['ops_per_sec']:g} ops/s")
+    if baseline["peak_kib"] >= MIN_PEAK_KIB:
+        growth = (result["peak_kib"] / baseline["peak_kib"] - 1) * 100
+        if growth > threshold:
+            found.append(f"{result['peak_kib']:g} KiB allocated is {growth:.0f}% more than {baseline['peak_kib']:g} KiB")
+    return found
+
+
+class Benchmarks():
+    """
+    Measures calls per second and memory allocations of functions given to the 'benchmark' fixture.
+    Results are compared with baselines stored by a previous run with '--benchmark-save',
+    and a benchmark fails if it regresses by more than '--benchmark-threshold' percent
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.getoption("--benchmark-baselines") or str(config.rootpath / BASELINES_FILE)
+        self.baselines = self.load()
+        self.results = {}
+
+
+    def load(self):
+        """Reads stored baselines; empty dictionary if there are none yet"""
+
+        try:
+            with open(self.path, encoding="utf-8") as source:
+                return json.load(source)
+        except (OSError, ValueError):
+            return {}
+
+
+    def save(self):
+        """Stores results of this run as baselines (keeping baselines of benchmarks that weren't run)"""
+
+        self.baselines.update(self.results)
+        with open(self.path, "w", encoding="utf-8") as target:
+            json.dump(self.baselines, target, indent=4, sort_keys=True)
+
+
+    def run(self, name, func, args):
+        """Measures the function; fails the test if it regressed against its baseline"""
+
+        result = measure(func, args)
+        self.results[name] = result
+        if self.config.getoption("--benchmark-save") or name not in self.baselines:
+            return result
+        found = regressions(result, self.baselines[name], self.config.getoption("--benchmark-threshold"))
+        if found:
+            pytest.fail(f"Benchmark {name} regressed: {'; '.join(found)}")
+        return result
+
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        """Skips benchmarks unless they're requested"""
+
+        if not config.getoption("--benchmark"):
+            for item in items:
+                if "benchmark" in item.keywords:
+                    item.add_marker(pytest.mark.skip(reason="Benchmarks are run with --benchmark"))
+
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """Shows benchmark results next to their baselines"""
+
+        if not self.results:
+            return
+        terminalreporter.write_sep("=", "benchmarks")
+        for name, result in self.results.items():
+            line = f"{name}: {result['ops_per_sec']:g} ops/s, {result['peak_kib']:g} KiB"
+            baseline = self.baselines.get(name)
+            if baseline is not None and baseline is not result:
+                line += f" (baseline: {baseline['ops_per_sec']:g} ops/s, {baseline['peak_kib']:g} KiB)"
+            terminalreporter.write_line(line)
+
+
+    def pytest_sessionfinish(self):
+        """Stores results as baselines if requested"""
+
+        if self.results and self.config.getoption("--benchmark-save"):
+            self.save()
+
+
+@pytest.fixture
+def benchmark(request):
+    """
+    Returns a function that measures calls per second and allocations of func(*args):
+    benchmark(func, *args). The result is named after the test
+    """
+
+    plugin = request.config.pluginmanager.get_plugin("benchmarks")
+    return lambda func, *args: plugin.run(request.node.nodeid, func, args)
+
+
+def pytest_configure(config):
+    """Registers the benchmarks collector"""
+
+    config.pluginmanager.register(Benchmarks(config), "benchmarks")
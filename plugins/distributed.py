@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import tempfile
+import threading
+import subprocess
+from uuid import uuid4
+from collections import deque
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from constants import LazyCases
+from plugins.scheduler import group_key
+
+
+# Number of test classes in one work unit (one pytest run on an agent)
+UNIT_SIZE = 4
+# Seconds between agent's heartbeats (which also carry the reports of the tests that finished since the last one)
+HEARTBEAT_INTERVAL = 5
+# An agent that hasn't been heard from for this many seconds is considered lost, and its unit is given to another agent
+LEASE_TIMEOUT = 60
+# A unit that has been lost this many times is reported as failed instead of being given out again
+MAX_ATTEMPTS = 3
+# Options of an agent that are passed on to the pytest runs of its units
+FORWARDED_OPTIONS = ("--browser", "--db-usage", "--headless", "--browser-profile", "--browser-contexts",
+                     "--share-setup", "--adaptive-timeouts", "--result-cache")
+
+
+def check_unit_size(value):
+    """Checks the value of the 'unit-size' CLI argument"""
+
+    msg = "Received incorrect --unit-size flag value. Try a positive integer, for example: '--unit-size=4'"
+    if not value.isdigit() or int(value) < 1:
+        raise pytest.UsageError(msg)
+
+    return int(value)
+
+
+def check_coordinator(value):
+    """Checks the value of the 'coordinator' CLI argument; returns a tuple of host and port"""
+
+    msg = "Received incorrect --coordinator flag value. Try '[host:]port', for example: '--coordinator=8765'"
+    host, _, port = value.rpartition(":")
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise pytest.UsageError(msg)
+
+    return host or "127.0.0.1", int(port)
+
+
+def pytest_addoption(parser):
+    """Adds distributed run CLI arguments"""
+
+    # 'coordinator' flag. Collects the suite and serves it as work units to agents instead of running it
+    # Results sent back by agents are reported as if the tests were run here
+    parser.addoption("--coordinator", action="store", default=None, type=check_coordinator,
+                     help="Serve collected tests to agents on '[host:]port' instead of running them, for example: '--coordinator=8765'")
+
+    # 'unit-size' flag. Number of test classes the coordinator gives to an agent at once
+    parser.addoption("--unit-size", action="store", default=UNIT_SIZE, type=check_unit_size,
+                     help=f"Number of test classes in one work unit of the coordinator (default: {UNIT_SIZE})")
+
+    # 'agent' flag. Runs work units of a coordinator until there are none left
+    parser.addoption("--agent", action="store", default=None,
+                     help="Run work units of the coordinator at the given URL, for example: '--agent=http://127.0.0.1:8765'")
+
+    # 'unit-reports' flag. Used by agents: the pytest run of a unit writes its reports to this file
+    parser.addoption("--unit-reports", action="store", default=None,
+                     help="Path to a file to write serialized test reports to (used by agents)")
+
+
+def post(url, data):
+    """Sends JSON data to the URL; returns the JSON reply"""
+
+    request = Request(url, data=json.dumps(data).encode(), headers={"Content-Type": "application/json"})
+    with urlopen(request, timeout=LEASE_TIMEOUT) as response:
+        return json.load(response)
+
+
+def read_new_lines(source):
+    """Returns JSON objects of the complete lines that were written to the file since the last read"""
+
+    found = []
+    while True:
+        position = source.tell()
+        line = source.readline()
+        if not line.endswith("\n"):
+            # A line that is being written; it will be read next time
+            source.seek(position)
+            return found
+        found.append(json.loads(line))
+
+
+class Coordinator():
+    """
+    Serves collected tests to agents over HTTP, as work units of UNIT_SIZE classes along with the seed.
+    An agent leases a unit, runs it and sends the reports back with its heartbeats.
+    Units of agents that stop sending heartbeats are requeued; reports of a unit are logged
+    only once the unit is finished, so a requeued unit isn't reported twice
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.units = []
+        self.pending = deque()
+        # {lease id: {"unit": index, "agent": name, "seen": time, "reports": [serialized reports]}}
+        self.leases = {}
+        self.attempts = {}
+        self.finished = queue.Queue()
+        self.remaining = 0
+
+
+    def lease(self, agent):
+        """Gives the next unit to the agent"""
+
+        with self.lock:
+            if not self.pending:
+                return {"done": True} if self.remaining == 0 else {"wait": HEARTBEAT_INTERVAL}
+            unit = self.pending.popleft()
+            lease_id = uuid4().hex
+            self.leases[lease_id] = {"unit": unit, "agent": agent, "seen": time.monotonic(), "reports": []}
+        return {"lease": lease_id, "nodeids": [item.nodeid for item in self.units[unit]], "seed": LazyCases.seed}
+
+
+    def report(self, lease_id, reports, finished, problem=None):
+        """Stores reports of a leased unit; the unit is done once it's finished. False if the lease is no longer valid"""
+
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            if lease is None:
+                return False
+            lease["seen"] = time.monotonic()
+            lease["reports"].extend(reports)
+            if finished:
+                del self.leases[lease_id]
+                self.remaining -= 1
+                self.finished.put((lease["unit"], lease["reports"], problem))
+        return True
+
+
+    def requeue_lost(self):
+        """Gives units of agents that haven't been heard from for LEASE_TIMEOUT seconds to other agents"""
+
+        now = time.monotonic()
+        with self.lock:
+            for lease_id, lease in list(self.leases.items()):
+                if now - lease["seen"] <= LEASE_TIMEOUT:
+                    continue
+                del self.leases[lease_id]
+                unit = lease["unit"]
+                self.attempts[unit] = self.attempts.get(unit, 0) + 1
+                if self.attempts[unit] < MAX_ATTEMPTS:
+                    self.pending.appendleft(unit)
+                else:
+                    self.remaining -= 1
+                    self.finished.put((unit, [], f"Unit was lost by {MAX_ATTEMPTS} agents (last: {lease['agent']})"))
+
+
+    def handler(self):
+        """Returns the HTTP request handler class of the coordinator"""
+
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path == "/lease":
+                    reply = coordinator.lease(data["agent"])
+                elif self.path == "/report":
+                    reply = {"ok": coordinator.report(data["lease"], data["reports"], data["finished"],
+                                                      data.get("problem"))}
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+    def log_unit(self, unit, reports, problem):
+        """Logs reports of the unit as if its tests were run here; tests without reports are reported as errors"""
+
+        hook = self.config.hook
+        reported = set()
+        for data in reports:
+            report = hook.pytest_report_from_serializable(config=self.config, data=data)
+            if report.when == "setup":
+                hook.pytest_runtest_logstart(nodeid=report.nodeid, location=report.location)
+            hook.pytest_runtest_logreport(report=report)
+            if report.when == "teardown":
+                hook.pytest_runtest_logfinish(nodeid=report.nodeid, location=report.location)
+                reported.add(report.nodeid)
+
+        for item in self.units[unit]:
+            if item.nodeid in reported:
+                continue
+            hook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+            message = f"No result from the agent: {problem or 'the test was not run'}"
+            for when, outcome, longrepr in (("setup", "failed", message), ("teardown", "passed", None)):
+                hook.pytest_runtest_logreport(report=pytest.TestReport(item.nodeid, item.location, {},
+                                                                       outcome, longrepr, when))
+            hook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        """Serves the collected tests to agents until all of them are done"""
+
+        if session.config.option.collectonly or not session.items:
+            return None
+
+        unit_size = self.config.getoption("--unit-size")
+        classes = {}
+        for item in session.items:
+            classes.setdefault(group_key(item.nodeid), []).append(item)
+        classes = list(classes.values())
+        self.units = [sum(classes[index:index + unit_size], []) for index in range(0, len(classes), unit_size)]
+        self.pending.extend(range(len(self.units)))
+        self.remaining = len(self.units)
+
+        server = ThreadingHTTPServer(self.config.getoption("--coordinator"), self.handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        self.config.get_terminal_writer().line(
+            f"coordinator: {len(self.units)} units at http://{host}:{port}, start agents with --agent=http://{host}:{port}")
+        try:
+            for _ in self.units:
+                while True:
+                    try:
+                        self.log_unit(*self.finished.get(timeout=1))
+                        break
+                    except queue.Empty:
+                        self.requeue_lost()
+                if session.shouldfail or session.shouldstop:
+                    break
+        finally:
+            server.shutdown()
+            server.server_close()
+        return True
+
+
+class Agent():
+    """
+    Leases work units from the coordinator and runs each of them in a pytest run of its own
+    (with the coordinator's seed and the agent's own browser options), sending reports back with heartbeats.
+    Agents keep no state between units, so any number of them can be started or stopped at any time
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.url = config.getoption("--agent").rstrip("/")
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+
+    def forwarded_options(self):
+        """Returns the agent's options that are passed on to the runs of its units"""
+
+        args = []
+        for name in FORWARDED_OPTIONS:
+            value = self.config.getoption(name)
+            if value is True:
+                args.append(name)
+            elif value not in (None, False):
+                args.append(f"{name}={value}")
+        return args
+
+
+    def connect(self, patience):
+        """Leases the next unit; waits for the coordinator for up to (patience) seconds. None if it's gone"""
+
+        deadline = time.monotonic() + patience
+        while True:
+            try:
+                return post(self.url + "/lease", {"agent": self.name})
+            except (URLError, ConnectionError):
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(HEARTBEAT_INTERVAL)
+
+
+    def run_unit(self, unit):
+        """Runs the unit's tests and sends their reports back; stops the run if the coordinator gave the unit away"""
+
+        handle, path = tempfile.mkstemp(prefix="unit-", suffix=".jsonl")
+        os.close(handle)
+        command = [sys.executable, "-m", "pytest", "-q", *unit["nodeids"], f"--seed={unit['seed']}",
+                   f"--unit-reports={path}", *self.forwarded_options()]
+        process = subprocess.Popen(command, cwd=self.config.rootpath)
+        try:
+            with open(path, encoding="utf-8") as source:
+                while True:
+                    try:
+                        exitcode = process.wait(timeout=HEARTBEAT_INTERVAL)
+                    except subprocess.TimeoutExpired:
+                        exitcode = None
+                    finished = exitcode is not None
+                    data = {"lease": unit["lease"], "reports": read_new_lines(source), "finished": finished}
+                    if finished:
+                        data["problem"] = f"pytest run of the unit exited with code {exitcode}"
+                    if not post(self.url + "/report", data)["ok"] or finished:
+                        return
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            os.remove(path)
+
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        """Runs units of the coordinator instead of the collected tests"""
+
+        writer = self.config.get_terminal_writer()
+        # The coordinator may not have started yet; once it has, it only stops when all units are done
+        patience = LEASE_TIMEOUT
+        while True:
+            unit = self.connect(patience)
+            patience = 0
+            if unit is None:
+                writer.line(f"agent: coordinator at {self.url} is gone (or has finished)")
+                break
+            if unit.get("done"):
+                break
+            if "wait" in unit:
+                time.sleep(unit["wait"])
+                continue
+            writer.line(f"agent: running {len(unit['nodeids'])} tests")
+            try:
+                self.run_unit(unit)
+            except (URLError, ConnectionError):
+                # The coordinator will requeue the unit once its lease times out
+                writer.line(f"agent: lost the coordinator at {self.url} while running a unit")
+        return True
+
+
+class UnitReports():
+    """Writes serialized reports of the tests of a unit to the file the agent reads them from"""
+
+    def __init__(self, config, path):
+        self.config = config
+        self.target = open(path, "a", encoding="utf-8")
+
+
+    def pytest_runtest_logreport(self, report):
+        data = self.config.hook.pytest_report_to_serializable(config=self.config, report=report)
+        self.target.write(json.dumps(data) + "\n")
+        self.target.flush()
+
+
+    def pytest_unconfigure(self):
+        self.target.close()
+
+
+def pytest_configure(config):
+    """Registers the coordinator, the agent or the unit reports writer if requested"""
+
+    if config.getoption("--coordinator") and config.getoption("--agent"):
+        raise pytest.UsageError("--coordinator and --agent can't be used together")
+    if config.getoption("--coordinator"):
+        config.pluginmanager.register(Coordinator(config), "coordinator")
+    if config.getoption("--agent"):
+        config.pluginmanager.register(Agent(config), "agent")
+    if config.getoption("--unit-reports"):
+        config.pluginmanager.register(UnitReports(config, config.getoption("--unit-reports")), "unit_reports")
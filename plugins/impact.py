@@ -0,0 +1,327 @@
+import os
+import re
+import ast
+import inspect
+import subprocess
+from urllib.parse import urlparse
+
+import pytest
+
+from constants import DatabaseConstants as DBC, URLS
+from plugins.result_cache import class_sources
+
+
+# Changes to these files (relative to the app's directory) affect every page, so every test is run
+SHARED_FILES = ("templates/layout.html",)
+# ...and so do changes to anything in these directories (styles and scripts are linked from layout.html)
+SHARED_DIRS = ("static/",)
+# Routes that fixtures open for every class that requests them
+FIXTURE_ROUTES = {"new_user": [URLS.REGISTER_URL, URLS.LOGIN_URL]}
+# Decorators that make a function available to every template (so changing it may affect any page)
+TEMPLATE_DECORATORS = ("template_filter", "template_global", "template_test", "context_processor")
+# Template tags that pull in another template: {% extends "x.html" %}, {% include "x.html" %}, {% import "x.html" ... %}
+TEMPLATE_TAG = re.compile(r"""\{%-?\s*(?:extends|include|import|from)\s+["']([^"']+)["']""")
+
+
+def pytest_addoption(parser):
+    """Adds change-impact selection CLI argument"""
+
+    # 'impact' flag. Runs only the tests that touch routes affected by the app's changes
+    # Takes a unified diff file, or a git revision of the app's repository to diff the current app against
+    parser.addoption("--impact", action="store", default=None,
+                     help="Run only tests affected by app changes: '--impact=changes.diff' or '--impact=HEAD~1'")
+
+
+def read_diff(value, app_path):
+    """Returns the diff from the given file, or from git (changes of the app since the given revision)"""
+
+    if os.path.isfile(value):
+        with open(value, encoding="utf-8") as source:
+            return source.read()
+    try:
+        return subprocess.run(["git", "diff", "--relative", value, "--", "."], cwd=app_path,
+                              capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as error:
+        raise pytest.UsageError(f"Received incorrect --impact flag value. Couldn't get the diff: {error}")
+
+
+def changed_lines(diff):
+    """
+    Parses a unified diff.
+    Returns a dictionary structured as {path: set of changed line numbers (in the new version)}
+    """
+
+    changes = {}
+    path = None
+    line_number = 0
+    lines = diff.splitlines()
+    for index, line in enumerate(lines):
+        # File headers come in pairs; a lone '--- ' line is a removed line starting with '--'
+        if line.startswith("--- ") and index + 1 < len(lines) and lines[index + 1].startswith("+++ "):
+            continue
+        if line.startswith("+++ ") and index > 0 and lines[index - 1].startswith("--- "):
+            name = line[4:].split("\t")[0]
+            if name == "/dev/null":
+                name = lines[index - 1][4:].split("\t")[0]
+            path = re.sub(r"^[ab]/", "", name)
+            changes.setdefault(path, set())
+        elif line.startswith("@@") and path is not None:
+            line_number = int(re.match(r"@@ -\S+ \+(\d+)", line).group(1))
+        elif line.startswith("+") and path is not None:
+            changes[path].add(line_number)
+            line_number += 1
+        elif line.startswith("-") and path is not None:
+            # Removed lines are attributed to the line they were removed before
+            changes[path].add(line_number)
+        elif line.startswith(" "):
+            line_number += 1
+    return changes
+
+
+def app_path_of(path, app_dir):
+    """Returns the path relative to the app's directory (diffs may be taken from a parent directory)"""
+
+    app_dir = app_dir.strip("/") + "/"
+    return path[len(app_dir):] if path.startswith(app_dir) else path
+
+
+class SourceMap():
+    """Maps functions of a python module to routes they serve, templates they render and names they call"""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as source:
+            self.tree = ast.parse(source.read())
+        self.functions = {}
+        module_code = []
+        for node in self.tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.functions[node.name] = node
+            else:
+                module_code.append(node)
+        # Names used outside of functions, e.g. app.jinja_env.filters["usd"] = usd
+        self.module_names = {node.id for statement in module_code for node in ast.walk(statement)
+                             if isinstance(node, ast.Name)}
+
+
+    def decorators(self, name):
+        """Returns (decorator name, decorator call or None) of every decorator of the function"""
+
+        found = []
+        for decorator in self.functions[name].decorator_list:
+            call = decorator if isinstance(decorator, ast.Call) else None
+            target = call.func if call is not None else decorator
+            found.append((getattr(target, "attr", None) or getattr(target, "id", None), call))
+        return found
+
+
+    def routes(self, name):
+        """Returns routes the function is registered for with @app.route(); None for routes that aren't string literals"""
+
+        routes = []
+        for decorator, call in self.decorators(name):
+            if decorator == "route" and call is not None and call.args:
+                path = call.args[0]
+                routes.append(path.value if isinstance(path, ast.Constant) and isinstance(path.value, str) else None)
+        return routes
+
+
+    def shared(self):
+        """Returns functions any page may use: template filters and globals, and names used by module-level code"""
+
+        return self.module_names | {name for name in self.functions
+                                    if any(decorator in TEMPLATE_DECORATORS for decorator, _ in self.decorators(name))}
+
+
+    def calls(self, name):
+        """Returns names the function uses (called functions and decorators)"""
+
+        return {node.id for node in ast.walk(self.functions[name]) if isinstance(node, ast.Name)}
+
+
+    def templates(self, name):
+        """Returns templates the function renders"""
+
+        return {node.args[0].value for node in ast.walk(self.functions[name])
+                if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "render_template"
+                and node.args and isinstance(node.args[0], ast.Constant)}
+
+
+    def function_at(self, line):
+        """Returns the name of the function (decorators included) the line belongs to; None if it's outside functions"""
+
+        for name, node in self.functions.items():
+            first = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+            if first <= line <= node.end_lineno:
+                return name
+        return None
+
+
+def unmapped_files(changes):
+    """
+    Returns changed files of the app that can't be mapped to routes
+    (anything but app.py, helpers.py, templates and static files)
+    """
+
+    unmapped = []
+    for path in changes:
+        path = app_path_of(path, DBC.APP_PATH)
+        if not (path in ("app.py", "helpers.py") or path.startswith(("templates/",) + SHARED_DIRS)):
+            unmapped.append(path)
+    return sorted(unmapped)
+
+
+def template_dependents(templates_path, changed):
+    """Returns the changed templates and every template that extends, includes or imports them (directly or not)"""
+
+    includes = {}
+    for folder, _, files in os.walk(templates_path):
+        for file in files:
+            path = os.path.join(folder, file)
+            name = os.path.relpath(path, templates_path).replace(os.sep, "/")
+            with open(path, encoding="utf-8", errors="replace") as source:
+                includes[name] = set(TEMPLATE_TAG.findall(source.read()))
+
+    affected = set(changed)
+    while True:
+        found = {name for name, included in includes.items() if included & affected} - affected
+        if not found:
+            return affected
+        affected |= found
+
+
+def affected_routes(changes, app_path):
+    """
+    Returns paths of the routes affected by changed lines of app.py, helpers.py and templates;
+    None if shared files or shared functions changed (or an affected route's path isn't known), so everything is affected
+    """
+
+    app = SourceMap(os.path.join(app_path, "app.py"))
+    helpers_path = os.path.join(app_path, "helpers.py")
+    helpers = SourceMap(helpers_path) if os.path.isfile(helpers_path) else None
+
+    changed_functions = set()
+    changed_templates = set()
+    for path, lines in changes.items():
+        path = app_path_of(path, DBC.APP_PATH)
+        if path in SHARED_FILES or path.startswith(SHARED_DIRS):
+            return None
+        if path.startswith("templates/"):
+            changed_templates.add(path.removeprefix("templates/"))
+        elif path in ("app.py", "helpers.py"):
+            source_map = app if path == "app.py" else helpers
+            if source_map is None:
+                continue
+            for line in lines:
+                function = source_map.function_at(line)
+                # Changes outside of functions (imports, configuration) can affect any route
+                if function is None:
+                    return None
+                changed_functions.add(function)
+
+    # Templates that extend or include changed templates are changed too
+    changed_templates = template_dependents(os.path.join(app_path, "templates"), changed_templates)
+    source_maps = [source_map for source_map in (helpers, app) if source_map is not None]
+    # Functions (route functions and helpers from helpers.py or app.py itself) that render changed templates
+    # or use changed functions are changed too, however many helpers are in between
+    while True:
+        found = {name for source_map in source_maps for name in source_map.functions
+                 if (source_map.calls(name) & changed_functions or source_map.templates(name) & changed_templates)}
+        if found <= changed_functions:
+            break
+        changed_functions |= found
+
+    # Template filters and globals are used from templates, and names used by module-level code
+    # (e.g. registered with app.jinja_env.filters) from anywhere, so which routes they affect isn't known
+    if any(source_map.shared() & changed_functions for source_map in source_maps):
+        return None
+
+    routes = set()
+    for name in app.functions:
+        if name in changed_functions:
+            routes.update(app.routes(name))
+    if None in routes:
+        return None
+    return routes
+
+
+def param_urls(value):
+    """Returns the app's URLs found in a parameter value (tuples and lists of values are searched too)"""
+
+    if isinstance(value, str):
+        return [value] if value.startswith(URLS.BASEURL) else []
+    if isinstance(value, (tuple, list)):
+        return [url for element in value for url in param_urls(element)]
+    return []
+
+
+def touched_routes(item):
+    """
+    Returns paths of the routes the test touches: URLs its class refers to, URLs it's parametrized with
+    (e.g. pages of NC.AUTHED_PAGES) and URLs opened by its fixtures
+    """
+
+    if item.cls is not None:
+        sources = class_sources(item.cls)
+    else:
+        sources = [inspect.getsource(item.function)]
+    urls = [getattr(URLS, name) for source in sources for name in re.findall(r"URLS\.(\w+)", source)]
+    callspec = getattr(item, "callspec", None)
+    if callspec is not None:
+        urls += param_urls(list(callspec.params.values()))
+    for fixture, fixture_urls in FIXTURE_ROUTES.items():
+        if fixture in item.fixturenames:
+            urls += fixture_urls
+    return {urlparse(url).path for url in urls}
+
+
+class ImpactSelection():
+    """
+    Runs only the tests affected by changes of the app: changed route functions of app.py,
+    changed helper functions and the routes that use them (directly or through other helpers),
+    and changed templates (and templates that extend or include them) and the routes that render them.
+    Tests are mapped to routes by the URLs (URLS constants) their classes open, the URLs they're parametrized with
+    and the fixtures they use. Changes to layout.html (navigation), static files, module-level code of app.py/helpers.py,
+    functions used by templates or by module-level code, or any other file of the app run everything
+    """
+
+    def __init__(self, config):
+        self.app_path = os.path.join(str(config.rootpath), DBC.APP_PATH)
+        if not os.path.isfile(os.path.join(self.app_path, "app.py")):
+            raise pytest.UsageError(f"--impact requires the app's source: no app.py found at {DBC.APP_PATH}")
+        self.changes = changed_lines(read_diff(config.getoption("--impact"), self.app_path))
+        self.unmapped = unmapped_files(self.changes)
+        self.routes = affected_routes(self.changes, self.app_path)
+        self.summary = None
+
+
+    def pytest_collection_modifyitems(self, config, items):
+        """Deselects tests that don't touch affected routes"""
+
+        if self.unmapped:
+            # Nothing is known about what these files affect, so nothing can be left out
+            self.summary = f"impact: changes to {', '.join(self.unmapped)} can't be mapped to routes, running every test"
+            return
+        if self.routes is None:
+            self.summary = "impact: shared layout, app setup or template helpers changed, running every test"
+            return
+        selected, deselected = [], []
+        for item in items:
+            (selected if touched_routes(item) & self.routes else deselected).append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+        self.summary = f"impact: {len(self.changes)} changed files affect routes " \
+            f"{', '.join(sorted(self.routes)) or 'none'}; {len(selected)} tests selected"
+
+
+    def pytest_report_collectionfinish(self):
+        """Shows which routes are affected"""
+
+        return self.summary
+
+
+def pytest_configure(config):
+    """Registers change-impact selection if requested"""
+
+    if config.getoption("--impact") is not None:
+        config.pluginmanager.register(ImpactSelection(config), "impact_selection")
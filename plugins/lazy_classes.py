@@ -0,0 +1,162 @@
+import re
+import pytest
+from datetime import date
+from itertools import product
+
+from helpers import covering_array, generate_tests_cls_parametrize, generated_class_name, generated_class_prefix
+
+
+# Names in a '-k' expression (same characters as pytest's identifiers)
+KEYWORD_NAME = re.compile(r"(?:\w|:|\+|-|\.|\[|\]|\\|/)+")
+
+
+def check_coverage(value):
+    """Checks the value of the 'coverage' CLI argument"""
+
+    msg = "Received incorrect --coverage flag value. Try 'full' or 'pairwise'"
+    if value not in ("full", "pairwise"):
+        raise pytest.UsageError(msg)
+
+    return value
+
+
+def check_coverage_run(value):
+    """Checks the value of the 'coverage-run' CLI argument"""
+
+    msg = "Received incorrect --coverage-run flag value. Try a non-negative integer, for example: '--coverage-run=3'"
+    if not value.isdigit():
+        raise pytest.UsageError(msg)
+
+    return int(value)
+
+
+def pytest_addoption(parser):
+    """Adds case coverage CLI arguments"""
+
+    # 'coverage' flag. Picks combinations of values for class templates parametrized by dimensions
+    # 'pairwise' - every pair of values (a different set of combinations for every run index), 'full' - every combination
+    # Every combination is a class that registers a user, so 'full' is opt-in
+    parser.addoption("--coverage", action="store", default="pairwise", type=check_coverage,
+                     help="Combinations of parameter values to test: '--coverage=pairwise' (default) or '--coverage=full'")
+
+    # 'coverage-run' flag. Index of a pairwise run in the rotation of combinations (see helpers.covering_array())
+    # By default it's the number of the day, so consecutive nightly runs go through the rotation
+    parser.addoption("--coverage-run", action="store", default=None, type=check_coverage_run,
+                     help="Index of the pairwise run in the rotation of combinations (default: the number of the day)")
+
+
+def coverage_run(config):
+    """Returns the index of the run in the rotation of pairwise combinations"""
+
+    run = config.getoption("--coverage-run")
+    return date.today().toordinal() if run is None else run
+
+
+def combine(parameter_names, dimensions, coverage, run):
+    """Returns combinations of values of the template's dimensions (in order of parameter names)"""
+
+    dimensions = [dimensions[name] for name in parameter_names.split(", ")]
+    if coverage == "pairwise":
+        return covering_array(dimensions, run)
+    return list(product(*dimensions))
+
+
+def requested_classes(config, path):
+    """
+    Returns names of the classes the command line selects in the module with the given path
+    through node ids, e.g. 'test_buy_page.py::TestSuccessfullPurchase[AAPL-1]' -> 'TestSuccessfullPurchase'.
+    None if the module is selected as a whole or only as a part of a directory
+    """
+
+    names = set()
+    for arg in config.args:
+        arg_path, _, rest = arg.partition("::")
+        if (config.invocation_params.dir / arg_path).resolve() != path.resolve():
+            continue
+        if not rest:
+            return None
+        names.add(rest.split("::")[0].split("[")[0])
+    return names or None
+
+
+def keyword_filter(collector, template):
+    """
+    Returns a function that tells whether the '-k' expression may select any test of the class generated
+    from the template with the given name. None if there's no '-k' or it can't be told before the class is collected:
+    when the expression names a marker (markers can be added during collection) or the template has parametrized tests
+    """
+
+    keyword = collector.config.option.keyword
+    if not keyword:
+        return None
+    try:
+        # Same parser pytest uses for -k (not a public API, so anything unexpected turns the filter off)
+        from _pytest.mark.expression import Expression
+        expression = Expression.compile(keyword)
+    except Exception:
+        return None
+
+    markers = [line.split(":")[0].split("(")[0].strip().lower() for line in collector.config.getini("markers")]
+    names = {name.lower() for name in KEYWORD_NAME.findall(keyword)} - {"and", "or", "not"}
+    if any(name in marker for name in names for marker in markers):
+        return None
+
+    methods = {}
+    for method_name in dir(template):
+        method = getattr(template, method_name)
+        if collector.istestfunction(method, method_name):
+            methods[method_name] = method
+    marks = [*getattr(template, "pytestmark", []),
+             *(mark for method in methods.values() for mark in getattr(method, "pytestmark", []))]
+    if any(mark.name == "parametrize" for mark in marks):
+        return None
+
+    # Names -k is matched against: names of the test's module and directories, its class and function,
+    # and attributes of the function (markers are left out above)
+    chain = [node.name for node in collector.listchain() if not isinstance(node, pytest.Session)]
+    def may_select(class_name):
+        for method_name, method in methods.items():
+            candidates = [name.lower() for name in (*chain, class_name, method_name, *vars(method))]
+            if expression.evaluate(lambda subname, **kwargs: any(subname.lower() in name for name in candidates)):
+                return True
+        return False
+    return may_select
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pycollect_makeitem(collector, name, obj):
+    """
+    Generates classes from templates registered with @parametrize_class() (see helpers.py).
+    Templates that aren't selected by node id aren't generated at all, and neither are their cases.
+    With '-k', only the classes whose tests the expression may select are generated
+    """
+
+    if not isinstance(obj, type) or "class_parametrization" not in vars(obj):
+        return None
+
+    requested = requested_classes(collector.config, collector.path)
+    if requested is not None and generated_class_prefix(obj) not in requested:
+        return []
+
+    parameter_names, values = obj.class_parametrization
+    if callable(values):
+        values = values()
+    if isinstance(values, dict):
+        values = combine(parameter_names, values, collector.config.getoption("--coverage"), coverage_run(collector.config))
+    may_select = keyword_filter(collector, obj)
+    if may_select is not None:
+        values = [test_values for test_values in values if may_select(generated_class_name(obj, test_values))]
+    generated_classes = generate_tests_cls_parametrize(obj, parameter_names, values)
+    # Collected classes are looked up by name in their module, just like the ones defined there
+    for class_name, generated_class in generated_classes.items():
+        setattr(collector.obj, class_name, generated_class)
+    return [pytest.Class.from_parent(collector, name=class_name) for class_name in generated_classes]
+
+
+def pytest_report_header(config):
+    """Shows the run index of pairwise runs, so the same combinations can be replayed"""
+
+    if config.getoption("--coverage") == "pairwise":
+        run = coverage_run(config)
+        return f"coverage: pairwise, run {run} (replay with --coverage-run={run})"
+    return None
@@ -0,0 +1,219 @@
+import json
+import statistics
+
+import pytest
+
+from pages.base_page import BasePage
+from pages.timings import TIMINGS
+from plugins.scheduler import group_key
+
+
+# Session fails if a class or a page object method gets slower than its baseline median by more than this many percent
+THRESHOLD = 25
+# Number of latest runs kept in the baseline for every class and method
+HISTORY_RUNS = 10
+# Classes and methods with fewer runs in the baseline than this aren't compared yet
+MIN_RUNS = 3
+# A slowdown also has to exceed this many (normalized) median absolute deviations of the baseline,
+# so classes and methods whose duration is noisy by nature don't fail the session
+NOISE_FACTOR = 3
+# Slowdowns smaller than this (in seconds) are ignored (sub-millisecond helpers are mostly timer noise)
+MIN_SLOWDOWN = 0.001
+
+
+def check_perf_threshold(value):
+    """Checks the value of the 'perf-threshold' CLI argument"""
+
+    msg = "Received incorrect --perf-threshold flag value. Try a positive number of percent, for example: '25'"
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise pytest.UsageError(msg)
+    if threshold <= 0:
+        raise pytest.UsageError(msg)
+
+    return threshold
+
+
+def pytest_addoption(parser):
+    """Adds performance gate CLI arguments"""
+
+    # 'perf-baseline' flag. Path to the file with durations of classes and page object methods of previous runs;
+    # durations of this run are added to it (unless the gate fails)
+    parser.addoption("--perf-baseline", action="store", default=None,
+                     help="Path to the file with durations of previous runs to add this run's durations to, " \
+                        "for example: '--perf-baseline=perf.json'")
+
+    # 'perf-gate' flag. Fails the session if a class or a page object method regressed against the baseline
+    parser.addoption("--perf-gate", action="store_true",
+                     help="use --perf-gate (with --perf-baseline) to fail the session if classes or page object methods got slower")
+
+    # 'perf-threshold' flag. Regression (in percent) that fails the gate
+    parser.addoption("--perf-threshold", action="store", default=THRESHOLD, type=check_perf_threshold,
+                     help=f"Percent by which a class or a method may get slower than its baseline (default: {THRESHOLD})")
+
+
+def subclasses(cls):
+    """Returns the class and all of its subclasses"""
+
+    found = [cls]
+    for subclass in cls.__subclasses__():
+        found.extend(subclasses(subclass))
+    return found
+
+
+def robust_limit(samples, threshold):
+    """
+    Returns the duration above which a new sample is a regression: baseline median plus the larger of
+    threshold percent of the median and NOISE_FACTOR normalized median absolute deviations (MAD)
+    """
+
+    median = statistics.median(samples)
+    mad = statistics.median(abs(sample - median) for sample in samples) * 1.4826
+    return median + max(median * threshold / 100, NOISE_FACTOR * mad, MIN_SLOWDOWN)
+
+
+class PerfGate():
+    """
+    Keeps durations of test classes (setup + tests + teardown) and mean durations of page object method calls
+    of the last HISTORY_RUNS runs in a baseline file. With '--perf-gate', fails the session if any of them
+    got slower than its baseline (see robust_limit()); durations of such a run aren't added to the baseline.
+    Duration of a class is the sum of the tests that ran, so the baseline also keeps the number of tests of every class:
+    classes that ran a different number of tests (a '-k' selection, results taken from the result cache)
+    are neither compared nor added to the baseline
+    """
+
+    def __init__(self, config, path):
+        self.config = config
+        self.path = path
+        self.baseline = self.load()
+        # Durations of this run: {"classes": {class: seconds}, "methods": {method: seconds per call}}
+        self.measured = {"classes": {}, "methods": {}}
+        # Number of tests whose durations were added up for every class: {class: count}
+        self.counts = {}
+        self.miscounted = set()
+        self.failed_classes = set()
+        self.regressions = []
+
+
+    def load(self):
+        """Reads the baseline; empty one if there's none yet"""
+
+        try:
+            with open(self.path, encoding="utf-8") as source:
+                return json.load(source)
+        except (OSError, ValueError):
+            return {"classes": {}, "methods": {}, "counts": {}}
+
+
+    def save(self):
+        """Adds durations of this run to the baseline, keeping the last HISTORY_RUNS of them, and writes it"""
+
+        for kind, durations in self.measured.items():
+            history = self.baseline.setdefault(kind, {})
+            for key, duration in durations.items():
+                samples = history.setdefault(key, [])
+                samples.append(round(duration, 4))
+                del samples[:-HISTORY_RUNS]
+        self.baseline.setdefault("counts", {}).update({key: self.counts.get(key, 0) for key in self.measured["classes"]})
+        with open(self.path, "w", encoding="utf-8") as target:
+            json.dump(self.baseline, target, indent=4, sort_keys=True)
+
+
+    def find_miscounted(self):
+        """Returns the classes whose number of tests differs from the one kept in the baseline"""
+
+        # Classes of baselines written before counts were kept take the count of this run
+        recorded = self.baseline.get("counts", {})
+        counts = {key: self.counts.get(key, 0) for key in self.measured["classes"]}
+        return {key for key, count in counts.items() if recorded.get(key, count) != count}
+
+
+    def compare(self):
+        """Returns descriptions of the classes and methods that got slower than their baseline"""
+
+        found = []
+        threshold = self.config.getoption("--perf-threshold")
+        for kind, durations in self.measured.items():
+            for key, duration in sorted(durations.items()):
+                samples = self.baseline.get(kind, {}).get(key, [])
+                if len(samples) < MIN_RUNS:
+                    continue
+                limit = robust_limit(samples, threshold)
+                if duration > limit:
+                    median = statistics.median(samples)
+                    found.append(f"{key}: {duration:.3f}s is {(duration / median - 1) * 100:.0f}% slower " \
+                                 f"than the median of {len(samples)} runs ({median:.3f}s, limit {limit:.3f}s)")
+        return found
+
+
+    def pytest_collection_finish(self, session):
+        """Starts timing calls of page object methods"""
+
+        for cls in subclasses(BasePage):
+            TIMINGS.instrument(cls)
+
+
+    def pytest_runtest_logreport(self, report):
+        """Adds up setup, call and teardown durations of every test of the class"""
+
+        # Results taken from the result cache took no time
+        if getattr(report, "cached", False):
+            return
+        key = group_key(report.nodeid)
+        if report.failed:
+            self.failed_classes.add(key)
+        classes = self.measured["classes"]
+        classes[key] = classes.get(key, 0.0) + report.duration
+        if report.when == "teardown":
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionfinish(self, session):
+        """Compares durations with the baseline; fails the session or adds them to the baseline"""
+
+        # Failed classes and methods of failed runs often stop early or wait for timeouts, so they aren't measured
+        for key in self.failed_classes:
+            self.measured["classes"].pop(key, None)
+        # Durations of a different number of tests can't be compared with the baseline
+        self.miscounted = self.find_miscounted()
+        for key in self.miscounted:
+            self.measured["classes"].pop(key)
+        if not self.failed_classes:
+            self.measured["methods"] = {key: seconds / count for key, (count, seconds) in TIMINGS.calls.items()}
+        if not any(self.measured.values()):
+            return
+
+        if self.config.getoption("--perf-gate"):
+            self.regressions = self.compare()
+        if self.regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+        else:
+            self.save()
+
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """Shows regressions found by the gate"""
+
+        if not self.config.getoption("--perf-gate"):
+            return
+        terminalreporter.write_sep("=", "performance gate")
+        if self.miscounted:
+            terminalreporter.write_line(f"{len(self.miscounted)} classes not compared: they ran a different number of tests " \
+                                        f"than in {self.path} (run the same selection of tests without --result-cache)")
+        if not self.regressions:
+            terminalreporter.write_line(f"no regressions against {self.path}")
+            return
+        for line in self.regressions:
+            terminalreporter.write_line(line, red=True)
+
+
+def pytest_configure(config):
+    """Registers the performance gate if requested"""
+
+    path = config.getoption("--perf-baseline")
+    if config.getoption("--perf-gate") and path is None:
+        raise pytest.UsageError("--perf-gate requires --perf-baseline=path")
+    if path is not None:
+        config.pluginmanager.register(PerfGate(config, path), "perf_gate")
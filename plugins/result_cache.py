@@ -0,0 +1,213 @@
+import os
+import sys
+import inspect
+import hashlib
+from functools import cache
+
+import pytest
+
+from constants import DatabaseConstants as DBC, LazyCases
+from plugins.scheduler import group_key
+
+
+# Key of the stored results in pytest's cache directory (.pytest_cache)
+CACHE_KEY = "finance/result_cache"
+# Files of the app's source that are hashed (database and other files are ignored)
+APP_SOURCE_SUFFIXES = (".py", ".html", ".css", ".js", ".sql", ".txt")
+# Modules of the suite every test class depends on
+SUITE_MODULES = ("conftest.py", "constants.py", "helpers.py")
+
+
+def pytest_addoption(parser):
+    """Adds result cache CLI argument"""
+
+    # 'result-cache' flag. Test classes that passed before with the same app, test code, seed and browser
+    # are reported as passed without being run. Clear stored results with pytest's '--cache-clear'
+    parser.addoption("--result-cache", action="store_true",
+                     help="use --result-cache to skip test classes that passed before and whose inputs haven't changed")
+
+
+def hash_app_source(path):
+    """Returns a hash of the app's source files; None if there's no app source at the given path"""
+
+    if not os.path.isdir(path):
+        return None
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__" and not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(APP_SOURCE_SUFFIXES):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                with open(file_path, "rb") as source:
+                    digest.update(source.read())
+    return digest.hexdigest()
+
+
+def page_module_files(module):
+    """Returns paths of page object modules (pages/*.py) the module uses, directly or through other page modules"""
+
+    found = {}
+    pending = [module]
+    while pending:
+        for value in list(vars(pending.pop()).values()):
+            name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+            if isinstance(name, str) and name.startswith("pages.") and name not in found:
+                found[name] = sys.modules[name].__file__
+                pending.append(sys.modules[name])
+    return sorted(found.values())
+
+
+@cache
+def class_source(cls):
+    """Returns the source code of the class or function; empty string if it has none (generated classes)"""
+
+    try:
+        return inspect.getsource(cls)
+    except (OSError, TypeError):
+        return ""
+
+
+def class_sources(cls):
+    """Returns the source code of the class and of the classes it's based on"""
+
+    return [source for source in map(class_source, cls.__mro__[:-1]) if source]
+
+
+class ResultCache():
+    """
+    Skips test classes whose previous run passed, if nothing that could change their result has changed since.
+    A class is keyed on a hash of the app's source (DatabaseConstants.APP_PATH), the class's source,
+    the page object modules, conftest.py, constants.py and helpers.py, and the seed, browser and db usage of the run.
+    Tests outside of classes are keyed the same way, on the source of the test function.
+    Classes with matching keys are reported as cached passes (tests skipped in that run are reported as skipped).
+    Classes with expected failures, or skips whose reason can't be replayed, aren't stored
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.stored = config.cache.get(CACHE_KEY, {})
+        self.app_hash = hash_app_source(os.path.join(str(config.rootpath), DBC.APP_PATH))
+        self.keys = {}
+        self.cached = set()
+        self.collected = {}
+        self.results = {}
+        self.failed = set()
+        # Classes with results that can't be replayed from the cache
+        self.uncacheable = set()
+
+
+    def class_key(self, item):
+        """Returns the key of the item's test class"""
+
+        digest = hashlib.sha256()
+        options = [self.app_hash, group_key(item.nodeid), LazyCases.seed,
+                   self.config.getoption("--browser"), self.config.getoption("--db-usage").lower()]
+        digest.update(repr(options).encode())
+        # Tests outside of classes are groups of their own, so their function is their source
+        sources = class_sources(item.cls) if item.cls is not None else [class_source(item.function)]
+        for source in sources:
+            digest.update(source.encode())
+        files = page_module_files(item.module)
+        files += [os.path.join(str(self.config.rootpath), name) for name in SUITE_MODULES]
+        for path in files:
+            with open(path, "rb") as source:
+                digest.update(source.read())
+        return digest.hexdigest()
+
+
+    def pytest_collection_modifyitems(self, items):
+        """Finds test classes with stored passing results for the same key"""
+
+        if self.app_hash is None:
+            return
+        missing = set()
+        for item in items:
+            group = group_key(item.nodeid)
+            self.collected[group] = self.collected.get(group, 0) + 1
+            if group not in self.keys:
+                self.keys[group] = self.class_key(item)
+            entry = self.stored.get(group)
+            if entry is None or entry["key"] != self.keys[group] or item.nodeid not in entry["tests"]:
+                # A test without a stored result has to be run, and so does the rest of its class
+                missing.add(group)
+        self.cached = set(self.keys) - missing
+
+
+    def pytest_report_collectionfinish(self):
+        """Shows how many test classes are going to be reported from the cache"""
+
+        if self.app_hash is None:
+            return f"result cache: off, no app source found at {DBC.APP_PATH}"
+        return f"result cache: {len(self.cached)} of {len(self.keys)} classes unchanged since they passed"
+
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        """Reports tests of unchanged classes with their stored results instead of running them"""
+
+        group = group_key(item.nodeid)
+        if group not in self.cached or item.nodeid not in self.stored[group]["tests"]:
+            return None
+        outcome, reason = self.stored[group]["tests"][item.nodeid]
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        if outcome == "skipped":
+            longrepr = (str(item.path), item.location[1] + 1, reason)
+            report = pytest.TestReport(item.nodeid, item.location, dict.fromkeys(item.keywords, 1),
+                                       "skipped", longrepr, "setup", cached=True)
+        else:
+            report = pytest.TestReport(item.nodeid, item.location, dict.fromkeys(item.keywords, 1),
+                                       "passed", None, "call", cached=True)
+        item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+
+    def pytest_report_teststatus(self, report):
+        """Marks passes taken from the cache"""
+
+        if getattr(report, "cached", False) and report.passed:
+            return "cached", "c", "CACHED PASS"
+        return None
+
+
+    def pytest_runtest_logreport(self, report):
+        """Collects results of the tests that were actually run"""
+
+        group = group_key(report.nodeid)
+        if getattr(report, "cached", False) or group not in self.keys:
+            return
+        if report.failed:
+            self.failed.add(group)
+        elif hasattr(report, "wasxfail") or (report.skipped and not isinstance(report.longrepr, tuple)):
+            # Expected failures (xfail and xpass) are only replayed as plain skips and passes,
+            # and only skips with a (path, line, reason) longrepr keep their reason
+            self.uncacheable.add(group)
+        elif report.skipped:
+            self.results.setdefault(group, {})[report.nodeid] = ("skipped", report.longrepr[2])
+        elif report.when == "call":
+            self.results.setdefault(group, {})[report.nodeid] = ("passed", None)
+
+
+    def pytest_sessionfinish(self):
+        """Stores results of test classes that were run completely without failures"""
+
+        for group, tests in self.results.items():
+            if group in self.failed | self.uncacheable or len(tests) < self.collected[group]:
+                self.stored.pop(group, None)
+            else:
+                self.stored[group] = {"key": self.keys[group], "tests": tests}
+        for group in self.failed | self.uncacheable:
+            self.stored.pop(group, None)
+        self.config.cache.set(CACHE_KEY, self.stored)
+
+
+def pytest_configure(config):
+    """Registers the result cache if requested (with a fixed seed)"""
+
+    if config.getoption("--result-cache"):
+        # Keys include the seed, and a random one (picked when --seed isn't given) would never match a stored key
+        if config.getoption("--seed") is None:
+            raise pytest.UsageError("--result-cache requires --seed: results are stored for the values of one seed, "
+                                    "for example: '--result-cache --seed=1234'")
+        config.pluginmanager.register(ResultCache(config), "result_cache")
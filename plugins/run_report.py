@@ -0,0 +1,169 @@
+import json
+import time
+from uuid import uuid4
+
+import pytest
+
+from constants import LazyCases
+from pages.timings import TIMINGS
+from plugins.scheduler import group_key
+
+
+# Categories the time of every test phase is split into
+# (time that doesn't fall into any of them is the test's own code, assertions, pytest itself, etc.)
+CATEGORIES = ("browser_startup", "user_seeding", "navigation", "waits", "db_queries")
+# Setup of these fixtures is timed as the category (including everything they do, e.g. new_user's navigation)
+FIXTURE_CATEGORIES = {"browser": "browser_startup", "new_user": "user_seeding"}
+# Columns of a report row: one row for every test and one for every class ('kind' is 'test' or 'class')
+COLUMNS = ("run", "started", "kind", "nodeid", "outcome", "setup", "call", "teardown", *CATEGORIES, "seed", "browser")
+# Report file suffixes that make the report a SQLite database instead of a JSON Lines file
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Totals of TIMINGS at the end of the item's previous phase
+timings_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    """Adds run report CLI argument"""
+
+    # 'run-report' flag. Appends a row for every test and every test class of the run to a JSON Lines file
+    # (or to a SQLite database, if the path ends with .db, .sqlite or .sqlite3)
+    parser.addoption("--run-report", action="store", default=None,
+                     help="Path to a JSON Lines file (or a .db SQLite database) to append test results and timings to")
+
+
+# Time of every phase is split into categories whether the report is written or not (it's cheap),
+# so reports sent by agents of a distributed run carry it too (see plugins/distributed.py)
+@pytest.hookimpl(wrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """Times setup of fixtures listed in FIXTURE_CATEGORIES"""
+
+    category = FIXTURE_CATEGORIES.get(fixturedef.argname)
+    if category is None:
+        return (yield)
+    with TIMINGS.section(category):
+        return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_setup(item):
+    """Starts splitting time of the test's phases"""
+
+    item.stash[timings_key] = dict(TIMINGS.totals)
+    return (yield)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Adds the time split of the phase to its report as 'timings' (a dictionary of {category: seconds})"""
+
+    report = yield
+    snapshot = item.stash.get(timings_key, {})
+    report.timings = {category: round(seconds, 4) for category, seconds in TIMINGS.since(snapshot).items()}
+    item.stash[timings_key] = dict(TIMINGS.totals)
+    return report
+
+
+def outcome_of(phases):
+    """Returns the outcome of a test from the reports of its phases: 'failed', 'skipped' or 'passed'"""
+
+    outcomes = [report.outcome for report in phases.values()]
+    if "failed" in outcomes:
+        return "failed"
+    if "skipped" in outcomes:
+        return "skipped"
+    return "passed"
+
+
+class RunReport():
+    """
+    Appends a row for every test and every test class of the run to a JSON Lines file or to a SQLite database:
+    outcome, durations of setup, call and teardown, time split into CATEGORIES, seed and browser.
+    Rows of all runs live in one file, so durations of a test can be followed across runs
+    """
+
+    def __init__(self, config, path):
+        self.config = config
+        self.path = path
+        self.run = {"run": uuid4().hex[:12], "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        # {nodeid: {phase: report}} of the tests that haven't finished yet
+        self.phases = {}
+        self.rows = []
+
+
+    def row(self, kind, nodeid, outcome, durations, timings):
+        """Returns a report row"""
+
+        return {**self.run, "kind": kind, "nodeid": nodeid, "outcome": outcome,
+                **{phase: round(durations.get(phase, 0.0), 4) for phase in ("setup", "call", "teardown")},
+                **{category: round(timings.get(category, 0.0), 4) for category in CATEGORIES},
+                "seed": LazyCases.seed, "browser": self.config.getoption("--browser")}
+
+
+    def pytest_runtest_logreport(self, report):
+        """Adds a row for the test once its teardown is reported"""
+
+        phases = self.phases.setdefault(report.nodeid, {})
+        phases[report.when] = report
+        if report.when != "teardown":
+            return
+        del self.phases[report.nodeid]
+        timings = {}
+        for phase in phases.values():
+            for category, seconds in getattr(phase, "timings", {}).items():
+                timings[category] = timings.get(category, 0.0) + seconds
+        durations = {when: phase.duration for when, phase in phases.items()}
+        self.rows.append(self.row("test", report.nodeid, outcome_of(phases), durations, timings))
+
+
+    def class_rows(self):
+        """Returns rows of the test classes, adding up rows of their tests"""
+
+        classes = {}
+        for row in self.rows:
+            key = group_key(row["nodeid"])
+            if key != row["nodeid"]:
+                classes.setdefault(key, []).append(row)
+        rows = []
+        for key, tests in classes.items():
+            outcomes = {test["outcome"] for test in tests}
+            outcome = next(outcome for outcome in ("failed", "skipped", "passed") if outcome in outcomes)
+            durations = {phase: sum(test[phase] for test in tests) for phase in ("setup", "call", "teardown")}
+            timings = {category: sum(test[category] for test in tests) for category in CATEGORIES}
+            rows.append(self.row("class", key, outcome, durations, timings))
+        return rows
+
+
+    def write(self, rows):
+        """Appends rows to the report: in one transaction to a SQLite database, or as lines to a JSON Lines file"""
+
+        if self.path.endswith(SQLITE_SUFFIXES):
+            import sqlite3
+
+            db = sqlite3.connect(self.path)
+            try:
+                with db:
+                    db.execute(f"CREATE TABLE IF NOT EXISTS results ({', '.join(COLUMNS)})")
+                    db.execute("CREATE INDEX IF NOT EXISTS results_by_node ON results (nodeid, started)")
+                    db.executemany(f"INSERT INTO results VALUES ({', '.join('?' * len(COLUMNS))})",
+                                   ([row[column] for column in COLUMNS] for row in rows))
+            finally:
+                db.close()
+        else:
+            with open(self.path, "a", encoding="utf-8") as target:
+                target.writelines(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+
+
+    def pytest_sessionfinish(self):
+        """Writes rows of the run's tests and classes"""
+
+        if self.rows:
+            self.write(self.rows + self.class_rows())
+
+
+def pytest_configure(config):
+    """Registers the run report if requested"""
+
+    path = config.getoption("--run-report")
+    if path is not None:
+        config.pluginmanager.register(RunReport(config, path), "run_report")
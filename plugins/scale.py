@@ -0,0 +1,107 @@
+import json
+import math
+
+import pytest
+
+
+# Growth exponent above which a metric is reported as super-linear
+# (1 - the metric grows as fast as the size, 2 - four times as fast when the size doubles, etc.)
+SUPERLINEAR_EXPONENT = 1.2
+
+
+def pytest_addoption(parser):
+    """Adds scale testing CLI arguments"""
+
+    # 'scale' flag. Runs test classes marked with @pytest.mark.scale (they seed thousands of rows, so they're skipped by default)
+    parser.addoption("--scale", action="store_true",
+                     help="use --scale to run scale tests (classes marked with @pytest.mark.scale)")
+
+    # 'scale-report' flag. Writes measured curves to a JSON file, so they could be plotted or compared
+    parser.addoption("--scale-report", action="store", default=None,
+                     help="Path to a JSON file to write measured scale curves to, for example: '--scale-report=scale.json'")
+
+
+def growth_exponent(smaller, larger):
+    """
+    Returns the exponent k of value ~ size^k between two (size, value) points of a curve;
+    None if it can't be told (a value isn't positive)
+    """
+
+    (size_a, value_a), (size_b, value_b) = smaller, larger
+    if value_a <= 0 or value_b <= 0 or size_a == size_b:
+        return None
+    return math.log(value_b / value_a) / math.log(size_b / size_a)
+
+
+class ScaleCurves():
+    """
+    Collects metrics measured by scale tests for every size they're run with
+    and reports how each metric grows with the size, so super-linear behaviour stands out
+    """
+
+    def __init__(self, config):
+        self.config = config
+        # {curve: {metric: {size: value}}}
+        self.curves = {}
+
+
+    def record(self, curve, metric, size, value):
+        """Adds a measured value of the metric of the given curve (e.g. 'portfolio', 'render_ms') for the size"""
+
+        self.curves.setdefault(curve, {}).setdefault(metric, {})[size] = value
+
+
+    def summary(self):
+        """Returns report lines: every metric of every curve with its values and growth exponents"""
+
+        lines = []
+        for curve, metrics in self.curves.items():
+            lines.append(f"{curve}:")
+            for metric, values in metrics.items():
+                points = sorted(values.items())
+                measured = ", ".join(f"{size}: {value:g}" for size, value in points)
+                growth = [growth_exponent(a, b) for a, b in zip(points, points[1:])]
+                line = f"    {metric:<16} {measured}"
+                if any(k is not None for k in growth):
+                    line += "; growth " + ", ".join("?" if k is None else f"{k:.2f}" for k in growth)
+                    if any(k is not None and k > SUPERLINEAR_EXPONENT for k in growth):
+                        line += " (super-linear)"
+                lines.append(line)
+        return lines
+
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        """Skips scale tests unless they're requested"""
+
+        if not config.getoption("--scale"):
+            for item in items:
+                if "scale" in item.keywords:
+                    item.add_marker(pytest.mark.skip(reason="Scale tests are run with --scale"))
+
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """Shows measured curves and writes them to the scale report if requested"""
+
+        if not self.curves:
+            return
+        terminalreporter.write_sep("=", "scale curves")
+        for line in self.summary():
+            terminalreporter.write_line(line)
+        path = self.config.getoption("--scale-report")
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as target:
+                json.dump(self.curves, target, indent=4)
+
+
+@pytest.fixture(scope="session")
+def scale_curves(request):
+    """Collector of the metrics measured by scale tests"""
+
+    return request.config.pluginmanager.get_plugin("scale_curves")
+
+
+def pytest_configure(config):
+    """Registers the scale curves collector"""
+
+    config.pluginmanager.register(ScaleCurves(config), "scale_curves")
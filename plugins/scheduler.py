@@ -0,0 +1,198 @@
+import re
+import json
+import statistics
+
+import pytest
+
+
+# Durations file name, relative to the rootdir (unless --durations-store is given)
+DURATIONS_FILE = ".class_durations.json"
+# Weight of the latest measurement when it is merged with the stored duration
+SMOOTHING = 0.5
+# Estimated duration (in seconds) of a class when nothing is known about it or its template
+UNKNOWN_DURATION = 10.0
+
+
+def check_shard(value):
+    """Checks the value of the 'shard' CLI argument"""
+
+    msg = "Received incorrect --shard flag value. Try 'i/n', where 1 <= i <= n, for example: '--shard=2/4'"
+    match = re.fullmatch(r"(\d+)/(\d+)", value)
+    if match is None or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise pytest.UsageError(msg)
+
+    return int(match.group(1)), int(match.group(2))
+
+
+def check_schedule(value):
+    """Checks the value of the 'schedule' CLI argument"""
+
+    msg = "Received incorrect --schedule flag value. Try 'collection' or 'longest-first'"
+    if value not in ("collection", "longest-first"):
+        raise pytest.UsageError(msg)
+
+    return value
+
+
+def pytest_addoption(parser):
+    """Adds scheduling CLI arguments"""
+
+    # 'schedule' flag. Allows to run test classes with the longest recorded duration first
+    # Available options: 'collection' and 'longest-first'
+    parser.addoption("--schedule", action="store", default="collection", type=check_schedule,
+                     help="Order of test classes: '--schedule=collection' or '--schedule=longest-first'")
+
+    # 'shard' flag. Runs only one of n parts of the suite; parts are balanced by recorded durations
+    # Every shard has to use the same durations file and collect the same tests
+    parser.addoption("--shard", action="store", default=None, type=check_shard,
+                     help="Run only the i-th of n parts of the suite balanced by duration, for example: '--shard=1/3'")
+
+    # 'durations-store' flag. Path to the file with recorded class durations
+    parser.addoption("--durations-store", action="store", default=None,
+                     help=f"Path to the file with recorded test class durations (default: {DURATIONS_FILE} in rootdir)")
+
+
+def group_key(nodeid):
+    """
+    Returns the id of the class the test belongs to, e.g. 'test_buy_page.py::TestBuyPageBasics'.
+    Tests outside of classes are groups of their own
+    """
+
+    parts = nodeid.split("::")
+    return "::".join(parts[:2]) if len(parts) > 2 else nodeid
+
+
+def template_key(key):
+    """Strips the parameters generate_tests_cls_parametrize() adds to class names: 'TestX[1-case]' -> 'TestX'"""
+
+    return re.sub(r"\[.*\]$", "", key)
+
+
+def estimate(key, durations):
+    """
+    Returns the estimated duration of the class:
+    recorded duration if there is one, otherwise mean recorded duration of classes generated from the same template,
+    otherwise median of all recorded durations
+    """
+
+    if key in durations:
+        return durations[key]
+    same_template = [duration for other, duration in durations.items() if template_key(other) == template_key(key)]
+    if same_template:
+        return statistics.mean(same_template)
+    if durations:
+        return statistics.median(durations.values())
+    return UNKNOWN_DURATION
+
+
+def longest_first(estimates):
+    """Returns keys ordered by estimated duration, longest first; ties keep their original order"""
+
+    return sorted(estimates, key=lambda key: -estimates[key])
+
+
+def assign_shards(estimates, shard_count):
+    """
+    Longest-processing-time-first assignment: every class, longest first, goes to the shard with the least total.
+    Returns a dictionary structured as {key: shard index (0-based)}
+    """
+
+    totals = [0.0] * shard_count
+    assignment = {}
+    for key in longest_first(estimates):
+        shard = totals.index(min(totals))
+        assignment[key] = shard
+        totals[shard] += estimates[key]
+    return assignment
+
+
+class DurationScheduler():
+    """
+    Duration-aware scheduling of test classes.
+    Every run records how long each test class took (setup + tests + teardown) to a local durations file.
+    Later runs use these durations to run the longest classes first ('--schedule=longest-first')
+    and to split the suite into shards of about the same duration ('--shard=i/n')
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.getoption("--durations-store") or str(config.rootpath / DURATIONS_FILE)
+        self.durations = self.load()
+        self.measured = {}
+        self.summary = None
+
+
+    def load(self):
+        """Reads recorded durations; empty dictionary if there are none yet"""
+
+        try:
+            with open(self.path, encoding="utf-8") as source:
+                return json.load(source)
+        except (OSError, ValueError):
+            return {}
+
+
+    def save(self):
+        """Merges measured durations into recorded ones and writes them"""
+
+        for key, duration in self.measured.items():
+            if key in self.durations:
+                duration = SMOOTHING * duration + (1 - SMOOTHING) * self.durations[key]
+            self.durations[key] = round(duration, 3)
+        with open(self.path, "w", encoding="utf-8") as target:
+            json.dump(self.durations, target, indent=4, sort_keys=True)
+
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        """Keeps only the tests of the current shard and orders classes if requested"""
+
+        groups = {}
+        for item in items:
+            groups.setdefault(group_key(item.nodeid), []).append(item)
+        estimates = {key: estimate(key, self.durations) for key in groups}
+
+        shard = config.getoption("--shard")
+        if shard is not None:
+            index, count = shard
+            assignment = assign_shards(estimates, count)
+            deselected = [item for key in groups if assignment[key] != index - 1 for item in groups[key]]
+            groups = {key: group for key, group in groups.items() if assignment[key] == index - 1}
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+            self.summary = f"shard {index}/{count}: {len(groups)} classes, " \
+                f"estimated duration {sum(estimates[key] for key in groups):.0f}s"
+
+        order = list(groups)
+        if config.getoption("--schedule") == "longest-first":
+            order = longest_first({key: estimates[key] for key in groups})
+        items[:] = [item for key in order for item in groups[key]]
+
+
+    def pytest_report_collectionfinish(self):
+        """Shows which shard is being run"""
+
+        return self.summary
+
+
+    def pytest_runtest_logreport(self, report):
+        """Adds up setup, call and teardown durations of every test of the class"""
+
+        # Results taken from the result cache took no time, and don't tell anything about the class
+        if getattr(report, "cached", False):
+            return
+        key = group_key(report.nodeid)
+        self.measured[key] = self.measured.get(key, 0.0) + report.duration
+
+
+    def pytest_sessionfinish(self):
+        """Saves durations measured during this run"""
+
+        if self.measured:
+            self.save()
+
+
+def pytest_configure(config):
+    """Registers the scheduler"""
+
+    config.pluginmanager.register(DurationScheduler(config), "duration_scheduler")
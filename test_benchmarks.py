@@ -0,0 +1,172 @@
+import time
+import timeit
+import pytest
+from collections import namedtuple
+
+from pages.base_page import BasePage
+from helpers import compare_time, zip_by_key, reconcile_portfolio, synthetic_symbols, validate_timestamps
+from constants import CommonConstants as CC, DefaultConstants as DC, DatabaseConstants as DBC
+
+
+# Numbers of cells of the synthetic tables given to organize_cell_data()
+TABLE_SIZES = [10, 1000, 100000, 1000000]
+# Numbers of cells of the smaller and the larger table organize_cell_texts() is timed with, to tell how it scales
+SCALING_SIZES = (20000, 200000)
+# Time of organizing the larger table may grow this many times faster than the table itself
+# (a linear function stays close to 1, a quadratic one grows as fast as the table does)
+SCALING_SLACK = 2
+# Number of keys of the synthetic dictionaries given to zip_by_key()
+DICT_SIZE = 100000
+# Number of positions of the synthetic portfolio given to reconcile_portfolio()
+PORTFOLIO_SIZE = 50000
+# Number of timestamps of the synthetic history given to validate_timestamps()
+HISTORY_SIZE = 100000
+# Text of the synthetic error image; long, and full of characters memegen has to escape
+# (except for '-': get_error_image_text() reads the escaped '--' as two spaces)
+MEME_TEXT = "400 invalid symbol: it_s 100% not a stock? #no /way \"really\" " * 20
+
+# Row of a Default page table, as its cells' texts
+TABLE_ROW = ["AAPL", "Apple Inc", "12", "$1,234.56", "$14,814.72"]
+
+# Stands in for a WebElement: organize_cell_data() only reads the text of cells
+Cell = namedtuple('Cell', ['text'])
+
+
+class ErrorImage():
+    """Stands in for the error image WebElement: get_error_image_text() only reads its src"""
+
+    def __init__(self, src):
+        self.src = src
+
+    def get_attribute(self, name):
+        return self.src
+
+
+def escape(s):
+    """
+    Escape special characters.
+    escape() from CS50's Finance Problem set, as of June 2023
+    """
+
+    for old, new in [("-", "--"), (" ", "-"), ("_", "__"), ("?", "~q"),
+                     ("%", "~p"), ("#", "~h"), ("/", "~s"), ("\"", "''")]:
+        s = s.replace(old, new)
+    return s
+
+
+@pytest.mark.no_browser
+@pytest.mark.benchmark
+class TestHelperBenchmarks():
+    """
+    Measure calls per second and allocations of the pure-Python helpers that run on hot paths,
+    with synthetic inputs. Run with '--benchmark'; store baselines with '--benchmark-save'
+    """
+
+    @pytest.fixture(scope="class")
+    def page(self):
+        return BasePage(None, "")
+
+
+    @pytest.fixture(scope="class")
+    def headers(self):
+        return [Cell(header) for header in DC.EXPECTED_HEADERS]
+
+
+    @pytest.mark.parametrize("cell_count", TABLE_SIZES)
+    def test_organize_cell_data(self, benchmark, page, headers, cell_count):
+        """Benchmark organize_cell_data() on a Default page table of the given number of cells"""
+
+        cells = [Cell(TABLE_ROW[index % len(TABLE_ROW)]) for index in range(cell_count)]
+        benchmark(page.organize_cell_data, cells, headers)
+
+
+    @pytest.mark.parametrize("value", ["$1,234,567.89", "1234567", "AAPL"])
+    def test_is_currency(self, benchmark, page, value):
+        """Benchmark is_currency()"""
+
+        benchmark(page.is_currency, value)
+
+
+    @pytest.mark.parametrize("value", ["-1234567", "$1,234.56", "AAPL"])
+    def test_is_integer(self, benchmark, page, value):
+        """Benchmark is_integer()"""
+
+        benchmark(page.is_integer, value)
+
+
+    def test_currency_to_number(self, benchmark, page):
+        """Benchmark currency_to_number()"""
+
+        benchmark(page.currency_to_number, "$1,234,567.89")
+
+
+    def test_get_error_image_text(self, benchmark, page):
+        """Benchmark get_error_image_text() (URL parsing and reverse_escape()) on a long memegen URL"""
+
+        image = ErrorImage(f"https://api.memegen.link/images/custom/_/{escape(MEME_TEXT)}.jpg?background=cat.jpg")
+        page.get_error_image = lambda: image
+        benchmark(page.get_error_image_text)
+        assert page.get_error_image_text() == MEME_TEXT.upper(), "Expected reverse_escape() to undo escape()"
+
+
+    def test_compare_time(self, benchmark):
+        """Benchmark compare_time()"""
+
+        benchmark(compare_time, time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+    def test_validate_timestamps(self, benchmark):
+        """Benchmark validate_timestamps() on a history of HISTORY_SIZE transactions made within a minute"""
+
+        now = time.time()
+        values = [time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - 60 + index * 60 // HISTORY_SIZE))
+                  for index in range(HISTORY_SIZE)]
+        benchmark(validate_timestamps, values, now - 60, now, "UTC")
+        assert not validate_timestamps(values, now - 60, now, "UTC"), "Expected no problems in a valid history"
+
+
+    def test_zip_by_key(self, benchmark):
+        """Benchmark zip_by_key() on large dictionaries that share half of their keys"""
+
+        actual = {f"key-{index}": index for index in range(DICT_SIZE)}
+        expected = {f"key-{index}": index for index in range(DICT_SIZE // 2, DICT_SIZE + DICT_SIZE // 2)}
+        benchmark(zip_by_key, actual, expected)
+
+
+    def test_reconcile_portfolio(self, benchmark):
+        """Benchmark reconcile_portfolio() on a consistent portfolio of PORTFOLIO_SIZE positions"""
+
+        symbols = synthetic_symbols(PORTFOLIO_SIZE)
+        shares = [index % 5 + 1 for index in range(PORTFOLIO_SIZE)]
+        totals = [round(amount * CC.MOCK_PRICE, 2) for amount in shares]
+        table = {DC.HEADER_SYMBOL: symbols, DC.HEADER_AMOUNT: shares,
+                 DC.HEADER_PRICE: [CC.MOCK_PRICE] * PORTFOLIO_SIZE, DC.HEADER_TOTAL: totals}
+        db = {DBC.STOCK_NAME: symbols[::-1], DBC.STOCK_AMOUNT: shares[::-1]}
+        total = round(sum(totals) + CC.INITIAL_CASH, 2)
+        benchmark(reconcile_portfolio, table, db, CC.INITIAL_CASH, total)
+        assert not reconcile_portfolio(table, db, CC.INITIAL_CASH, total), "Expected no mismatches in a consistent portfolio"
+
+
+@pytest.mark.no_browser
+class TestHelperScaling():
+    """
+    Verify that helpers which go through whole tables take time proportional to the table size,
+    so extracting tables of scale tests (millions of cells) doesn't take hours
+    """
+
+    def test_organize_cell_texts_is_linear(self):
+        """Verify that organize_cell_texts() takes about as many times longer as there are times more cells"""
+
+        page = BasePage(None, "")
+        timings = []
+        for cell_count in SCALING_SIZES:
+            cells = [TABLE_ROW[index % len(TABLE_ROW)] for index in range(cell_count)]
+            timings.append(min(timeit.repeat(lambda: page.organize_cell_texts(cells, DC.EXPECTED_HEADERS),
+                                             number=1, repeat=3)))
+        size_ratio = SCALING_SIZES[1] / SCALING_SIZES[0]
+        time_ratio = timings[1] / timings[0]
+        assert time_ratio < size_ratio * SCALING_SLACK, (
+            f"Expected organize_cell_texts() to take about {size_ratio:g} times longer for {size_ratio:g} times more cells; " \
+                f"it took {time_ratio:.1f} times longer ({timings[0]:.3f}s for {SCALING_SIZES[0]} cells, " \
+                f"{timings[1]:.3f}s for {SCALING_SIZES[1]})"
+                )
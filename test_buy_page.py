@@ -1,8 +1,8 @@
 import pytest
-from random import choice
 
 from pages.buy_page import BuyPage
-from helpers import generate_tests_cls_parametrize, setup_page, zip_by_key
+from pages.locators import BuyPageLocators
+from helpers import parametrize_class, setup_page, zip_by_key
 from constants import CommonConstants as CC, DatabaseConstants as DBC, BuyConstants as BC, URLS
 
 
@@ -16,94 +16,102 @@ class TestBuyPageBasics():
         return setup_page(BuyPage, browser, URLS.BUY_URL)
 
 
-    def test_has_stock_symbol_input(self, buy_page):
+    @pytest.fixture(scope="class")
+    def page_snapshot(self, buy_page):
+        """Looks up all of the Buy page elements with a single script execution"""
+
+        return buy_page.snapshot(BuyPageLocators)
+
+
+    def test_has_stock_symbol_input(self, page_snapshot):
         """Verify presence of Stock symbol input"""
 
-        assert buy_page.symbol_input() is not None, (
+        assert page_snapshot["SHARES_SYMBOL_INPUT"].count > 0, (
             "Expected Buy page to have stock symbol input field"
             )
         
 
-    def test_stock_symbol_input_is_unique(self, buy_page):
+    def test_stock_symbol_input_is_unique(self, page_snapshot):
         """Verify that Stock symbol input is one of a kind"""
 
-        more_els = buy_page.more_symbol_inputs()
-        assert buy_page.is_unique(more_els), (
-            f"Expected to find only one stock symbol input field on Buy page; found {len(more_els)}"
+        count = page_snapshot["SHARES_SYMBOL_INPUT"].count
+        assert count == 1, (
+            f"Expected to find only one stock symbol input field on Buy page; found {count}"
             )
         
 
-    def test_stock_symbol_input_default_value(self, buy_page):
+    def test_stock_symbol_input_default_value(self, page_snapshot):
         """Verify Stock symbol input's default value"""
 
-        symbol_value = buy_page.get_value(buy_page.symbol_input())
+        symbol_value = page_snapshot["SHARES_SYMBOL_INPUT"].value
         assert symbol_value == BC.EX_STOCK_SYMBOL_VALUE, (
             f"Expected stock symbol input to be {'empty' if BC.EX_STOCK_SYMBOL_VALUE == '' else BC.EX_STOCK_SYMBOL_VALUE}, " \
                 f"actual value: {symbol_value}"
                 )
 
 
-    def test_stock_symbol_input_placeholder(self, buy_page):
+    def test_stock_symbol_input_placeholder(self, page_snapshot):
         """Verify Stock symbol input's placeholder value"""
 
-        symbol_ph = buy_page.get_placeholder(buy_page.symbol_input())
+        symbol_ph = page_snapshot["SHARES_SYMBOL_INPUT"].placeholder
         assert symbol_ph == BC.EX_STOCK_SYMBOL_PH, (
             f"Expected stock symbol placeholder text to be {BC.EX_STOCK_SYMBOL_PH}, actual value: {symbol_ph}"
             )
 
 
-    def test_has_stock_amount_input(self, buy_page):
+    def test_has_stock_amount_input(self, page_snapshot):
         """Verify presence of Stock amount input"""
 
-        assert buy_page.amount_input() is not None, (
+        assert page_snapshot["SHARES_AMOUNT_INPUT"].count > 0, (
             "Expected Buy page to have stock amount input field"
             )
 
 
-    def test_stock_amount_input_is_unique(self, buy_page):
+    def test_stock_amount_input_is_unique(self, page_snapshot):
         """Verify that Stock amount input is one of a kind"""
 
-        more_els = buy_page.more_amount_inputs()
-        assert buy_page.is_unique(more_els), (
-            f"Expected to find only one stock amount input field on Buy page; found {len(more_els)}"
+        count = page_snapshot["SHARES_AMOUNT_INPUT"].count
+        assert count == 1, (
+            f"Expected to find only one stock amount input field on Buy page; found {count}"
             )
                 
 
-    def test_stock_amount_input_default_value(self, buy_page):
+    def test_stock_amount_input_default_value(self, page_snapshot):
         """Verify Stock amount input's default value"""
 
-        amount_value = buy_page.get_value(buy_page.amount_input())
+        amount_value = page_snapshot["SHARES_AMOUNT_INPUT"].value
         assert amount_value == BC.EX_STOCK_AMOUNT_VALUE, (
             f"Expected stock amount input to be empty, actual value: {amount_value}"
             )
         
 
-    def test_stock_amount_input_placeholder(self, buy_page):
+    def test_stock_amount_input_placeholder(self, page_snapshot):
         """Verify Stock amount input's placeholder value"""
 
-        amount_ph = buy_page.get_placeholder(buy_page.amount_input())
+        amount_ph = page_snapshot["SHARES_AMOUNT_INPUT"].placeholder
         assert amount_ph == BC.EX_STOCK_AMOUNT_PH, (
             f"Expected stock amount placeholder text to be {BC.EX_STOCK_AMOUNT_PH}, actual value: {amount_ph}"
             )
         
 
-    def test_has_buy_button(self, buy_page):
+    def test_has_buy_button(self, page_snapshot):
         """Verify presence of Buy button"""
 
-        assert buy_page.buy_button() is not None, (
+        assert page_snapshot["BUY_BUTTON"].count > 0, (
             "Expected Buy page to have Buy button"
             )
 
 
-    def test_buy_button_is_unique(self, buy_page):
+    def test_buy_button_is_unique(self, page_snapshot):
         """Verify that Buy button is one of a kind"""
 
-        more_els = buy_page.more_buy_buttons()
-        assert buy_page.is_unique(more_els), (
-            f"Expected to find only one Buy button on Buy page; found {len(more_els)}"
+        count = page_snapshot["BUY_BUTTON"].count
+        assert count == 1, (
+            f"Expected to find only one Buy button on Buy page; found {count}"
             )
         
 
+@parametrize_class("stock_symbol, stock_amount", lambda: BC.SUCCESSFULL_PURCHASE_CASES)
 class SuccessfullPurchase():
     """
     Test app behaviour in case of successfull stock purchase
@@ -194,16 +202,10 @@ class SuccessfullPurchase():
             )
         
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(SuccessfullPurchase,
-                                                   "stock_symbol, stock_amount",
-                                                   BC.SUCCESSFULL_PURCHASE_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
 
+# Generated classes only submit invalid input, so they can share a browser and a user (see --share-setup)
+@pytest.mark.shared_setup
+@parametrize_class("stock_symbol, case", lambda: CC.INVALID_SYMBOL_CASES)
 class InvalidSymbolPurchase():
     """
     Test app behaviour in case of invalid symbol input
@@ -268,15 +270,9 @@ class InvalidSymbolPurchase():
             )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidSymbolPurchase,
-                                                   "stock_symbol, case",
-                                                   CC.INVALID_SYMBOL_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+# Checks how the amount input reacts to typing, so the form is filled keystroke by keystroke
+@pytest.mark.keystrokes
+@parametrize_class("stock_amount, case", lambda: CC.UNTYPABLE_AMOUNT_CASES)
 class InvalidAmountUntypableBuy():
     """
     Test app behaviour in case of invalid amount input.
@@ -292,13 +288,13 @@ class InvalidAmountUntypableBuy():
 
 
     @pytest.fixture(autouse=True, scope="class")
-    def purchase(self, buy_page, stock_amount):
+    def purchase(self, buy_page, stock_amount, rng):
         """
         Act fixture.
         Performs purchase transaction with given Stock symbol and amount.
         """
 
-        buy_page.buy_stock(choice(CC.TEST_SYMBOLS), stock_amount)
+        buy_page.buy_stock(rng.choice(CC.TEST_SYMBOLS), stock_amount)
 
 
     @pytest.mark.firefox_only
@@ -383,15 +379,9 @@ class InvalidAmountUntypableBuy():
             )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidAmountUntypableBuy,
-                                                   "stock_amount, case",
-                                                   CC.UNTYPABLE_AMOUNT_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+# Checks how the amount input reacts to typing, so the form is filled keystroke by keystroke
+@pytest.mark.keystrokes
+@parametrize_class("stock_amount, case", lambda: CC.TYPABLE_AMOUNT_CASES)
 class InvalidAmountTypableBuy():
     """
     "Typable" part of amount inputs division into separate classes.
@@ -405,13 +395,13 @@ class InvalidAmountTypableBuy():
 
 
     @pytest.fixture(autouse=True, scope="class")
-    def purchase(self, buy_page, stock_amount):
+    def purchase(self, buy_page, stock_amount, rng):
         """
         Act fixture.
         Performs purchase transaction with given Stock symbol and amount.
         """
 
-        buy_page.buy_stock(choice(CC.TEST_SYMBOLS), stock_amount)
+        buy_page.buy_stock(rng.choice(CC.TEST_SYMBOLS), stock_amount)
 
 
     def test_typable_behaviour(self, buy_page, case):
@@ -469,15 +459,7 @@ class InvalidAmountTypableBuy():
             )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidAmountTypableBuy,
-                                                   "stock_amount, case",
-                                                   CC.TYPABLE_AMOUNT_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+@parametrize_class("stock_amount, case", lambda: CC.UNTYPABLE_AMOUNT_CASES + CC.TYPABLE_AMOUNT_CASES)
 class InvalidAmountBackendBuy():
     """
     Test back-end algorithms when submitting invalid amount value.
@@ -489,7 +471,7 @@ class InvalidAmountBackendBuy():
 
 
     @pytest.fixture(autouse=True, scope="class")
-    def purchase(self, buy_page, stock_amount):
+    def purchase(self, buy_page, stock_amount, rng):
         """
         Act fixture.
         Input element's type is being set to text, allowing
@@ -498,7 +480,7 @@ class InvalidAmountBackendBuy():
         """
 
         buy_page.set_type_to_text(buy_page.amount_input())
-        buy_page.buy_stock(choice(CC.TEST_SYMBOLS), stock_amount)
+        buy_page.buy_stock(rng.choice(CC.TEST_SYMBOLS), stock_amount)
 
 
     def test_backend_behaviour(self, buy_page, case):
@@ -547,12 +529,3 @@ class InvalidAmountBackendBuy():
         assert cash == CC.INITIAL_CASH, (
             f"Expected db value of user's cash to be equal to {CC.INITIAL_CASH}, actual amount: {cash}"
             )
-        
-        
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidAmountBackendBuy,
-                                                   "stock_amount, case",
-                                                   CC.UNTYPABLE_AMOUNT_CASES + CC.TYPABLE_AMOUNT_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
\ No newline at end of file
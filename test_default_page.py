@@ -1,9 +1,9 @@
 import pytest
 
-from pages.default_page import DefaultPage
-from pages.buy_page import BuyPage
+from pages.default_page import DefaultPage, AsyncDefaultPage
+from pages.buy_page import BuyPage, AsyncBuyPage
 from pages.sell_page import SellPage
-from helpers import setup_page, zip_by_key
+from helpers import setup_page, zip_by_key, to_columns, reconcile_portfolio, describe_mismatches, run_with_async_page
 from constants import CommonConstants as CC, DefaultConstants as DC, DatabaseConstants as DBC, URLS
 
 
@@ -195,26 +195,14 @@ class TestDefaultTableDependencies():
         """Verify that table data corresponds with db data"""
 
         dft_page.refresh()
-        table_data = dft_page.stocktable_cells()
-        db_data = database.possessed_stocks(new_user.username)
-        db_list = []
-        for db_row in db_data:
-            db_dict = {DC.HEADER_SYMBOL: db_row[DBC.STOCK_NAME],
-                       DC.HEADER_CNAME: db_row[DBC.STOCK_NAME],
-                       DC.HEADER_AMOUNT: db_row[DBC.STOCK_AMOUNT]}
-            db_list.append(db_dict)
-        for db_dict, table_row in zip(db_list, table_data):
-            matches = zip_by_key(table_row, db_dict)
-            # All of the expected values should have a match
-            if len(matches) == len(db_dict):
-                for match in matches:
-                    assert match.actual == match.expected, (
-                    f"Expected for {match.key} in Stock table to match with expected data {match.expected}; " \
-                        f"actual value for {match.key}: {match.actual}"
-                        )
-            else:
-                pytest.fail(reason="Expected to find all of the expected values in the table; " \
-                            f"missing: {[k for k, v in db_dict.items() if k not in table_row.keys()]}")
+        table = dft_page.stocktable_columns()
+        db_data = to_columns(database.possessed_stocks(new_user.username))
+        mismatches = reconcile_portfolio(table, db_data, dft_page.cash_elm_value(), dft_page.total_elm_value(),
+                                         matching=((DC.HEADER_CNAME, DBC.STOCK_NAME), (DC.HEADER_AMOUNT, DBC.STOCK_AMOUNT)))
+        assert not mismatches, (
+            f"Expected stock table to match with database data; found {len(mismatches)} mismatches:\n" \
+                f"{describe_mismatches(mismatches)}"
+                )
 
 
     # Requires mock_selling_tran() to be in list of arguments for correct order of fixture execution
@@ -364,4 +352,49 @@ class TestStockTotalEqualsAmountByPrice():
                     assert row[DC.HEADER_TOTAL] == amount_by_price, (
                         f"Expected stock's {row[DC.HEADER_SYMBOL]} amount to equal {amount_by_price}, " \
                             f"actual value: {row[DC.HEADER_TOTAL]}"
-                            )
\ No newline at end of file
+                            )
+
+
+@pytest.mark.chrome_only
+class TestDefaultPageAsync():
+    """
+    Test async page objects, which send commands over a CDP websocket session:
+    they should read the same data as synchronous ones
+    """
+
+    @pytest.fixture(autouse=True, scope="class")
+    def dft_page(self, browser, new_user):
+        return setup_page(DefaultPage, browser, URLS.DEFAULT_URL)
+
+
+    def test_async_cash_and_total_match(self, dft_page, browser):
+        """Verify that cash and TOTAL values read concurrently match the values read one by one"""
+
+        dft_page.refresh()
+        expected = (dft_page.cash_elm_value(), dft_page.total_elm_value())
+        actual = run_with_async_page(browser, AsyncDefaultPage, URLS.DEFAULT_URL, lambda page: page.cash_and_total())
+        assert actual == expected, (
+            f"Expected cash and TOTAL values read concurrently to be {expected}; actual values: {actual}"
+            )
+
+
+    def test_async_purchase_shows_in_table(self, dft_page, browser):
+        """Verify that a stock bought with async Buy page shows in the stock table read by async Default page"""
+
+        symbol = CC.TEST_SYMBOLS[0]
+
+        async def buy_and_read_table(buy_page):
+            await buy_page.buy_stock(symbol, 1)
+            async_dft_page = AsyncDefaultPage(buy_page.session, buy_page.devtools, URLS.DEFAULT_URL)
+            await async_dft_page.open()
+            return await async_dft_page.stocktable_columns()
+
+        table = run_with_async_page(browser, AsyncBuyPage, URLS.BUY_URL, buy_and_read_table)
+        dft_page.refresh()
+        assert symbol in table.get(DC.HEADER_SYMBOL, []), (
+            f"Expected stock table read by async Default page to have a row for {symbol} after buying it; " \
+                f"actual symbols: {table.get(DC.HEADER_SYMBOL)}"
+                )
+        assert table == dft_page.stocktable_columns(), (
+            "Expected stock table read by async Default page to match the one read by Default page"
+            )
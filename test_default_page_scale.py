@@ -0,0 +1,88 @@
+import time
+import pytest
+
+from pages.default_page import DefaultPage
+from helpers import parametrize_class, setup_page, synthetic_symbols, to_columns, reconcile_portfolio, describe_mismatches
+from constants import CommonConstants as CC, DefaultConstants as DC, URLS
+
+
+@pytest.mark.scale
+@pytest.mark.db_reliant
+@parametrize_class("portfolio_size", DC.PORTFOLIO_SIZES)
+class PortfolioScale():
+    """
+    Test how the Default page and the checks of its table behave when the user holds thousands of positions.
+    Positions are seeded straight into the database; measured metrics are collected into the 'portfolio' curve,
+    which is shown at the end of the run (with '--scale')
+    """
+
+    @pytest.fixture(scope="class")
+    def portfolio(self, database, new_user, portfolio_size):
+        """Seed the given number of distinct positions; returns a dictionary structured as {symbol: shares}"""
+
+        positions = {symbol: index % 5 + 1 for index, symbol in enumerate(synthetic_symbols(portfolio_size))}
+        database.add_trans(new_user.username,
+                           ((symbol, shares, CC.MOCK_PRICE) for symbol, shares in positions.items()))
+        return positions
+
+
+    @pytest.fixture(autouse=True, scope="class")
+    def dft_page(self, browser, portfolio):
+        return setup_page(DefaultPage, browser, URLS.DEFAULT_URL)
+
+
+    @pytest.fixture(scope="class")
+    def extraction(self, dft_page):
+        """Extract the whole table with stocktable_cells(); returns table data and time it took (in seconds)"""
+
+        started = time.perf_counter()
+        table_data = dft_page.stocktable_cells()
+        return table_data, time.perf_counter() - started
+
+
+    def test_page_render(self, dft_page, portfolio_size, scale_curves):
+        """Measure server and response times, response size and DOM size of the Default page"""
+
+        metrics = dft_page.page_metrics()
+        scale_curves.record("portfolio", "server_ms", portfolio_size, round(metrics.server_time))
+        scale_curves.record("portfolio", "response_ms", portfolio_size, round(metrics.response_time))
+        scale_curves.record("portfolio", "transfer_kb", portfolio_size, round(metrics.transfer_size / 1024))
+        scale_curves.record("portfolio", "dom_size", portfolio_size, metrics.dom_size)
+        assert metrics.dom_size > portfolio_size, (
+            f"Expected Default page to have an element for each of {portfolio_size} positions; " \
+                f"page has {metrics.dom_size} elements"
+                )
+
+
+    def test_table_extraction(self, extraction, portfolio, portfolio_size, scale_curves):
+        """Measure extraction time of the table and verify that it has a row with right shares for every position"""
+
+        table_data, seconds = extraction
+        scale_curves.record("portfolio", "extraction_s", portfolio_size, round(seconds, 3))
+        table_shares = {row[DC.HEADER_SYMBOL]: row[DC.HEADER_AMOUNT] for row in table_data}
+        assert table_shares == portfolio, (
+            f"Expected stock table to have a row for each of {portfolio_size} positions with their shares; " \
+                f"table has {len(table_data)} rows, {len(table_shares.items() - portfolio.items())} rows don't match"
+                )
+
+
+    def test_cash_and_total_verification(self, dft_page, database, new_user, extraction, portfolio_size, scale_curves):
+        """
+        Measure verification time of cash and TOTAL values: reconcile the table with the database,
+        and verify that TOTAL is cash + value of all of the stocks
+        """
+
+        table_data, _ = extraction
+        started = time.perf_counter()
+        cash = dft_page.cash_elm_value()
+        mismatches = reconcile_portfolio(to_columns(table_data), to_columns(database.possessed_stocks(new_user.username)),
+                                         cash, dft_page.total_elm_value())
+        scale_curves.record("portfolio", "verification_s", portfolio_size, round(time.perf_counter() - started, 3))
+        assert cash == database.users_cash(new_user.username), (
+            f"Expected cash element value to be {database.users_cash(new_user.username)}, as is in database; " \
+                f"actual value: {cash}"
+                )
+        assert not mismatches, (
+            f"Expected stock table to match with database data; found {len(mismatches)} mismatches:\n" \
+                f"{describe_mismatches(mismatches)}"
+                )
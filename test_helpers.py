@@ -0,0 +1,231 @@
+import pytest
+from itertools import combinations, product
+
+from helpers import covering_array, pairwise_rotation, reconcile_portfolio, validate_timestamps
+from constants import CommonConstants as CC, DefaultConstants as DC, DatabaseConstants as DBC
+
+
+# Dimensions of the synthetic templates given to covering_array(): sizes of each dimension
+COVERING_SIZES = [(2, 2), (2, 2, 3, 2), (3, 3, 3), (4, 4, 2, 2), (2, 3, 2, 3, 2)]
+
+# Symbols and share counts of the synthetic portfolio given to reconcile_portfolio()
+PORTFOLIO = {"AAPL": 3, "MSFT": 1, "NFLX": 7}
+# Start of the window (POSIX time) the synthetic history given to validate_timestamps() was made in: 2024-03-01 12:00:00 UTC
+HISTORY_START = 1709294400
+# Length of that window, in seconds
+HISTORY_WINDOW = 60
+
+
+def uncovered_pairs(dimensions, rows):
+    """Returns pairs of values (dimension, value, other dimension, other value) none of the rows has"""
+
+    pairs = {(i, a, j, b) for i, j in combinations(range(len(dimensions)), 2)
+             for a in dimensions[i] for b in dimensions[j]}
+    return pairs - {(i, row[i], j, row[j]) for row in rows for i, j in combinations(range(len(row)), 2)}
+
+
+@pytest.mark.no_browser
+class TestCoveringArray():
+    """
+    Verify pairwise combinations of template dimensions ('--coverage=pairwise'):
+    every run covers every pair of values, and consecutive runs together cover every combination
+    """
+
+    @pytest.fixture(params=COVERING_SIZES, ids=lambda sizes: "x".join(map(str, sizes)))
+    def dimensions(self, request):
+        return [[f"{chr(ord('a') + k)}{value}" for value in range(size)] for k, size in enumerate(request.param)]
+
+
+    def test_every_run_covers_every_pair(self, dimensions):
+        """Verify that the combinations of every run of the rotation have every pair of values of any two dimensions"""
+
+        rotation_length = len(pairwise_rotation(tuple(map(len, dimensions))))
+        for run in range(rotation_length):
+            missing = uncovered_pairs(dimensions, covering_array(dimensions, run))
+            assert not missing, f"Expected run {run} to cover every pair of values; uncovered pairs: {sorted(missing)}"
+
+
+    def test_runs_are_shorter_than_full_coverage(self, dimensions):
+        """Verify that a pairwise run has fewer combinations than the full set (when there are more than two dimensions)"""
+
+        if len(dimensions) < 3:
+            pytest.skip("Every combination of two dimensions is a pair")
+        full = len(list(product(*dimensions)))
+        rows = covering_array(dimensions, 0)
+        assert len(rows) < full, f"Expected fewer than {full} combinations in a pairwise run, got {len(rows)}"
+
+
+    def test_coverage_accumulates_across_runs(self, dimensions):
+        """
+        Verify that every run of the rotation adds combinations the previous runs didn't have,
+        and that the runs of one rotation together cover every combination
+        """
+
+        full = set(product(*dimensions))
+        rotation_length = len(pairwise_rotation(tuple(map(len, dimensions))))
+        covered = set()
+        for run in range(rotation_length):
+            rows = set(covering_array(dimensions, run))
+            assert rows - covered, f"Expected run {run} to add combinations previous runs didn't have"
+            covered |= rows
+        assert covered == full, (
+            f"Expected {rotation_length} runs to cover all of {len(full)} combinations; " \
+                f"{len(full - covered)} weren't covered"
+                )
+
+
+    def test_rotation_repeats(self, dimensions):
+        """Verify that the run index wraps around the rotation and that the same index gives the same combinations"""
+
+        rotation_length = len(pairwise_rotation(tuple(map(len, dimensions))))
+        assert covering_array(dimensions, 1) == covering_array(dimensions, 1), "Expected a run to be replayable"
+        assert covering_array(dimensions, rotation_length + 1) == covering_array(dimensions, 1), (
+            f"Expected run {rotation_length + 1} to repeat run 1 of a rotation of {rotation_length} runs"
+            )
+
+
+@pytest.mark.no_browser
+class TestReconcilePortfolio():
+    """Verify that reconcile_portfolio() reports every inconsistency between the stock table and the database"""
+
+    @pytest.fixture
+    def portfolio(self):
+        """Returns a consistent portfolio: (table columns, db columns, cash, grand TOTAL)"""
+
+        symbols, shares = list(PORTFOLIO), list(PORTFOLIO.values())
+        totals = [round(amount * CC.MOCK_PRICE, 2) for amount in shares]
+        table = {DC.HEADER_SYMBOL: symbols, DC.HEADER_AMOUNT: shares,
+                 DC.HEADER_PRICE: [CC.MOCK_PRICE] * len(symbols), DC.HEADER_TOTAL: totals}
+        db = {DBC.STOCK_NAME: symbols[::-1], DBC.STOCK_AMOUNT: shares[::-1]}
+        return table, db, CC.INITIAL_CASH, round(sum(totals) + CC.INITIAL_CASH, 2)
+
+
+    def test_consistent_portfolio(self, portfolio):
+        """Verify that a consistent portfolio has no mismatches"""
+
+        mismatches = reconcile_portfolio(*portfolio)
+        assert not mismatches, f"Expected no mismatches in a consistent portfolio, got {mismatches}"
+
+
+    def test_share_count_mismatch(self, portfolio):
+        """Verify that shares in the table which differ from the database are reported for that symbol"""
+
+        table, db, cash, total = portfolio
+        db[DBC.STOCK_AMOUNT][db[DBC.STOCK_NAME].index("MSFT")] = 2
+        mismatches = reconcile_portfolio(table, db, cash, total)
+        assert [(m.symbol, m.check, m.actual, m.expected) for m in mismatches] == [("MSFT", DC.HEADER_AMOUNT, 1, 2)], (
+            f"Expected only MSFT shares to mismatch (1 in the table, 2 in the database), got {mismatches}"
+            )
+
+
+    def test_price_mismatch(self, portfolio):
+        """Verify that a price that doesn't add up to the row's TOTAL is reported, and so is the grand TOTAL"""
+
+        table, db, cash, total = portfolio
+        table[DC.HEADER_PRICE][table[DC.HEADER_SYMBOL].index("NFLX")] = CC.MOCK_PRICE + 1
+        mismatches = reconcile_portfolio(table, db, cash, total)
+        checks = [(m.symbol, m.check) for m in mismatches]
+        assert checks == [("NFLX", DC.HEADER_TOTAL)], (
+            f"Expected the TOTAL of NFLX to mismatch its shares × price, got {mismatches}"
+            )
+        assert mismatches[0].expected == round(7 * (CC.MOCK_PRICE + 1), 2), (
+            f"Expected the TOTAL of NFLX to be compared with 7 × {CC.MOCK_PRICE + 1}, got {mismatches[0]}"
+            )
+
+
+    def test_grand_total_mismatch(self, portfolio):
+        """Verify that a grand TOTAL that isn't the sum of rows and cash is reported"""
+
+        table, db, cash, total = portfolio
+        mismatches = reconcile_portfolio(table, db, cash, round(total + 0.05, 2))
+        checks = [(m.symbol, m.check) for m in mismatches]
+        assert checks == [(None, "grand " + DC.HEADER_TOTAL)], f"Expected the grand TOTAL to mismatch, got {mismatches}"
+
+
+    def test_missing_and_duplicate_rows(self, portfolio):
+        """Verify that symbols missing from the table, absent from the database or shown twice are reported"""
+
+        table, db, cash, total = portfolio
+        # AAPL row of the table shows MSFT instead
+        aapl, msft = table[DC.HEADER_SYMBOL].index("AAPL"), table[DC.HEADER_SYMBOL].index("MSFT")
+        for column in table.values():
+            column[aapl] = column[msft]
+        db[DBC.STOCK_NAME].append("TSLA")
+        db[DBC.STOCK_AMOUNT].append(1)
+        checks = {(m.symbol, m.check, m.actual) for m in reconcile_portfolio(table, db, cash, total)}
+        expected = {("MSFT", "row count", 2), ("AAPL", "row", "missing"), ("TSLA", "row", "missing")}
+        assert expected <= checks, f"Expected {sorted(expected)} to be reported, got {sorted(checks)}"
+
+
+@pytest.mark.no_browser
+class TestValidateTimestamps():
+    """Verify that validate_timestamps() reports every timestamp of a history that is wrong, and why"""
+
+    @pytest.fixture
+    def history(self):
+        """Returns timestamps of a valid history: one every 10 seconds of the window, in ascending order"""
+
+        return [f"2024-03-01 12:00:{second:02}" for second in range(0, HISTORY_WINDOW, 10)]
+
+
+    def problems(self, values, timezone="UTC"):
+        """Returns (index, reason) of every problem found in the history"""
+
+        found = validate_timestamps(values, HISTORY_START, HISTORY_START + HISTORY_WINDOW, timezone)
+        return [(problem.index, problem.reason) for problem in found]
+
+
+    def test_valid_history(self, history):
+        """Verify that a valid history has no problems"""
+
+        problems = self.problems(history)
+        assert not problems, f"Expected no problems in a valid history, got {problems}"
+
+
+    def test_out_of_order(self, history):
+        """Verify that a timestamp earlier than the previous one is reported as breaking the order"""
+
+        history[2], history[3] = history[3], history[2]
+        problems = self.problems(history)
+        assert problems == [(3, "breaks ascending order")], (
+            f"Expected only the 4th timestamp to break ascending order, got {problems}"
+            )
+
+
+    def test_future_timestamp(self, history):
+        """Verify that a timestamp after the end of the window (plus tolerance) is reported"""
+
+        history[-1] = "2024-03-01 12:05:00"
+        problems = self.problems(history)
+        assert [index for index, _ in problems] == [len(history) - 1], (
+            f"Expected only the last timestamp to be reported, got {problems}"
+            )
+        assert "away from the time it was made" in problems[0][1], (
+            f"Expected the last timestamp to be reported as out of the window, got '{problems[0][1]}'"
+            )
+
+
+    @pytest.mark.parametrize("timezone", ["America/New_York", "Asia/Tokyo"])
+    def test_wrong_timezone(self, history, timezone):
+        """Verify that timestamps shown in UTC but read in another timezone are all out of the window"""
+
+        problems = self.problems(history, timezone)
+        assert [index for index, _ in problems] == list(range(len(history))), (
+            f"Expected every timestamp to be out of the window when read in {timezone}, got {problems}"
+            )
+
+
+    def test_timezone_offset(self, history):
+        """Verify that timestamps with an offset are read in it, not in the given timezone"""
+
+        shifted = [value.replace("12:", "14:", 1) + "+02:00" for value in history]
+        problems = self.problems(shifted, "Asia/Tokyo")
+        assert not problems, f"Expected timestamps with a +02:00 offset to be in the window, got {problems}"
+
+
+    def test_unparsable_timestamp(self, history):
+        """Verify that a timestamp that can't be parsed is reported and left out of the order check"""
+
+        history[1] = "yesterday"
+        problems = self.problems(history)
+        assert problems == [(1, "can't be parsed")], f"Expected only the 2nd timestamp to be unparsable, got {problems}"
@@ -4,7 +4,7 @@ import time
 from pages.history_page import HistoryPage
 from pages.buy_page import BuyPage
 from pages.sell_page import SellPage
-from helpers import setup_page, compare_time, zip_by_key
+from helpers import setup_page, validate_timestamps, zip_by_key
 from constants import CommonConstants as CC, DatabaseConstants as DBC, HistoryConstants as HC, URLS
 
 
@@ -158,13 +158,15 @@ class TestHistoryTableBehaviour():
 
     @pytest.fixture(autouse=True, scope="class")
     def buy_and_sell(self, browser, new_user, stock_symbols, stock_amounts):
-        """Buy and sell stocks with given inputs"""
+        """Buy and sell stocks with given inputs; returns the time (time.time()) they started and finished at"""
 
+        started = time.time()
         for symbol, amount in zip(stock_symbols, stock_amounts):
             buy_page = setup_page(BuyPage, browser, URLS.BUY_URL)
             buy_page.buy_stock(symbol, amount)
             sell_page = setup_page(SellPage, browser, URLS.SELL_URL)
             sell_page.sell_stock(symbol, amount)
+        return started, time.time()
 
 
     @pytest.fixture(autouse=True, scope="class")
@@ -208,18 +210,23 @@ class TestHistoryTableBehaviour():
             # All of the expected values should have a match
             if len(matches) == len(ex_dict):
                 for match in matches:
-                    if match.key == HC.HEADER_DATETIME:
-                        assert compare_time(match.actual), (
-                        f"Expected a new transaction row's timestamp in History table to be ±5 sec from current time, " \
-                            f"actual value: {match.actual}"
-                            )
-                    else:
-                        assert match.actual == match.expected, (
-                        f"Expected for {match.key} in History table to match with expected data {match.expected}; " \
-                            f"actual values for {match.key}: {match.actual}"
-                            )
+                    assert match.actual == match.expected, (
+                    f"Expected for {match.key} in History table to match with expected data {match.expected}; " \
+                        f"actual values for {match.key}: {match.actual}"
+                        )
             else:
                 pytest.fail(reason="Expected to find all of the expected values in the table; " \
                             f"missing: {[k for k, v in ex_dict.items() if k not in table_row.keys()]}")
 
 
+    def test_tran_timestamps_match_tran_time(self, hist_page, buy_and_sell):
+        """Verify that transactions' timestamps are within the time they were made in, and are in order"""
+
+        started, finished = buy_and_sell
+        table_data = hist_page.all_history_data()
+        problems = validate_timestamps([row.get(HC.HEADER_DATETIME) for row in table_data], started, finished)
+        assert not problems, (
+            f"Expected timestamps in History table to be ±{HC.TIME_TOLERANCE} sec from the time transactions were made " \
+                f"({HC.TIMEZONE}) and to be in {HC.TIME_ORDER} order; " \
+                f"found: {', '.join(f'{p.value} (row {p.index + 1}) {p.reason}' for p in problems)}"
+                )
@@ -0,0 +1,66 @@
+import time
+import pytest
+
+from pages.history_page import HistoryPage
+from helpers import parametrize_class, setup_page
+from constants import CommonConstants as CC, HistoryConstants as HC, URLS
+
+
+@pytest.mark.scale
+@pytest.mark.db_reliant
+@parametrize_class("history_size", HC.HISTORY_SIZES)
+class HistoryScale():
+    """
+    Test how the History page and extraction of its table behave when the user has made thousands of transactions.
+    Transactions are seeded straight into the database; measured metrics are collected into the 'history' curve,
+    which is shown at the end of the run (with '--scale').
+    Extraction goes through HistoryPage.history_pages(), so apps that paginate or virtualize history can be tested too
+    """
+
+    @pytest.fixture(scope="class")
+    def transactions(self, database, new_user, history_size, scale_curves):
+        """Seed the given number of transactions; returns a dictionary structured as {symbol: transaction count}"""
+
+        started = time.perf_counter()
+        database.add_trans(new_user.username,
+                           ((CC.TEST_SYMBOLS[index % len(CC.TEST_SYMBOLS)], index % 5 + 1, CC.MOCK_PRICE)
+                            for index in range(history_size)))
+        scale_curves.record("history", "seeding_s", history_size, round(time.perf_counter() - started, 3))
+        return {symbol: len(range(index, history_size, len(CC.TEST_SYMBOLS)))
+                for index, symbol in enumerate(CC.TEST_SYMBOLS)}
+
+
+    @pytest.fixture(autouse=True, scope="class")
+    def hist_page(self, browser, transactions):
+        return setup_page(HistoryPage, browser, URLS.HISTORY_URL)
+
+
+    def test_page_response(self, hist_page, history_size, scale_curves):
+        """Measure response time and transfer size of the History page (its first page, if history is paginated)"""
+
+        metrics = hist_page.page_metrics()
+        scale_curves.record("history", "server_ms", history_size, round(metrics.server_time))
+        scale_curves.record("history", "response_ms", history_size, round(metrics.response_time))
+        scale_curves.record("history", "transfer_kb", history_size, round(metrics.transfer_size / 1024))
+        scale_curves.record("history", "dom_size", history_size, metrics.dom_size)
+        assert hist_page.history_rows() is not None, (
+            f"Expected History page to have rows of {history_size} transactions; but the table is empty"
+            )
+
+
+    def test_extraction(self, hist_page, transactions, history_size, scale_curves):
+        """Measure extraction time of the whole history and verify that it has a row for every transaction"""
+
+        started = time.perf_counter()
+        page_count = 0
+        symbol_counts = dict.fromkeys(transactions, 0)
+        for rows in hist_page.history_pages():
+            page_count += 1
+            for row in rows:
+                symbol_counts[row[HC.HEADER_SYMBOL]] = symbol_counts.get(row[HC.HEADER_SYMBOL], 0) + 1
+        scale_curves.record("history", "extraction_s", history_size, round(time.perf_counter() - started, 3))
+        scale_curves.record("history", "pages", history_size, page_count)
+        assert symbol_counts == transactions, (
+            f"Expected History table to have a row for each of {history_size} transactions {transactions}; " \
+                f"actual rows: {symbol_counts}"
+                )
@@ -1,7 +1,7 @@
 import pytest
 
 from pages.login_page import LoginPage
-from helpers import generate_tests_cls_parametrize, setup_page
+from helpers import parametrize_class, setup_page
 from constants import LoginConstants as LC, URLS
 
 
@@ -140,6 +140,9 @@ class TestSuccessfullLogin():
             )
 
 
+# Generated classes only submit invalid input, so they can share a browser and a user (see --share-setup)
+@pytest.mark.shared_setup
+@parametrize_class("username, case", lambda: LC.INVALID_LOGIN_CASES)
 class InvalidLogin():
     """
     Test log in scenario with invalid login
@@ -190,15 +193,9 @@ class InvalidLogin():
             )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidLogin,
-                                                   "username, case",
-                                                   LC.INVALID_LOGIN_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+# Generated classes only submit invalid input, so they can share a browser and a user (see --share-setup)
+@pytest.mark.shared_setup
+@parametrize_class("password, case", lambda: LC.INVALID_PASSWORD_CASES)
 class InvalidPassword():
     """
     Test log in scenario with invalid password
@@ -246,12 +243,3 @@ class InvalidPassword():
         assert error_text == ex_error, (
             f"Expected error image to have text {ex_error}, actual text: {error_text}"
             )
-            
-
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidPassword,
-                                                   "password, case",
-                                                   LC.INVALID_PASSWORD_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
\ No newline at end of file
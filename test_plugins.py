@@ -0,0 +1,518 @@
+import os
+import sys
+import json
+import time
+import threading
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from plugins import distributed
+from plugins.distributed import Coordinator, post
+from plugins.impact import affected_routes
+from plugins.perf_gate import PerfGate, robust_limit, MIN_RUNS, MIN_SLOWDOWN, NOISE_FACTOR
+from plugins.result_cache import ResultCache, CACHE_KEY
+from pages.timings import TIMINGS
+from plugins.scheduler import assign_shards, estimate, UNKNOWN_DURATION
+
+
+# Recorded durations (in seconds) of the synthetic suite given to assign_shards()
+DURATIONS = {
+    "test_a.py::TestLong": 200.0,
+    "test_a.py::TestShort": 3.0,
+    "test_b.py::TestMedium[1-case]": 40.0,
+    "test_b.py::TestMedium[2-case]": 44.0,
+    "test_c.py::TestQuick": 1.5,
+    "test_c.py::test_function": 0.5,
+    "test_d.py::TestTypical": 20.0,
+    "test_d.py::TestOther": 25.0,
+    }
+# Numbers of shards the synthetic suite is split into
+SHARD_COUNTS = [1, 2, 3, 4, 8, 12]
+# Work units of the synthetic suite served by the coordinator: node ids of their tests
+UNITS = [["test_a.py::TestA::test_one", "test_a.py::TestA::test_two"], ["test_b.py::TestB::test_one"]]
+# Lease timeout (in seconds) of the coordinator in tests, so an agent that stops heartbeating is lost quickly
+SHORT_LEASE_TIMEOUT = 0.5
+# Regression threshold (in percent) of the performance gate in tests
+PERF_THRESHOLD = 25
+
+# Synthetic app given to affected_routes(): {path: source}
+IMPACT_APP = {
+    "app.py": """from flask import Flask, render_template
+from helpers import apology, login_required, lookup, usd
+
+app = Flask(__name__)
+app.jinja_env.filters["usd"] = usd
+ROUTE_PATH = "/dynamic"
+
+
+@app.route("/")
+@login_required
+def index():
+    return render_template("index.html")
+
+
+@app.route("/quote", methods=["GET", "POST"])
+@login_required
+def quote():
+    quoted = lookup("AAPL")
+    return render_template("quoted.html", quoted=quoted)
+
+
+@app.route("/register")
+def register():
+    return apology("must provide username")
+
+
+@app.route(ROUTE_PATH)
+def dynamic():
+    return render_template("dynamic.html")
+
+
+@app.template_filter("shout")
+def shout(text):
+    return text.upper()
+""",
+    "helpers.py": """def apology(message):
+    return render_template("apology.html", message=message)
+
+
+def login_required(f):
+    return f
+
+
+def lookup(symbol):
+    return _fetch(symbol)
+
+
+def _fetch(symbol):
+    return {"symbol": symbol}
+
+
+def usd(value):
+    return f"${value:,.2f}"
+""",
+    "templates/layout.html": "{% block main %}{% endblock %}",
+    "templates/index.html": '{% extends "layout.html" %}{% block main %}{% include "table.html" %}{% endblock %}',
+    "templates/quoted.html": '{% extends "layout.html" %}',
+    "templates/apology.html": '{% extends "layout.html" %}',
+    "templates/dynamic.html": '{% extends "layout.html" %}',
+    "templates/table.html": '{% include "row.html" %}',
+    "templates/row.html": "<tr></tr>",
+    }
+
+
+@pytest.mark.no_browser
+class TestAssignShards():
+    """Verify that '--shard=i/n' splits test classes into n parts of about the same recorded duration"""
+
+    @pytest.mark.parametrize("shard_count", SHARD_COUNTS)
+    def test_every_class_is_in_one_shard(self, shard_count):
+        """Verify that every class is assigned to exactly one existing shard"""
+
+        assignment = assign_shards(DURATIONS, shard_count)
+        assert set(assignment) == set(DURATIONS), (
+            f"Expected every class to be assigned; unassigned: {sorted(set(DURATIONS) - set(assignment))}"
+            )
+        wrong = {key: shard for key, shard in assignment.items() if not 0 <= shard < shard_count}
+        assert not wrong, f"Expected shards from 0 to {shard_count - 1}, got {wrong}"
+
+
+    @pytest.mark.parametrize("shard_count", SHARD_COUNTS)
+    def test_shards_are_balanced(self, shard_count):
+        """
+        Verify that shards are balanced by duration: the longest shard is longer than the shortest one
+        by no more than the longest class (the most a single class can unbalance them)
+        """
+
+        assignment = assign_shards(DURATIONS, shard_count)
+        totals = [sum(DURATIONS[key] for key, shard in assignment.items() if shard == index)
+                  for index in range(shard_count)]
+        if shard_count > len(DURATIONS):
+            assert totals.count(0) == shard_count - len(DURATIONS), f"Expected one class per shard, got {totals}"
+            return
+        assert max(totals) - min(totals) <= max(DURATIONS.values()), (
+            f"Expected shards of about the same duration, got {totals}"
+            )
+        assert min(totals) > 0, f"Expected every shard to get classes, got {totals}"
+
+
+    def test_long_class_gets_its_own_shard(self):
+        """Verify that a class longer than all others together isn't put together with any other class"""
+
+        assignment = assign_shards(DURATIONS, 2)
+        long_shard = assignment["test_a.py::TestLong"]
+        others = [key for key, shard in assignment.items() if shard == long_shard and key != "test_a.py::TestLong"]
+        assert not others, f"Expected TestLong to be alone in its shard, shared with {others}"
+
+
+    def test_assignment_is_deterministic(self):
+        """Verify that every shard of a run computes the same assignment, whatever order classes are collected in"""
+
+        reordered = dict(reversed(DURATIONS.items()))
+        assert assign_shards(DURATIONS, 3) == assign_shards(DURATIONS, 3), "Expected the same assignment every time"
+        totals = [sorted(sum(DURATIONS[key] for key, shard in assignment.items() if shard == index) for index in range(3))
+                  for assignment in (assign_shards(DURATIONS, 3), assign_shards(reordered, 3))]
+        assert totals[0] == totals[1], f"Expected the same shard durations for any collection order, got {totals}"
+
+
+    def test_classes_without_recorded_duration(self):
+        """Verify that classes with no recorded duration are estimated and assigned like any other class"""
+
+        keys = [*DURATIONS, "test_b.py::TestMedium[3-case]", "test_e.py::TestNew", "test_e.py::TestNewer"]
+        estimates = {key: estimate(key, DURATIONS) for key in keys}
+        assignment = assign_shards(estimates, 3)
+        assert set(assignment) == set(keys), f"Expected every class to be assigned, got {sorted(assignment)}"
+
+
+    def test_estimate_of_unknown_classes(self):
+        """
+        Verify estimates of classes with no recorded duration: mean of classes of the same template,
+        otherwise median of all recorded durations, otherwise UNKNOWN_DURATION
+        """
+
+        assert estimate("test_a.py::TestLong", DURATIONS) == 200.0, "Expected the recorded duration"
+        same_template = estimate("test_b.py::TestMedium[3-case]", DURATIONS)
+        assert same_template == 42.0, f"Expected the mean of TestMedium classes (42.0), got {same_template}"
+        median = estimate("test_e.py::TestNew", DURATIONS)
+        assert median == 22.5, f"Expected the median of all recorded durations (22.5), got {median}"
+        nothing = estimate("test_e.py::TestNew", {})
+        assert nothing == UNKNOWN_DURATION, f"Expected {UNKNOWN_DURATION} without recorded durations, got {nothing}"
+
+
+@pytest.mark.no_browser
+class TestCoordinator():
+    """
+    Verify that the coordinator of a distributed run ('--coordinator') gives units of agents that stop
+    heartbeating to other agents, and reports every unit once. Agents talk to it over HTTP on localhost
+    """
+
+    @pytest.fixture
+    def coordinator(self, monkeypatch):
+        """Serves UNITS on a free localhost port; returns the coordinator and its URL"""
+
+        monkeypatch.setattr(distributed, "LEASE_TIMEOUT", SHORT_LEASE_TIMEOUT)
+        coordinator = Coordinator(None)
+        coordinator.units = [[SimpleNamespace(nodeid=nodeid) for nodeid in unit] for unit in UNITS]
+        coordinator.pending.extend(range(len(UNITS)))
+        coordinator.remaining = len(UNITS)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), coordinator.handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield coordinator, f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+        server.server_close()
+
+
+    def lose_leases(self, coordinator):
+        """Waits until leases time out (no heartbeats are sent meanwhile) and lets the coordinator requeue them"""
+
+        time.sleep(SHORT_LEASE_TIMEOUT * 1.5)
+        coordinator.requeue_lost()
+
+
+    def test_lost_unit_is_finished_by_another_agent(self, coordinator):
+        """
+        Verify that the unit of an agent that stopped heartbeating is given to the next agent,
+        that only the reports of the agent that finished it are logged, and that the lost agent's late reports are refused
+        """
+
+        coordinator, url = coordinator
+        lost = post(url + "/lease", {"agent": "lost-agent"})
+        assert lost["nodeids"] == UNITS[0], f"Expected the first unit to be leased, got {lost}"
+        reply = post(url + "/report", {"lease": lost["lease"], "reports": [{"from": "lost-agent"}], "finished": False})
+        assert reply["ok"], "Expected a heartbeat of a valid lease to be accepted"
+
+        self.lose_leases(coordinator)
+        second = post(url + "/lease", {"agent": "second-agent"})
+        assert second.get("nodeids") == UNITS[0], f"Expected the lost unit to be given to the second agent, got {second}"
+        reply = post(url + "/report", {"lease": second["lease"], "reports": [{"from": "second-agent"}], "finished": True})
+        assert reply["ok"], "Expected the second agent's reports to be accepted"
+
+        late = post(url + "/report", {"lease": lost["lease"], "reports": [{"from": "lost-agent"}], "finished": True})
+        assert not late["ok"], "Expected reports of the lost agent to be refused once its lease timed out"
+        unit, reports, _ = coordinator.finished.get_nowait()
+        assert (unit, reports) == (0, [{"from": "second-agent"}]), (
+            f"Expected the first unit to be finished with the second agent's reports only, got unit {unit}: {reports}"
+            )
+        assert coordinator.finished.empty(), "Expected the unit to be finished once"
+        assert coordinator.remaining == 1, f"Expected one unit left, got {coordinator.remaining}"
+
+
+    def test_unit_lost_too_often_is_reported(self, coordinator):
+        """Verify that a unit lost by MAX_ATTEMPTS agents is finished with a problem instead of being given out again"""
+
+        coordinator, url = coordinator
+        for attempt in range(distributed.MAX_ATTEMPTS):
+            unit = post(url + "/lease", {"agent": f"agent-{attempt}"})
+            assert unit.get("nodeids") == UNITS[0], f"Expected attempt {attempt + 1} to lease the first unit, got {unit}"
+            self.lose_leases(coordinator)
+
+        unit, reports, problem = coordinator.finished.get_nowait()
+        assert (unit, reports) == (0, []), f"Expected the first unit to be finished without reports, got {unit}: {reports}"
+        assert f"lost by {distributed.MAX_ATTEMPTS} agents" in problem, f"Expected the unit to be reported lost, got '{problem}'"
+        following = post(url + "/lease", {"agent": "next-agent"})
+        assert following.get("nodeids") == UNITS[1], f"Expected the next lease to be the second unit, got {following}"
+        post(url + "/report", {"lease": following["lease"], "reports": [], "finished": True})
+        done = post(url + "/lease", {"agent": "next-agent"})
+        assert done == {"done": True}, f"Expected agents to be told the run is done, got {done}"
+
+
+@pytest.mark.no_browser
+class TestPerfGate():
+    """Verify how the performance gate ('--perf-gate') tells regressions from noise and what it compares"""
+
+    @pytest.fixture
+    def gate(self, tmp_path, monkeypatch):
+        """Returns a gate whose baseline has MIN_RUNS steady runs of a class of 3 tests"""
+
+        # Calls of page object methods timed by other tests of this run aren't part of the synthetic one
+        monkeypatch.setattr(TIMINGS, "calls", {})
+        path = tmp_path / "perf.json"
+        path.write_text(json.dumps({"classes": {"test_a.py::TestA": [10.0] * MIN_RUNS}, "methods": {},
+                                    "counts": {"test_a.py::TestA": 3}}))
+        options = {"--perf-threshold": PERF_THRESHOLD, "--perf-gate": True}
+        return PerfGate(SimpleNamespace(getoption=options.get), str(path))
+
+
+    def run_class(self, gate, key, durations):
+        """Reports the tests of the class to the gate; every test takes (duration) seconds, all of it in its call"""
+
+        for index, duration in enumerate(durations):
+            for when, seconds in (("setup", 0.0), ("call", duration), ("teardown", 0.0)):
+                gate.pytest_runtest_logreport(SimpleNamespace(nodeid=f"{key}::test_{index}", when=when,
+                                                              duration=seconds, failed=False))
+
+
+    def test_limit_of_steady_durations(self):
+        """Verify that durations which don't vary may get slower by the threshold percent"""
+
+        limit = robust_limit([10.0] * 5, PERF_THRESHOLD)
+        assert limit == pytest.approx(12.5), f"Expected the limit to be 10s + {PERF_THRESHOLD}%, got {limit}"
+
+
+    def test_limit_of_noisy_durations(self):
+        """Verify that durations which vary a lot may get slower by NOISE_FACTOR median absolute deviations"""
+
+        samples = [8.0, 12.0, 10.0, 6.0, 14.0]
+        limit = robust_limit(samples, PERF_THRESHOLD)
+        expected = 10.0 + NOISE_FACTOR * 2.0 * 1.4826
+        assert limit == pytest.approx(expected), f"Expected the limit to be {expected:.3f}s for noisy samples, got {limit}"
+
+
+    def test_limit_of_tiny_durations(self):
+        """Verify that durations shorter than a millisecond may get slower by MIN_SLOWDOWN"""
+
+        limit = robust_limit([0.0001] * 5, PERF_THRESHOLD)
+        assert limit == pytest.approx(0.0001 + MIN_SLOWDOWN), f"Expected the limit to be MIN_SLOWDOWN above, got {limit}"
+
+
+    def test_regression_is_found(self, gate):
+        """Verify that a class slower than its limit is reported"""
+
+        gate.measured["classes"]["test_a.py::TestA"] = 13.0
+        regressions = gate.compare()
+        assert len(regressions) == 1 and regressions[0].startswith("test_a.py::TestA: 13.000s is 30% slower"), (
+            f"Expected TestA to regress by 30%, got {regressions}"
+            )
+
+
+    def test_slowdown_within_limit(self, gate):
+        """Verify that a class slower than its median, but within the limit, isn't reported"""
+
+        gate.measured["classes"]["test_a.py::TestA"] = 12.0
+        regressions = gate.compare()
+        assert not regressions, f"Expected a 20% slowdown to be within the {PERF_THRESHOLD}% threshold, got {regressions}"
+
+
+    def test_short_history_is_not_compared(self, gate):
+        """Verify that classes with fewer than MIN_RUNS runs in the baseline aren't compared yet"""
+
+        gate.baseline["classes"]["test_a.py::TestA"] = [10.0] * (MIN_RUNS - 1)
+        gate.measured["classes"]["test_a.py::TestA"] = 100.0
+        regressions = gate.compare()
+        assert not regressions, f"Expected a class with {MIN_RUNS - 1} runs not to be compared, got {regressions}"
+
+
+    def test_same_number_of_tests_is_compared(self, gate):
+        """Verify that a slow class which ran as many tests as in the baseline fails the session"""
+
+        session = SimpleNamespace(exitstatus=pytest.ExitCode.OK)
+        self.run_class(gate, "test_a.py::TestA", [5.0, 5.0, 5.0])
+        gate.pytest_sessionfinish(session)
+        assert session.exitstatus == pytest.ExitCode.TESTS_FAILED, f"Expected the gate to fail, regressions: {gate.regressions}"
+
+
+    def test_different_number_of_tests_is_skipped(self, gate):
+        """
+        Verify that a class which ran fewer tests than in the baseline (e.g. a '-k' selection) or more of them
+        is neither compared nor added to the baseline
+        """
+
+        for durations in ([1.0], [5.0] * 4):
+            session = SimpleNamespace(exitstatus=pytest.ExitCode.OK)
+            gate.measured["classes"], gate.counts = {}, {}
+            self.run_class(gate, "test_a.py::TestA", durations)
+            gate.pytest_sessionfinish(session)
+            assert gate.miscounted == {"test_a.py::TestA"}, f"Expected TestA of {len(durations)} tests to be skipped"
+            assert session.exitstatus == pytest.ExitCode.OK, f"Expected the gate not to compare TestA, got {gate.regressions}"
+            assert gate.load()["classes"]["test_a.py::TestA"] == [10.0] * MIN_RUNS, (
+                f"Expected durations of {len(durations)} tests of TestA not to be added to the baseline"
+                )
+
+
+    def test_new_class_count_is_kept(self, gate):
+        """Verify that the number of tests of a class new to the baseline is kept along with its duration"""
+
+        self.run_class(gate, "test_b.py::TestB", [1.0, 2.0])
+        gate.pytest_sessionfinish(SimpleNamespace(exitstatus=pytest.ExitCode.OK))
+        baseline = gate.load()
+        assert baseline["classes"]["test_b.py::TestB"] == [3.0], f"Expected TestB to take 3s, got {baseline['classes']}"
+        assert baseline["counts"]["test_b.py::TestB"] == 2, f"Expected TestB to have 2 tests, got {baseline['counts']}"
+
+
+@pytest.mark.no_browser
+class TestImpactMapping():
+    """Verify that '--impact' maps changes of the app to the routes they affect, and runs everything when it can't"""
+
+    @pytest.fixture
+    def app_path(self, tmp_path):
+        """Writes IMPACT_APP; returns its directory"""
+
+        path = tmp_path
+        for name, source in IMPACT_APP.items():
+            (path / name).parent.mkdir(parents=True, exist_ok=True)
+            (path / name).write_text(source)
+        return str(path)
+
+
+    def changes_of(self, app_path, path, name):
+        """Returns changes of the line the function (or the line of text) starts at, as parsed from a diff"""
+
+        with open(f"{app_path}/{path}") as source:
+            lines = source.read().splitlines()
+        return {path: {next(number for number, line in enumerate(lines, 1) if name in line)}}
+
+
+    @pytest.mark.parametrize("path, name, routes", [
+        ("app.py", "def quote", {"/quote"}),
+        ("helpers.py", "def lookup", {"/quote"}),
+        ("helpers.py", "def _fetch", {"/quote"}),
+        ("helpers.py", "def apology", {"/register"}),
+        ("helpers.py", "def login_required", {"/", "/quote"}),
+        ("templates/quoted.html", "extends", {"/quote"}),
+        ("templates/row.html", "tr", {"/"}),
+        ], ids=["route", "helper", "helper of a helper", "helper rendering a template", "decorator",
+                "template", "included template"])
+    def test_affected_routes(self, app_path, path, name, routes):
+        """Verify that changed functions and templates affect the routes that use them, directly or not"""
+
+        affected = affected_routes(self.changes_of(app_path, path, name), app_path)
+        assert affected == routes, f"Expected a change of '{name}' in {path} to affect {routes}, got {affected}"
+
+
+    @pytest.mark.parametrize("path, name", [
+        ("helpers.py", "def usd"),
+        ("app.py", "def shout"),
+        ("app.py", "def dynamic"),
+        ("app.py", "app.jinja_env"),
+        ("templates/layout.html", "block"),
+        ], ids=["filter registered at module level", "template filter", "route path that isn't a literal",
+                "module-level code", "layout"])
+    def test_everything_is_affected(self, app_path, path, name):
+        """Verify that changes whose routes can't be known affect everything"""
+
+        affected = affected_routes(self.changes_of(app_path, path, name), app_path)
+        assert affected is None, f"Expected a change of '{name}' in {path} to affect every route, got {affected}"
+
+
+class MemoryCache():
+    """Stands in for pytest's cache (config.cache): keeps values in a dictionary"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key, default):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+def module_level_test():
+    """Stands in for a test function outside of classes"""
+
+
+def other_module_level_test():
+    """Stands in for another test function outside of classes, with a different source"""
+
+    assert True
+
+
+@pytest.mark.no_browser
+class TestResultCache():
+    """Verify what '--result-cache' stores: only results it can replay, keyed on the source of the tests"""
+
+    @pytest.fixture
+    def result_cache(self):
+        """Returns a result cache of the synthetic class 'test_x.py::TestX' of one test"""
+
+        options = {"--browser": "chrome", "--db-usage": "False"}
+        config = SimpleNamespace(cache=MemoryCache(), rootpath=os.path.dirname(os.path.abspath(__file__)),
+                                 getoption=options.get)
+        result_cache = ResultCache(config)
+        result_cache.keys["test_x.py::TestX"] = "key"
+        result_cache.collected["test_x.py::TestX"] = 1
+        return result_cache
+
+
+    def stored_after(self, result_cache, **report):
+        """Reports the test of TestX with the given attributes; returns the results stored at the end of the session"""
+
+        outcome = report.pop("outcome")
+        attributes = {"nodeid": "test_x.py::TestX::test_a", "when": "call", "longrepr": None, "failed": outcome == "failed",
+                      "skipped": outcome == "skipped", "passed": outcome == "passed"}
+        result_cache.pytest_runtest_logreport(SimpleNamespace(**{**attributes, **report}))
+        result_cache.pytest_sessionfinish()
+        return result_cache.config.cache.get(CACHE_KEY, {})
+
+
+    def test_pass_is_stored(self, result_cache):
+        """Verify that a passing class is stored"""
+
+        stored = self.stored_after(result_cache, outcome="passed")
+        assert stored["test_x.py::TestX"]["tests"] == {"test_x.py::TestX::test_a": ("passed", None)}, (
+            f"Expected the pass of TestX to be stored, got {stored}"
+            )
+
+
+    def test_skip_is_stored_with_its_reason(self, result_cache):
+        """Verify that a skip with a (path, line, reason) longrepr is stored with its reason"""
+
+        stored = self.stored_after(result_cache, outcome="skipped", longrepr=("test_x.py", 3, "Skipped: no db"))
+        assert stored["test_x.py::TestX"]["tests"] == {"test_x.py::TestX::test_a": ("skipped", "Skipped: no db")}, (
+            f"Expected the skip of TestX to be stored with its reason, got {stored}"
+            )
+
+
+    @pytest.mark.parametrize("report", [
+        {"outcome": "skipped", "longrepr": "reason", "wasxfail": "reason"},
+        {"outcome": "passed", "wasxfail": "reason"},
+        {"outcome": "skipped", "longrepr": "reason"},
+        ], ids=["xfail", "xpass", "skip without location"])
+    def test_unreplayable_result_is_not_stored(self, result_cache, report):
+        """Verify that expected failures and skips whose longrepr isn't a tuple aren't stored (and don't raise)"""
+
+        stored = self.stored_after(result_cache, **report)
+        assert "test_x.py::TestX" not in stored, f"Expected TestX not to be stored, got {stored}"
+
+
+    def test_functions_are_keyed_on_their_source(self, result_cache):
+        """Verify that tests outside of classes are keyed on the source of their function"""
+
+        module = sys.modules[__name__]
+        keys = [result_cache.class_key(SimpleNamespace(nodeid="test_x.py::test_f", cls=None, function=function,
+                                                       module=module))
+                for function in (module_level_test, module_level_test, other_module_level_test)]
+        assert keys[0] == keys[1], "Expected the same function to get the same key"
+        assert keys[0] != keys[2], "Expected a function with a different source to get a different key"
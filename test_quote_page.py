@@ -1,5 +1,4 @@
 import pytest
-from random import choice
 
 from pages.quote_page import QuotePage
 from helpers import setup_page
@@ -73,8 +72,7 @@ class TestQuotePageBasics():
         
 
 @pytest.mark.parametrize("stock_symbol",
-                         [(choice(CC.TEST_SYMBOLS)),
-                          (choice(CC.TEST_SYMBOLS).lower())],
+                         QC.VALID_QUOTE_CASES,
                          scope="class")
 class TestValidQuote():
     """
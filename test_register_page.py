@@ -1,7 +1,8 @@
 import pytest
 
 from pages.register_page import RegisterPage
-from helpers import generate_tests_cls_parametrize, setup_page
+from pages.locators import RegisterPageLocators
+from helpers import parametrize_class, setup_page
 from constants import CommonConstants as CC, DatabaseConstants as DBC, RegisterConstants as RC, URLS
 
 
@@ -15,128 +16,134 @@ class TestRegisterPageBasics():
         return setup_page(RegisterPage, browser, URLS.REGISTER_URL)
 
 
-    def test_has_username_input(self, reg_page):
+    @pytest.fixture(scope="class")
+    def page_snapshot(self, reg_page):
+        """Looks up all of the Register page elements with a single script execution"""
+
+        return reg_page.snapshot(RegisterPageLocators)
+
+
+    def test_has_username_input(self, page_snapshot):
         """Verify presence of username input"""
 
-        assert reg_page.username_input() is not None, (
+        assert page_snapshot["USERNAME_INPUT"].count > 0, (
             "Expected Username input field to be present on Register page"
             )
         
 
-    def test_username_input_is_unique(self, reg_page):
+    def test_username_input_is_unique(self, page_snapshot):
         """Verify that Username input is one of a kind"""
 
-        more_els = reg_page.more_un_inputs()
-        assert reg_page.is_unique(more_els), (
-            f"Expected to find only one username input field on Register page; found {len(more_els)}"
+        count = page_snapshot["USERNAME_INPUT"].count
+        assert count == 1, (
+            f"Expected to find only one username input field on Register page; found {count}"
             )
 
 
-    def test_username_input_default_value(self, reg_page):
+    def test_username_input_default_value(self, page_snapshot):
         """Verify username input's default value"""
         
-        un_input_value = reg_page.get_value(reg_page.username_input())
+        un_input_value = page_snapshot["USERNAME_INPUT"].value
         assert un_input_value == RC.EX_USERNAME_VALUE, (
             f"Expected username input field to be empty, actual value: {un_input_value}"
             )
         
 
-    def test_username_input_placeholder(self, reg_page):
+    def test_username_input_placeholder(self, page_snapshot):
         """Verify username input's placeholder"""
 
-        un_input_ph = reg_page.get_placeholder(reg_page.username_input())
+        un_input_ph = page_snapshot["USERNAME_INPUT"].placeholder
         assert un_input_ph == RC.EX_REG_UN_PH, (
             f"Expected username input field placeholder text to be {RC.EX_REG_UN_PH}, actual value: {un_input_ph}"
             )
         
 
-    def test_has_password_input(self, reg_page):
+    def test_has_password_input(self, page_snapshot):
         """Verify presence of password input"""
 
-        assert reg_page.password_input() is not None, (
+        assert page_snapshot["PASSWORD_INPUT"].count > 0, (
             "Expected password input field to be present on Register page"
             )
         
 
-    def test_password_input_is_unique(self, reg_page):
+    def test_password_input_is_unique(self, page_snapshot):
         """Verify that password input is one of a kind"""
 
-        more_els = reg_page.more_pw_inputs()
-        assert reg_page.is_unique(more_els), (
-            f"Expected to find only one password input field on Register page; found {len(more_els)}"
+        count = page_snapshot["PASSWORD_INPUT"].count
+        assert count == 1, (
+            f"Expected to find only one password input field on Register page; found {count}"
             )
 
 
-    def test_password_input_default_value(self, reg_page):
+    def test_password_input_default_value(self, page_snapshot):
         """Verify password input's default value"""
 
-        pw_input_value = reg_page.get_value(reg_page.password_input())
+        pw_input_value = page_snapshot["PASSWORD_INPUT"].value
         assert pw_input_value == RC.EX_PASSWORD_VALUE, (
             f"Expected password input field to be {'empty' if RC.EX_PASSWORD_VALUE == '' else RC.EX_PASSWORD_VALUE}, " \
                 f"actual value: {pw_input_value}"
                 )
         
 
-    def test_password_input_placeholder(self, reg_page):
+    def test_password_input_placeholder(self, page_snapshot):
         """Verify password input's placeholder"""
 
-        pw_input_ph = reg_page.get_placeholder(reg_page.password_input())
+        pw_input_ph = page_snapshot["PASSWORD_INPUT"].placeholder
         assert pw_input_ph == RC.EX_REG_PW_PH, (
             f"Expected password input field placeholder text to be {RC.EX_REG_PW_PH}, actual value: {pw_input_ph}"
             )
         
         
-    def test_has_confirm_input(self, reg_page):
+    def test_has_confirm_input(self, page_snapshot):
         """Verify presence of confirm input"""
 
-        assert reg_page.confirm_input() is not None, (
+        assert page_snapshot["CONFIRM_INPUT"].count > 0, (
             "Expected password confirmation input field to be present on registration page"
             )
         
 
-    def test_confirm_input_is_unique(self, reg_page):
+    def test_confirm_input_is_unique(self, page_snapshot):
         """Verify that confirm input is one of a kind"""
 
-        more_els = reg_page.more_conf_inputs()
-        assert reg_page.is_unique(more_els), (
-            f"Expected to find only one password confirmation input field on Register page; found {len(more_els)}"
+        count = page_snapshot["CONFIRM_INPUT"].count
+        assert count == 1, (
+            f"Expected to find only one password confirmation input field on Register page; found {count}"
             )
         
 
-    def test_confirm_input_default_value(self, reg_page):
+    def test_confirm_input_default_value(self, page_snapshot):
         """Verify confirm input's default value"""
 
-        conf_input_value = reg_page.get_value(reg_page.confirm_input())
+        conf_input_value = page_snapshot["CONFIRM_INPUT"].value
         assert conf_input_value == RC.EX_CONF_VALUE, (
             f"Expected password confirmation input field to be empty, actual value: {conf_input_value}"
             )
         
 
-    def test_confirm_input_placeholder(self, reg_page):
+    def test_confirm_input_placeholder(self, page_snapshot):
         """Verify confirm input's placeholder"""
 
-        conf_input_ph = reg_page.get_placeholder(reg_page.confirm_input())
+        conf_input_ph = page_snapshot["CONFIRM_INPUT"].placeholder
         assert conf_input_ph == RC.EX_REG_CONF_PH, (
             f"Expected password confirmation  input field placeholder text to be {RC.EX_REG_CONF_PH}, " \
                 f"actual value: {conf_input_ph}"
                 )
         
 
-    def test_has_register_button(self, reg_page):
+    def test_has_register_button(self, page_snapshot):
         """Verify presence of Register button"""
 
-        register_button = reg_page.register_button()
-        assert register_button is not None, (
+        assert page_snapshot["REGISTER_BUTTON"].count > 0, (
             "Expected Register page to have register button"
             )
 
 
-    def test_register_button_is_unique(self, reg_page):
+    def test_register_button_is_unique(self, page_snapshot):
         """Verify that Register button is one of a kind"""
 
-        more_els = reg_page.more_reg_buttons()
-        assert reg_page.is_unique(more_els), (
-            f"Expected to find only one Register button on Register page; found {len(more_els)}"
+        count = page_snapshot["REGISTER_BUTTON"].count
+        assert count == 1, (
+            f"Expected to find only one Register button on Register page; found {count}"
             )
         
 
@@ -220,6 +227,7 @@ class TestSuccesfullRegistration():
             )
         
 
+@parametrize_class("username, case", lambda: RC.INVALID_USERNAME_CASES)
 class InvalidUsernameRegistration():
     """
     Test registration process with invalid username values
@@ -280,15 +288,7 @@ class InvalidUsernameRegistration():
                 )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidUsernameRegistration,
-                                                   "username, case",
-                                                   RC.INVALID_USERNAME_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+@parametrize_class("password, case", lambda: RC.INVALID_PASSWORD_CASES)
 class InvalidPasswordRegistration():
     """
     Test registration process with invalid password values
@@ -345,15 +345,7 @@ class InvalidPasswordRegistration():
             )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidPasswordRegistration,
-                                                   "password, case",
-                                                   RC.INVALID_PASSWORD_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+@parametrize_class("confirm, case", lambda: RC.INVALID_CONFIRM_CASES)
 class InvalidConfirmRegistration():
     """
     Test registration process with invalid confirm values
@@ -399,12 +391,3 @@ class InvalidConfirmRegistration():
         assert registration is None, (
             "Expected no new users to be added to database"
             )
-
-
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidConfirmRegistration,
-                                                   "confirm, case", 
-                                                   RC.INVALID_CONFIRM_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
\ No newline at end of file
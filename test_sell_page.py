@@ -1,9 +1,9 @@
 import pytest
-from random import choice
 
 from pages.sell_page import SellPage
 from pages.buy_page import BuyPage
-from helpers import generate_tests_cls_parametrize, setup_page, zip_by_key
+from pages.locators import SellPageLocators
+from helpers import parametrize_class, setup_page, zip_by_key
 from constants import CommonConstants as CC, DatabaseConstants as DBC, SellConstants as SC, URLS
 
 
@@ -17,82 +17,89 @@ class TestSellPageBasics():
         return setup_page(SellPage, browser, URLS.SELL_URL)
 
 
-    def test_has_stock_select_input(self, sell_page):
+    @pytest.fixture(scope="class")
+    def page_snapshot(self, sell_page):
+        """Looks up all of the Sell page elements with a single script execution"""
+
+        return sell_page.snapshot(SellPageLocators)
+
+
+    def test_has_stock_select_input(self, page_snapshot):
         """Verify presence of Stock symbol select input"""
 
-        assert sell_page.symbol_select() is not None, (
+        assert page_snapshot["SHARES_LIST"].count > 0, (
             "Expected the Sell Page to have a dropdown list of possessed stocks"
             )
 
 
-    def test_stock_select_is_unique(self, sell_page):
+    def test_stock_select_is_unique(self, page_snapshot):
         """Verify that Stock symbol select input is one of a kind"""
 
-        more_els = sell_page.more_symbol_selects()
-        assert sell_page.is_unique(more_els), (
-            f"Expected to find only one stock symbol select input on Sell page; found {len(more_els)}"
+        count = page_snapshot["SHARES_LIST"].count
+        assert count == 1, (
+            f"Expected to find only one stock symbol select input on Sell page; found {count}"
             )
 
 
-    def test_stock_symbol_select_default_option(self, sell_page):
+    def test_stock_symbol_select_default_option(self, page_snapshot):
         """Verify Stock symbol select input's default option name"""
 
-        symbol_select = sell_page.symbol_select_default_option()
-        assert symbol_select.text == SC.EX_SYMBOL_SELECT_DEFAULT, (
+        option_name = page_snapshot["SHARES_LIST_DEFAULT_OPTION_NAME"].text
+        assert option_name == SC.EX_SYMBOL_SELECT_DEFAULT, (
             f"Expected symbol select input on the Sell page to have default value {SC.EX_SYMBOL_SELECT_DEFAULT}, " \
-                f"actual name: {symbol_select.text}"
+                f"actual name: {option_name}"
                 )
 
 
-    def test_has_stock_amount_input(self, sell_page):
+    def test_has_stock_amount_input(self, page_snapshot):
         """Verify presence of Stock amount input"""
 
-        assert sell_page.amount_input() is not None, (
+        assert page_snapshot["SHARE_AMOUNT_INPUT"].count > 0, (
             "Expected Sell page to have stock amount input field"
             )
 
 
-    def test_stock_amount_input_is_unique(self, sell_page):
+    def test_stock_amount_input_is_unique(self, page_snapshot):
         """Verify that Stock amount input is one of a kind"""
 
-        more_els = sell_page.more_amount_inputs()
-        assert sell_page.is_unique(more_els), (
-            f"Expected to find only one stock amount input field on Sell page; found {len(more_els)}"
+        count = page_snapshot["SHARE_AMOUNT_INPUT"].count
+        assert count == 1, (
+            f"Expected to find only one stock amount input field on Sell page; found {count}"
             )
                 
 
-    def test_stock_amount_input_default_value(self, sell_page):
+    def test_stock_amount_input_default_value(self, page_snapshot):
         """Verify Stock amount input's default value"""
 
-        amount_value = sell_page.get_value(sell_page.amount_input())
+        amount_value = page_snapshot["SHARE_AMOUNT_INPUT"].value
         assert amount_value == SC.EX_AMOUNT_INPUT_VALUE, (
             f"Expected stock amount input to be {'empty' if SC.EX_AMOUNT_INPUT_VALUE == '' else SC.EX_AMOUNT_INPUT_VALUE}, " \
                 f"actual value: {amount_value}"
                 )
         
 
-    def test_stock_amount_input_placeholder(self, sell_page):
+    def test_stock_amount_input_placeholder(self, page_snapshot):
         """Verify Stock amount input's placeholder value"""
 
-        amount_ph = sell_page.get_placeholder(sell_page.amount_input())
+        amount_ph = page_snapshot["SHARE_AMOUNT_INPUT"].placeholder
         assert amount_ph == SC.EX_AMOUNT_INPUT_PH, (
             f"Expected stock amount placeholder text to be {SC.EX_AMOUNT_INPUT_PH}, actual value: {amount_ph}"
             )
         
 
-    def test_has_sell_button(self, sell_page):
+    def test_has_sell_button(self, page_snapshot):
         """Verify presence of Sell button"""
 
-        assert sell_page.sell_button() is not None, (
+        assert page_snapshot["SELL_BUTTON"].count > 0, (
             "Expected Sell page to have Sell button"
             )
 
-    def test_sell_button_is_unique(self, sell_page):
+    def test_sell_button_is_unique(self, page_snapshot):
         """Verify that Sell button is one of a kind"""
 
-        more_els = sell_page.more_sell_buttons()
-        assert sell_page.is_unique(more_els), (
-            f"Expected to find only one Sell button on Sell page; found {len(more_els)}"
+        count = page_snapshot["SELL_BUTTON"].count
+        assert count == 1, (
+            f"Expected to find only one Sell button on Sell page; found {count}"
             )
         
 
@@ -104,11 +111,22 @@ class TestSellPageBasics():
             )
 
 
+@parametrize_class("first_symbol, second_symbol, first_amount, second_amount", lambda: SC.SUCCESSFULL_BATCH_SELLS)
 class StockSelectBehaviour():
     """
     Test behaviour of stock select input 
     """
 
+    @pytest.fixture(scope="class")
+    def stock_symbols(self, first_symbol, second_symbol):
+        return [first_symbol, second_symbol]
+
+
+    @pytest.fixture(scope="class")
+    def stock_amounts(self, first_amount, second_amount):
+        return [first_amount, second_amount]
+
+
     @pytest.fixture(autouse=True, scope="class")
     def buy_stocks(self, browser, new_user, stock_symbols, stock_amounts, database, db_available):
         """
@@ -125,7 +143,6 @@ class StockSelectBehaviour():
                 buy_page.buy_stock(symbol, amount)
 
 
-
     @pytest.fixture(autouse=True, scope="class")
     # Requires buy_stocks() as one of arguments to control the correct order of fixture execution
     def sell_page(self, browser, buy_stocks):
@@ -169,15 +186,7 @@ class StockSelectBehaviour():
                     )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(StockSelectBehaviour,
-                                                   "stock_symbols, stock_amounts",
-                                                   SC.SUCCESSFULL_BATCH_SELLS
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+@parametrize_class("stock_symbol, stock_amount", lambda: SC.SUCCESSFULL_SELL_CASES)
 class SuccessfullSelling():
     """
     Test app behaviour in case of successfull stock selling
@@ -286,15 +295,10 @@ class SuccessfullSelling():
             )
         
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(SuccessfullSelling,
-                                                   "stock_symbol, stock_amount",
-                                                   SC.SUCCESSFULL_SELL_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
 
+# Checks how the amount input reacts to typing, so the form is filled keystroke by keystroke
+@pytest.mark.keystrokes
+@parametrize_class("stock_amount, case", lambda: CC.UNTYPABLE_AMOUNT_CASES)
 class InvalidAmountUntypableSell():
     """
     Test app behaviour in case of invalid amount input.
@@ -305,10 +309,10 @@ class InvalidAmountUntypableSell():
     """
 
     @pytest.fixture(autouse=True, scope="class")
-    def pick_stock(self):
+    def pick_stock(self, rng):
         """Pick random stock"""
 
-        return choice(CC.TEST_SYMBOLS)
+        return rng.choice(CC.TEST_SYMBOLS)
 
 
     @pytest.fixture(autouse=True, scope="class")
@@ -383,7 +387,6 @@ class InvalidAmountUntypableSell():
                 )
 
 
-
     @pytest.mark.chrome_only
     def test_chrome_untypable_behaviour(self, sell_page, case):
         """
@@ -427,15 +430,9 @@ class InvalidAmountUntypableSell():
             )
 
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidAmountUntypableSell,
-                                                   "stock_amount, case",
-                                                   CC.UNTYPABLE_AMOUNT_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
-
+# Checks how the amount input reacts to typing, so the form is filled keystroke by keystroke
+@pytest.mark.keystrokes
+@parametrize_class("stock_amount, case", lambda: CC.TYPABLE_AMOUNT_CASES)
 class InvalidAmountTypableSell():
     """
     "Typable" part of amount inputs division into separate classes.
@@ -444,10 +441,10 @@ class InvalidAmountTypableSell():
     """
 
     @pytest.fixture(autouse=True, scope="class")
-    def pick_stock(self):
+    def pick_stock(self, rng):
         """Pick random stock"""
 
-        return choice(CC.TEST_SYMBOLS)
+        return rng.choice(CC.TEST_SYMBOLS)
 
 
     @pytest.fixture(autouse=True, scope="class")
@@ -540,25 +537,18 @@ class InvalidAmountTypableSell():
             )
         
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidAmountTypableSell,
-                                                   "stock_amount, case",
-                                                   CC.TYPABLE_AMOUNT_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
 
+@parametrize_class("stock_amount, case", lambda: CC.TYPABLE_AMOUNT_CASES + CC.UNTYPABLE_AMOUNT_CASES)
 class InvalidAmountBackendSell():
     """
     Test back-end algorithms when submitting invalid amount value.
     """
 
     @pytest.fixture(autouse=True, scope="class")
-    def pick_stock(self):
+    def pick_stock(self, rng):
         """Pick random stock"""
 
-        return choice(CC.TEST_SYMBOLS)
+        return rng.choice(CC.TEST_SYMBOLS)
 
 
     @pytest.fixture(autouse=True, scope="class")
@@ -644,15 +634,10 @@ class InvalidAmountBackendSell():
             )
         
 
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidAmountBackendSell,
-                                                   "stock_amount, case",
-                                                   CC.TYPABLE_AMOUNT_CASES + CC.UNTYPABLE_AMOUNT_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
-
 
+# Generated classes only submit invalid input, so they can share a browser and a user (see --share-setup)
+@pytest.mark.shared_setup
+@parametrize_class("stock_symbol, case", lambda: CC.INVALID_SYMBOL_CASES)
 class InvalidStockSymbolBackend():
     """
     Verify back-end algorithms when submitting invalid stock symbol value.
@@ -718,12 +703,3 @@ class InvalidStockSymbolBackend():
         assert cash == CC.INITIAL_CASH, (
             f"Expected db value of user's cash to be equal to {CC.INITIAL_CASH}, actual amount: {cash}"
             )
-
-
-# Generate parametrized classes from template:
-generated_classes = generate_tests_cls_parametrize(InvalidStockSymbolBackend,
-                                                   "stock_symbol, case",
-                                                   CC.INVALID_SYMBOL_CASES
-                                                   )
-for class_name in generated_classes:
-    locals()[class_name] = generated_classes[class_name]
\ No newline at end of file
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import time
+import subprocess
+
+import pytest
+
+
+# Collecting the whole suite (in a fresh interpreter) shouldn't take longer than this many times collecting this file alone
+# (which is mostly the interpreter, pytest, conftest.py and plugins starting up). Both are timed in the same run,
+# so a loaded machine slows both of them down
+COLLECTION_BUDGET = 6
+# Modules that are only needed once a browser is launched or the database is used
+DEFERRED_MODULES = ["selenium", "emoji", "werkzeug", "sqlite3"]
+
+# Collects the given tests (the whole suite if none) and prints which of the deferred modules have been imported
+COLLECT_SCRIPT = """
+import sys, json, pytest
+code = pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", *%(args)r])
+print(json.dumps({"code": int(code), "imported": [m for m in %(modules)r if m in sys.modules]}))
+"""
+
+
+def timed_collection(args):
+    """Collects the given tests in a fresh interpreter; returns the collection result and its duration"""
+
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", COLLECT_SCRIPT % {"args": args, "modules": DEFERRED_MODULES}],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    duration = time.perf_counter() - started
+    return json.loads(result.stdout.splitlines()[-1]), duration
+
+
+@pytest.fixture(scope="module")
+def collection():
+    """Collects the suite in a fresh interpreter; returns the collection result and its duration"""
+
+    return timed_collection([])
+
+
+@pytest.fixture(scope="module")
+def startup_duration():
+    """Returns the time of collecting only this file in a fresh interpreter"""
+
+    _, duration = timed_collection([os.path.basename(__file__)])
+    return duration
+
+
+@pytest.mark.no_browser
+class TestStartup():
+    """
+    Verify that test collection stays fast.
+    Doesn't need a browser or the app
+    """
+
+    def test_collection_succeeds(self, collection):
+        """Verify that the suite is collected without errors"""
+
+        result, _ = collection
+        assert result["code"] == 0, f"Expected the suite to be collected without errors, exit code: {result['code']}"
+
+
+    def test_heavy_modules_are_not_imported(self, collection):
+        """Verify that collecting tests doesn't import modules which are only needed to run them"""
+
+        result, _ = collection
+        assert not result["imported"], (
+            f"Expected {', '.join(DEFERRED_MODULES)} to be imported on first use; imported during collection: " \
+                f"{', '.join(result['imported'])}"
+                )
+
+
+    def test_collection_time_is_within_budget(self, collection, startup_duration):
+        """Verify that collecting the suite takes less than COLLECTION_BUDGET times collecting this file alone"""
+
+        _, duration = collection
+        assert duration < COLLECTION_BUDGET * startup_duration, (
+            f"Expected the suite to be collected in less than {COLLECTION_BUDGET} times the {startup_duration:.2f}s " \
+                f"it takes to collect {os.path.basename(__file__)} alone, actual time: {duration:.2f}s"
+                )